@@ -0,0 +1,112 @@
+"""LINE Bot SDK for Python, but enhanced and strongly-typed.
+
+Names are imported from their submodules on first access, so building
+messages doesn't load the server (FastAPI) or the webhook models (pydantic).
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+# name -> submodule it lives in
+_EXPORTS: Dict[str, str] = {
+    "Client": "core",
+    "Channel": "channels",
+    "QuickReply": "components",
+    "QuickReplyItem": "components",
+    "Sender": "components",
+    "TextMessage": "components",
+    "StickerMessage": "components",
+    "ImageMessage": "components",
+    "VideoMessage": "components",
+    "AudioMessage": "components",
+    "LocationMessage": "components",
+    "MessageTemplate": "templates",
+    "HTTPClient": "http",
+    "Metrics": "metrics",
+    "RetryPolicy": "retry",
+    "CircuitBreaker": "retry",
+    "CircuitOpenError": "retry",
+    "HandlerTimeoutError": "watchdog",
+    "EventDeduplicator": "dedup",
+    "MemoryImageSetStore": "cache",
+    "SQLiteImageSetStore": "cache",
+    "MemoryRateLimitBackend": "rate_limiting",
+    "FileRateLimitBackend": "rate_limiting",
+    "RedisRateLimitBackend": "rate_limiting",
+    "SignatureVerifier": "webhooks",
+    "verify_signature": "webhooks",
+}
+
+__all__ = [
+    "Client",
+    "Channel",
+    "QuickReply",
+    "QuickReplyItem",
+    "Sender",
+    "TextMessage",
+    "StickerMessage",
+    "ImageMessage",
+    "VideoMessage",
+    "AudioMessage",
+    "LocationMessage",
+    "MessageTemplate",
+    "HTTPClient",
+    "Metrics",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "HandlerTimeoutError",
+    "EventDeduplicator",
+    "MemoryImageSetStore",
+    "SQLiteImageSetStore",
+    "MemoryRateLimitBackend",
+    "FileRateLimitBackend",
+    "RedisRateLimitBackend",
+    "SignatureVerifier",
+    "verify_signature",
+]
+
+if TYPE_CHECKING:
+    from .cache import MemoryImageSetStore, SQLiteImageSetStore
+    from .channels import Channel
+    from .components import (
+        AudioMessage,
+        ImageMessage,
+        LocationMessage,
+        QuickReply,
+        QuickReplyItem,
+        Sender,
+        StickerMessage,
+        TextMessage,
+        VideoMessage,
+    )
+    from .core import Client
+    from .dedup import EventDeduplicator
+    from .http import HTTPClient
+    from .metrics import Metrics
+    from .rate_limiting import (
+        FileRateLimitBackend,
+        MemoryRateLimitBackend,
+        RedisRateLimitBackend,
+    )
+    from .retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+    from .templates import MessageTemplate
+    from .watchdog import HandlerTimeoutError
+    from .webhooks import SignatureVerifier, verify_signature
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name)
+        ) from None
+
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,21 +1,311 @@
-import gc
-from typing import Any, Dict, List
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
+from .utils import asyncify
 
-WEBHOOK_IMAGE_SET: Dict[str, List[Any]] = {}
+logger = logging.getLogger("alined")
 
 
-def append_wi_set(id: str, d: Any, /):
-    """Append an image to webhook image set."""
-    if id not in WEBHOOK_IMAGE_SET:
-        WEBHOOK_IMAGE_SET[id] = [d]
-    else:
-        WEBHOOK_IMAGE_SET[id].append(d)
+class ImageSetStore(ABC):
+    """Where the images of incomplete image sets are kept.
 
+    Both operations must be atomic: when several workers share a store, every
+    image set is completed (or expired) by exactly one of them.
+    """
 
-def release_wi_set(id: str, /) -> List[Any]:
-    """Release images from webhook set."""
-    d = WEBHOOK_IMAGE_SET[id]
-    del WEBHOOK_IMAGE_SET[id]
-    gc.collect()
-    return d
+    shared: bool = False
+    """Whether the store is shared between processes. Items must be ``bytes``."""
+
+    @abstractmethod
+    async def add(
+        self, id: str, index: int, total: int, item: Any
+    ) -> Optional[List[Any]]:
+        """Add an item to its set.
+
+        Args:
+            id (str): Image set ID.
+            index (int): Index of the image in the set, starting from 1.
+            total (int): Number of images in the set.
+            item (Any): The item.
+
+        Returns:
+            List[Any] | None: Every item of the set, sorted by index, if this
+                completed it (the set is removed); otherwise ``None``.
+        """
+
+    @abstractmethod
+    async def expire(self, ttl: float, max_entries: int) -> List[List[Any]]:
+        """Remove sets older than ``ttl`` seconds, and the oldest sets past
+        ``max_entries``.
+
+        Returns:
+            List[List[Any]]: Items of every removed set, sorted by index.
+        """
+
+    def close(self):
+        """Release resources."""
+
+
+class MemoryImageSetStore(ImageSetStore):
+    """In-process store."""
+
+    def __init__(self):
+        # Insertion ordered: the first entry is the oldest.
+        # id -> (total, created, {index: item})
+        self.entries: Dict[str, "tuple[int, float, Dict[int, Any]]"] = {}
+
+    async def add(
+        self, id: str, index: int, total: int, item: Any
+    ) -> Optional[List[Any]]:
+        if id not in self.entries:
+            self.entries[id] = (total, time.monotonic(), {})
+
+        total, _, items = self.entries[id]
+        items[index] = item
+
+        if len(items) < total:
+            return None
+
+        del self.entries[id]
+        return [items[i] for i in sorted(items)]
+
+    async def expire(self, ttl: float, max_entries: int) -> List[List[Any]]:
+        now = time.monotonic()
+        expired = []
+
+        while self.entries:
+            id, (_, created, items) = next(iter(self.entries.items()))
+            if len(self.entries) <= max_entries and now - created < ttl:
+                break
+
+            del self.entries[id]
+            expired.append([items[i] for i in sorted(items)])
+
+        return expired
+
+    def close(self):
+        self.entries.clear()
+
+
+class SQLiteImageSetStore(ImageSetStore):
+    """Store in an SQLite database, shared by every process on this host.
+
+    Queries run in a worker thread so they never block the event loop.
+
+    Args:
+        path (str): Database path. Every worker must use the same path.
+        timeout (float): Seconds to wait for another process holding the lock.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, *, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS image_sets ("
+                "id TEXT NOT NULL, idx INTEGER NOT NULL, total INTEGER NOT NULL, "
+                "item BLOB NOT NULL, created REAL NOT NULL, PRIMARY KEY (id, idx))"
+            )
+            self._conn = conn
+
+        return self._conn
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _pop(conn: sqlite3.Connection, id: str) -> List[bytes]:
+        items = [
+            row[0]
+            for row in conn.execute(
+                "SELECT item FROM image_sets WHERE id = ? ORDER BY idx", (id,)
+            )
+        ]
+        conn.execute("DELETE FROM image_sets WHERE id = ?", (id,))
+        return items
+
+    def _add(self, id: str, index: int, total: int, item: bytes):
+        def run(conn: sqlite3.Connection) -> Optional[List[bytes]]:
+            conn.execute(
+                "INSERT OR IGNORE INTO image_sets VALUES (?, ?, ?, ?, ?)",
+                (id, index, total, item, time.time()),
+            )
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM image_sets WHERE id = ?", (id,)
+            ).fetchone()
+
+            if count < total:
+                return None
+
+            return self._pop(conn, id)
+
+        return self._transaction(run)
+
+    def _expire(self, ttl: float, max_entries: int):
+        def run(conn: sqlite3.Connection) -> List[List[bytes]]:
+            sets = conn.execute(
+                "SELECT id, MIN(created) AS first FROM image_sets "
+                "GROUP BY id ORDER BY first"
+            ).fetchall()
+            deadline = time.time() - ttl
+            over = len(sets) - max_entries
+
+            return [
+                self._pop(conn, id)
+                for i, (id, first) in enumerate(sets)
+                if i < over or first < deadline
+            ]
+
+        return self._transaction(run)
+
+    async def add(
+        self, id: str, index: int, total: int, item: bytes
+    ) -> Optional[List[bytes]]:
+        return await asyncify(self._add)(id, index, total, item)
+
+    async def expire(self, ttl: float, max_entries: int) -> List[List[bytes]]:
+        return await asyncify(self._expire)(ttl, max_entries)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ImageSetAggregator:
+    """Collects the events of LINE image sets (several images sent at once).
+
+    A set is complete once an image has arrived for every index, whatever the
+    order they arrive in. Sets that don't complete within ``ttl`` seconds, or
+    that are pushed out by ``max_entries`` newer ones, are dropped; if
+    ``on_timeout`` is set it is called with the events received so far.
+
+    Expiry runs in a background sweeper between :meth:`start` and
+    :meth:`close`, or on every :meth:`add` otherwise.
+
+    Args:
+        max_entries (int): Max incomplete sets kept at once.
+        ttl (float): Seconds an incomplete set is kept.
+        on_timeout ((List[Any]) -> Awaitable[Any], optional): Called with the
+            events of an expired set, sorted by index.
+        store (ImageSetStore, optional): Where incomplete sets are kept. Defaults
+            to :obj:`MemoryImageSetStore`.
+        encode ((Any) -> bytes, optional): Serializes events for a shared store.
+        decode ((bytes) -> Any, optional): Deserializes events from a shared store.
+    """
+
+    store: ImageSetStore
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1000,
+        ttl: float = 60.0,
+        on_timeout: Optional[Callable[[List[Any]], Awaitable[Any]]] = None,
+        store: Optional[ImageSetStore] = None,
+        encode: Optional[Callable[[Any], bytes]] = None,
+        decode: Optional[Callable[[bytes], Any]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_timeout = on_timeout
+        self.store = store or MemoryImageSetStore()
+        self.encode = encode
+        self.decode = decode
+
+        self.expired = 0
+        self._sweeper: Optional[asyncio.Task] = None
+
+        if self.store.shared and not (encode and decode):
+            raise ValueError("A shared image set store needs ``encode`` and ``decode``")
+
+    async def start(self):
+        """Start expiring sets in the background."""
+        self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def close(self):
+        """Stop the background sweeper and close the store."""
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+        self.store.close()
+
+    async def add(self, id: str, index: int, total: int, e: Any) -> Optional[List[Any]]:
+        """Add an image event to its set.
+
+        Args:
+            id (str): Image set ID.
+            index (int): Index of the image in the set, starting from 1.
+            total (int): Number of images in the set.
+            e (Any): The event.
+
+        Returns:
+            List[Any] | None: Every event of the set, sorted by index, if this
+                completed it; otherwise ``None``.
+        """
+        items = await self.store.add(
+            id, index, total, self.encode(e) if self.store.shared else e
+        )
+
+        if self._sweeper is None:
+            await self.sweep()
+
+        return None if items is None else self._decode(items)
+
+    async def sweep(self):
+        """Expire old sets now."""
+        for items in await self.store.expire(self.ttl, self.max_entries):
+            self.expired += 1
+
+            if self.on_timeout:
+                try:
+                    await self.on_timeout(self._decode(items))
+                except Exception:
+                    logger.exception("Unhandled error in image set timeout callback")
+
+    def _decode(self, items: List[Any]) -> List[Any]:
+        if self.store.shared:
+            return [self.decode(item) for item in items]  # type: ignore
+
+        return items
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(min(1.0, self.ttl / 4))
+
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to expire image sets")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import re
+from typing import Mapping, Optional, Tuple, TYPE_CHECKING
+
+from .codec import Codec
+from .webhooks import SignatureVerifier
+
+if TYPE_CHECKING:
+    from .types import Headers
+
+# LINE sends ``destination`` first; reading it this way spares a full decode.
+_DESTINATION = re.compile(rb'\s*\{\s*"destination"\s*:\s*"([^"\\]*)"')
+
+
+class Channel:
+    """A LINE channel (official account) served by a :obj:`Client`.
+
+    One client can serve many channels: they share its handlers, workers and
+    outbound connection pool, while each keeps its own secret, access token and
+    rate limits.
+
+    Usage:
+        .. code-block :: python
+
+            client = Client(
+                channels=[
+                    Channel("shop", secret_a, token_a),
+                    Channel("support", secret_b, token_b, destination="U1234..."),
+                ]
+            )
+
+    Args:
+        name (str): Channel name. Webhooks posted to ``/{name}`` are routed to
+            this channel.
+        channel_secret (str): Channel secret.
+        channel_access_token (str): Channel access token.
+        destination (str, optional): User ID of the channel's bot, which LINE
+            sends as the ``destination`` of every webhook. Webhooks posted to
+            ``/`` are routed by it. One channel of a client may leave it out: it
+            is then learnt from the first webhook to ``/`` with an unknown
+            destination that is signed with that channel's secret. Give it for
+            the others, or have LINE post their webhooks to ``/{name}``.
+        rate_limits (Mapping[str, tuple[int, float]], optional): Rate limit
+            overrides of this channel, on top of the client's.
+    """
+
+    name: str
+    channel_secret: str
+    channel_access_token: str
+    destination: Optional[str]
+    rate_limits: Optional[Mapping[str, Tuple[int, float]]]
+    headers: Headers
+    verifier: SignatureVerifier
+
+    def __init__(
+        self,
+        name: str,
+        channel_secret: str,
+        channel_access_token: str,
+        *,
+        destination: Optional[str] = None,
+        rate_limits: Optional[Mapping[str, Tuple[int, float]]] = None,
+    ):
+        self.name = name
+        self.channel_secret = channel_secret
+        self.channel_access_token = channel_access_token
+        self.destination = destination
+        self.rate_limits = rate_limits
+        self.headers = {"Authorization": "Bearer %s" % channel_access_token}
+        self.verifier = SignatureVerifier(channel_secret)
+
+    def __repr__(self):
+        return "Channel(%r, destination=%r)" % (self.name, self.destination)
+
+
+def read_destination(body: bytes, codec: Codec) -> Optional[str]:
+    """The ``destination`` of a webhook body.
+
+    Args:
+        body (bytes): Request body.
+        codec (Codec): Decodes the body when ``destination`` isn't its first field.
+    """
+    match = _DESTINATION.match(body)
+    if match:
+        return match.group(1).decode("utf-8")
+
+    try:
+        return codec.loads(body).get("destination")
+    except Exception:
+        return None
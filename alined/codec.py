@@ -0,0 +1,87 @@
+import json
+from typing import Any, Callable, Literal, Union
+
+CodecName = Literal["auto", "json", "ujson", "orjson", "msgspec"]
+
+
+class Codec:
+    """JSON codec: decodes webhook bodies and encodes API request bodies.
+
+    Args:
+        name (str): Codec name.
+        loads ((bytes) -> Any): Decoder.
+        dumps ((Any) -> bytes): Encoder, producing compact UTF-8 bytes.
+    """
+
+    __slots__ = ("name", "loads", "dumps")
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[Union[bytes, str]], Any],
+        dumps: Callable[[Any], bytes],
+    ):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return "Codec(%r)" % self.name
+
+
+def _stdlib() -> Codec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    return Codec("json", json.loads, lambda obj: encoder.encode(obj).encode("utf-8"))
+
+
+def _ujson() -> Codec:
+    import ujson  # type: ignore
+
+    return Codec(
+        "ujson",
+        ujson.loads,
+        lambda obj: ujson.dumps(obj, ensure_ascii=False).encode("utf-8"),
+    )
+
+
+def _orjson() -> Codec:
+    import orjson  # type: ignore
+
+    return Codec("orjson", orjson.loads, orjson.dumps)
+
+
+def _msgspec() -> Codec:
+    import msgspec  # type: ignore
+
+    return Codec("msgspec", msgspec.json.decode, msgspec.json.encode)
+
+
+_CODECS = {
+    "json": _stdlib,
+    "ujson": _ujson,
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+}
+
+
+def get_codec(name: Union[CodecName, Codec] = "auto") -> Codec:
+    """Get a JSON codec.
+
+    Args:
+        name (str | Codec): ``"json"`` (stdlib), ``"ujson"``, ``"orjson"``,
+            ``"msgspec"``, or ``"auto"`` for the fastest one installed. A
+            :obj:`Codec` is returned as is.
+    """
+    if isinstance(name, Codec):
+        return name
+
+    if name != "auto":
+        return _CODECS[name]()
+
+    for candidate in ("orjson", "msgspec", "ujson"):
+        try:
+            return _CODECS[candidate]()
+        except ModuleNotFoundError:
+            continue
+
+    return _stdlib()
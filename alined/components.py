@@ -1,26 +1,92 @@
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
+from abc import ABC
+import copy
 import re
-from typing import List, Optional, Sequence
+from typing import Any, List, Optional, Sequence, Tuple
 
-from .schema import Emoji
+EMOJI_PATTERN = re.compile(r"<(\w{24}):(\d{3})>")
 
 
 class Component(ABC):
-    @abstractmethod
-    def tojson(self) -> dict: ...
+    """A message component.
+
+    Components are immutable: their JSON is built once on construction and
+    reused for every send. :meth:`tojson` hands out a copy of it, so changing
+    that doesn't change the component.
+    """
+
+    __slots__ = ("_json",)
+
+    _json: dict
+
+    def tojson(self) -> dict:
+        return copy.deepcopy(self._json)
+
+    @property
+    def json(self) -> dict:
+        return self.tojson()
+
+    def _set(self, **fields: Any):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("%s is immutable" % type(self).__name__)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self._json)
 
 
 def tojson(__c: Optional[Component]) -> Optional[dict]:
-    return __c.tojson() if __c else None
+    # The cached JSON itself: it's only nested in other components' JSON
+    return __c._json if __c else None
+
+
+def compact(d: dict) -> dict:
+    """Drop the ``None`` values of ``d``."""
+    return {k: v for k, v in d.items() if v is not None}
+
+
+def fit_emojis(text: str) -> Tuple[str, List[dict]]:
+    """Replace ``<product_id:emoji_id>`` with the ``$`` emoji placeholders.
+
+    Args:
+        text (str): Text.
+
+    Returns:
+        tuple[str, List[dict]]: The text, and its ``emojis`` objects.
+    """
+    # 2023, LineX contributors
+    parts = []
+    emojis = []
+    prev_end = 0
+    index = 0
+
+    for item in EMOJI_PATTERN.finditer(text):
+        product_id, emoji_id = item.groups()
+        start = item.start()
+
+        parts.append(text[prev_end:start])
+        index += start - prev_end
+        emojis.append({"index": index, "productId": product_id, "emojiId": emoji_id})
+
+        parts.append("$")
+        index += 1
+        prev_end = item.end()
+
+    if not emojis:
+        return text, emojis
+
+    parts.append(text[prev_end:])
+    return "".join(parts), emojis
 
 
 class QuickReply(Component):
-    def __init__(self, items: Sequence[QuickReplyItem]): ...
+    __slots__ = ()
 
-    def tojson(self):
-        return {"items": []}
+    def __init__(self, items: Sequence[QuickReplyItem]):
+        self._set(_json={"items": []})
 
 
 class QuickReplyItem:
@@ -43,25 +109,30 @@ class Sender(Component):
             Max file size: 1 MB.
     """
 
+    __slots__ = ("name", "icon_url")
+
+    name: Optional[str]
+    icon_url: Optional[str]
+
     def __init__(self, name: Optional[str] = None, icon_url: Optional[str] = None):
-        assert (name, icon_url).count(
-            None
-        ) <= 1, "At least one of ``name`` or ``icon_url`` needs to be set."
+        assert (name, icon_url).count(None) <= 1, (
+            "At least one of ``name`` or ``icon_url`` needs to be set."
+        )
 
         if name:
-            assert (
-                "line" not in name.lower().split()
-            ), "``LINE`` cannot be used inside the display name."
+            assert "line" not in name.lower().split(), (
+                "``LINE`` cannot be used inside the display name."
+            )
             assert len(name) <= 20
 
         if icon_url:
             assert icon_url and len(icon_url) <= 2000
 
-        self.name = name
-        self.icon_url = icon_url
-
-    def tojson(self):
-        return {"name": self.name, "iconUrl": self.icon_url}
+        self._set(
+            name=name,
+            icon_url=icon_url,
+            _json=compact({"name": name, "iconUrl": icon_url}),
+        )
 
 
 class TextMessage(Component):
@@ -72,10 +143,12 @@ class TextMessage(Component):
             inside of the string.
     """
 
+    __slots__ = ("text", "emojis", "sender", "quick_reply")
+
     text: str
     quick_reply: Optional[QuickReply]
     sender: Optional[Sender]
-    emojis: List[Emoji]
+    emojis: List[dict]
 
     def __init__(
         self,
@@ -85,43 +158,24 @@ class TextMessage(Component):
         sender: Optional[Sender] = None,
         quick_reply: Optional[QuickReply] = None,
     ):
-        self.text = text
-        self.emojis = []
-        self.sender = sender
-        self.quick_reply = quick_reply
-
         # Fit all emojis
-        self.fit_emojis()
-
-    def fit_emojis(self):
-        # 2023, LineX contributors
-        result = ""
-        prev_end = 0
-
-        for item in re.finditer(r"<(\w{24}):(\d{3})>", self.text):
-            product_id, emoji_id = item.groups()
-            start, end = item.start(), item.end()
-            result += self.text[prev_end:start] + "$"
-            prev_end = end
-
-            emoji = Emoji(
-                index=len(result) - 1, length=1, productId=product_id, emojiId=emoji_id
-            )
-            self.emojis.append(emoji)
-
-        result += self.text[prev_end:]
-        self.text = result
-
-    def tojson(self):
-        return {
-            "type": "text",
-            "text": self.text,
-            "emojis": list(map(lambda i: i.model_dump(), self.emojis))
-            if self.emojis
-            else None,
-            "sender": tojson(self.sender),
-            "quickReply": tojson(self.quick_reply),
-        }
+        text, emojis = fit_emojis(text)
+
+        self._set(
+            text=text,
+            emojis=emojis,
+            sender=sender,
+            quick_reply=quick_reply,
+            _json=compact(
+                {
+                    "type": "text",
+                    "text": text,
+                    "emojis": emojis or None,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            ),
+        )
 
 
 class StickerMessage(Component):
@@ -132,6 +186,8 @@ class StickerMessage(Component):
         sticker_id (str): Sticker ID.
     """
 
+    __slots__ = ("pi", "si", "sender", "quick_reply")
+
     def __init__(
         self,
         *,
@@ -141,24 +197,28 @@ class StickerMessage(Component):
         quick_reply: Optional[QuickReply] = None,
     ):
         assert package_id.isdigit() and sticker_id.isdigit()
-        self.pi = package_id
-        self.si = sticker_id
-        self.sender = sender
-        self.quick_reply = quick_reply
-
-    def tojson(self):
-        return {
-            "type": "sticker",
-            "packageId": self.pi,
-            "stickerId": self.si,
-            "sender": tojson(self.sender),
-            "quickReply": tojson(self.quick_reply),
-        }
+        self._set(
+            pi=package_id,
+            si=sticker_id,
+            sender=sender,
+            quick_reply=quick_reply,
+            _json=compact(
+                {
+                    "type": "sticker",
+                    "packageId": package_id,
+                    "stickerId": sticker_id,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            ),
+        )
 
 
 class ImageMessage(Component):
     """Represents an image message."""
 
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -167,16 +227,17 @@ class ImageMessage(Component):
         sender: Optional[Sender] = None,
         quick_reply: Optional[QuickReply] = None,
     ):
-        self.json = {
-            "type": "image",
-            "originalContentUrl": original_content_url,
-            "previewImageUrl": preview_image_url,
-            "sender": tojson(sender),
-            "quickReply": tojson(quick_reply),
-        }
-
-    def tojson(self):
-        return self.json
+        self._set(
+            _json=compact(
+                {
+                    "type": "image",
+                    "originalContentUrl": original_content_url,
+                    "previewImageUrl": preview_image_url,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            )
+        )
 
 
 class VideoMessage(Component):
@@ -194,6 +255,8 @@ class VideoMessage(Component):
         :alt: aspect-ratio
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -207,23 +270,26 @@ class VideoMessage(Component):
             assert len(tracking_id) <= 100
             # no need to import `string` here
             _atz = "abcdefghijklmnopqrstuvwxyz"
-            __allowed = "-.=,+*()%$&;:@{}!?<>[]" + _atz + _atz.upper()
+            __allowed = "-.=,+*()%$&;:@{}!?<>[]0123456789" + _atz + _atz.upper()
             assert all([i in __allowed for i in tracking_id])
 
-        self.json = {
-            "type": "image",
-            "originalContentUrl": original_content_url,
-            "previewImageUrl": preview_image_url,
-            "trackingId": tracking_id,
-            "sender": tojson(sender),
-            "quickReply": tojson(quick_reply),
-        }
-
-    def tojson(self):
-        return self.json
+        self._set(
+            _json=compact(
+                {
+                    "type": "video",
+                    "originalContentUrl": original_content_url,
+                    "previewImageUrl": preview_image_url,
+                    "trackingId": tracking_id,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            )
+        )
 
 
 class AudioMessage(Component):
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -232,18 +298,22 @@ class AudioMessage(Component):
         sender: Optional[Sender] = None,
         quick_reply: Optional[QuickReply] = None,
     ):
-        self.json = {
-            "originalContentUrl": original_content_url,
-            "duration": duration,
-            "sender": tojson(sender),
-            "quickReply": tojson(quick_reply),
-        }
-
-    def tojson(self):
-        return self.json
+        self._set(
+            _json=compact(
+                {
+                    "type": "audio",
+                    "originalContentUrl": original_content_url,
+                    "duration": duration,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            )
+        )
 
 
 class LocationMessage(Component):
+    __slots__ = ()
+
     def __init__(
         self,
         *,
@@ -254,14 +324,16 @@ class LocationMessage(Component):
         sender: Optional[Sender] = None,
         quick_reply: Optional[QuickReply] = None,
     ):
-        self.json = {
-            "title": title,
-            "address": address,
-            "latitude": latitude,
-            "longitude": longitude,
-            "sender": tojson(sender),
-            "quickReply": tojson(quick_reply),
-        }
-
-    def tojson(self):
-        return self.json
+        self._set(
+            _json=compact(
+                {
+                    "type": "location",
+                    "title": title,
+                    "address": address,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "sender": tojson(sender),
+                    "quickReply": tojson(quick_reply),
+                }
+            )
+        )
@@ -1,11 +1,24 @@
-from typing import Any, Literal, NoReturn, Optional, Sequence, Tuple, Union
-
-from .components import TextMessage
+import os
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Literal,
+    NoReturn,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from .http import send_reply_message
+from .http import HTTPClient, iter_message_content, send_reply_message
+from .messaging import MAX_MESSAGES, Message, make_body, push, to_messages
 
-from .types import AnyMessage, Headers
+from .types import AnyMessage
+from .utils import asyncify
 from .dataclass import (
+    BeaconEvent,
     DeliveryContext,
     Event,
     FollowEvent,
@@ -15,24 +28,39 @@ from .dataclass import (
     MemberLeftEvent,
     MessageEvent,
     MessageEventsSource,
+    PostbackEvent,
     Repliable,
     Source,
     SourceGroupChatForCommonWebhooks,
     SourceUser,
     UnfollowEvent,
     UnsendEvent,
+    VideoPlayCompleteEvent,
     WebhookAudioMessage,
     WebhookFileMessage,
     WebhookImageMessage,
     WebhookLocationMessage,
     WebhookStickerMessage,
     WebhookTextMessage,
+    WebhookVideoMessage,
 )
 
 
 class BaseContext:
-    def __init__(self, e: Event):
+    def __init__(
+        self, e: Event, http: Optional[HTTPClient] = None, *, coalesce: bool = False
+    ):
         self.e = e
+        self.http = http
+        self.coalesce = coalesce
+
+    async def flush(self):
+        """Send whatever the handler buffered. Called each time one returns."""
+
+    @property
+    def channel(self) -> Optional[str]:
+        """Name of the channel the event was sent to."""
+        return self.http.channel if self.http else None
 
     @property
     def mode(self) -> Literal["active", "standby"]:
@@ -66,9 +94,12 @@ class BaseContext:
 class MessageContext(BaseContext):
     e: MessageEvent
 
-    def __init__(self, e: MessageEvent, headers: Headers):
-        super().__init__(e)
-        self.headers = headers
+    http: HTTPClient
+
+    def __init__(self, e: MessageEvent, http: HTTPClient, *, coalesce: bool = False):
+        super().__init__(e, http, coalesce=coalesce)
+        self.outbox: List[Message] = []
+        self.replied = False
 
     @property
     def type(self):
@@ -120,27 +151,48 @@ class MessageContext(BaseContext):
         """
         return self.group_id
 
-    async def respond(self, *contents: Union[str, dict, AnyMessage]):
+    async def respond(self, *contents: Union[str, dict, bytes, AnyMessage]):
         """Respond to the message.
 
+        With ``coalesce``, the contents are buffered and every :meth:`respond`
+        of the handler is sent together by :meth:`flush` once it returns. Call
+        :meth:`flush` to send them earlier.
+
         Args:
-            contents (str | :obj:`AnyMessage`): Contents.
+            contents (str | dict | bytes | :obj:`AnyMessage`): Contents. Bytes are
+                encoded messages, e.g. from :meth:`MessageTemplate.render`.
         """
+        self.outbox.extend(to_messages(contents))
 
-        await send_reply_message(
-            body={
-                "replyToken": self.reply_token,
-                "messages": [
-                    TextMessage(c).tojson()
-                    if isinstance(c, str)
-                    else c
-                    if isinstance(c, dict)
-                    else c.tojson()
-                    for c in contents
-                ],
-            },
-            headers=self.headers,
-        )
+        if not self.coalesce:
+            await self.flush()
+
+    async def flush(self):
+        """Send the buffered contents.
+
+        The first 5 messages go out as the reply (a reply token can only be used
+        once); the rest, and anything sent after that, are pushed to the source.
+        """
+        messages, self.outbox = self.outbox, []
+
+        if messages and not self.replied:
+            self.replied = True
+            await send_reply_message(
+                self.http,
+                body=make_body(
+                    self.http.codec,
+                    {"replyToken": self.reply_token},
+                    messages[:MAX_MESSAGES],
+                ),
+            )
+            messages = messages[MAX_MESSAGES:]
+
+        for i in range(0, len(messages), MAX_MESSAGES):
+            await push(
+                self.http,
+                self.group_id or self.user_id,
+                messages[i : i + MAX_MESSAGES],
+            )
 
 
 class TextMessageContext(MessageContext):
@@ -174,7 +226,66 @@ class TextMessageContext(MessageContext):
         return self.quoted_message_id
 
 
-class ImageMessageContext(MessageContext):
+class ContentMessageContext(MessageContext):
+    """Context of a message with binary content (image, video, audio or file)."""
+
+    @property
+    def content_provider(self) -> Any:
+        """Content provider. Files are always on LINE, so this is ``None`` for them."""
+        return getattr(self.message, "content_provider", None)
+
+    async def iter_content(
+        self, *, chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Stream the content in chunks, without holding it all in memory.
+
+        Content hosted on an external server (``content_provider.type`` is
+        ``"external"``) is fetched from there.
+
+        Args:
+            chunk_size (int): Max bytes per chunk.
+        """
+        provider = self.content_provider
+
+        if provider is not None and provider.type == "external":
+            chunks = self.http.stream(
+                provider.original_content_url, chunk_size=chunk_size, authorize=False
+            )
+        else:
+            chunks = iter_message_content(self.http, self.id, chunk_size=chunk_size)
+
+        async for chunk in chunks:
+            yield chunk
+
+    async def save_content(self, path: str, *, chunk_size: int = 64 * 1024) -> int:
+        """Stream the content straight to a file.
+
+        The partial file is removed if the download fails.
+
+        Args:
+            path (str): Destination path.
+            chunk_size (int): Max bytes per chunk.
+
+        Returns:
+            int: Number of bytes written.
+        """
+        f = await asyncify(open)(path, "wb")
+        size = 0
+
+        try:
+            async for chunk in self.iter_content(chunk_size=chunk_size):
+                await asyncify(f.write)(chunk)
+                size += len(chunk)
+        except BaseException:
+            f.close()
+            os.remove(path)
+            raise
+
+        await asyncify(f.close)()
+        return size
+
+
+class ImageMessageContext(ContentMessageContext):
     message: WebhookImageMessage  # type: ignore
 
     @property
@@ -186,7 +297,19 @@ class ImageMessageContext(MessageContext):
         return self.message.image_set
 
 
-class AudioMessageContext(MessageContext):
+class VideoMessageContext(ContentMessageContext):
+    message: WebhookVideoMessage  # type: ignore
+
+    @property
+    def content_provider(self):
+        return self.message.content_provider
+
+    @property
+    def duration(self) -> Optional[int]:
+        return self.message.duration
+
+
+class AudioMessageContext(ContentMessageContext):
     message: WebhookAudioMessage  # type: ignore
 
     @property
@@ -198,7 +321,7 @@ class AudioMessageContext(MessageContext):
         return self.message.duration
 
 
-class FileMessageContext(MessageContext):
+class FileMessageContext(ContentMessageContext):
     message: WebhookFileMessage  # type: ignore
 
     @property
@@ -303,8 +426,8 @@ class FollowContext(GeneralRepliable):
         return self.source.user_id  # type: ignore
 
 
-class UnfollowContext(GeneralRepliable):
-    e: UnfollowEvent  # type: ignore
+class UnfollowContext(BaseContext):
+    e: UnfollowEvent
 
     @property
     def user_id(self) -> SourceUser:
@@ -349,3 +472,40 @@ class MemberLeftContext(BaseContext):
     @property
     def group_id(self) -> SourceGroupChatForCommonWebhooks:
         return self.source.group_id  # type: ignore
+
+
+class PostbackContext(GeneralRepliable):
+    e: PostbackEvent  # type: ignore
+
+    @property
+    def data(self) -> str:
+        return self.e.postback.data
+
+    @property
+    def params(self) -> Optional[Dict[str, Any]]:
+        """Date/time picker or rich menu switch parameters, if any."""
+        return self.e.postback.params
+
+
+class BeaconContext(GeneralRepliable):
+    e: BeaconEvent  # type: ignore
+
+    @property
+    def hwid(self) -> str:
+        return self.e.beacon.hwid
+
+    @property
+    def beacon_type(self) -> Literal["enter", "banner", "stay"]:
+        return self.e.beacon.type
+
+    @property
+    def dm(self) -> Optional[str]:
+        return self.e.beacon.dm
+
+
+class VideoPlayCompleteContext(GeneralRepliable):
+    e: VideoPlayCompleteEvent  # type: ignore
+
+    @property
+    def tracking_id(self) -> str:
+        return self.e.video_play_complete.tracking_id
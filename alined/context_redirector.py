@@ -1,54 +1,17 @@
-from .types import EventDataclasses, Headers
-from .context import (
-    AudioMessageContext,
-    BaseContext,
-    FileMessageContext,
-    FollowContext,
-    ImageMessageContext,
-    JoinContext,
-    LeaveContext,
-    LocationMessageContext,
-    MemberJoinedContext,
-    MemberLeftContext,
-    TextMessageContext,
-    StickerMessageContext,
-    UnfollowContext,
-    UnsendContext,
-)
+from typing import Optional
 
+from .context import BaseContext
+from .http import HTTPClient
+from .routing import ROUTES, route_key
+from .types import EventDataclasses
 
-def redirect_context(event: EventDataclasses, headers: Headers) -> BaseContext:
-    if event.type == "message":
-        msg = event.message
-        ctx = {
-            "text": TextMessageContext,
-            "image": ImageMessageContext,
-            "audio": AudioMessageContext,
-            "file": FileMessageContext,
-            "location": LocationMessageContext,
-            "sticker": StickerMessageContext,
-        }[msg.type](event, headers)
-        return ctx
 
-    elif event.type in {
-        "unsend",
-        "follow",
-        "unfollow",
-        "join",
-        "leave",
-        "memberJoined",
-        "memberLeft",
-    }:
-        ctx = {
-            "unsend": UnsendContext,
-            "follow": FollowContext,
-            "unfollow": UnfollowContext,
-            "join": JoinContext,
-            "leave": LeaveContext,
-            "memberJoined": MemberJoinedContext,
-            "memberLeft": MemberLeftContext,
-        }[event.type](event)
+def redirect_context(
+    event: EventDataclasses, http: Optional[HTTPClient] = None
+) -> BaseContext:
+    try:
+        route = ROUTES[route_key(event)]
+    except KeyError:
+        raise NotImplementedError("unknown") from None
 
-        return ctx
-
-    raise NotImplementedError("unknown")
+    return route.context(event, http)
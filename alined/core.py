@@ -1,24 +1,50 @@
+import asyncio
+from contextlib import asynccontextmanager
 import os
+import time
 from typing import (
     Annotated,
+    Any,
     Dict,
     List,
+    Literal,
+    Mapping,
     Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
 )
 
-from fastapi import FastAPI, Request
-
-from .dataclass_redirector import redirect_dataclass
-from .types import AnyAsyncFunction, EventDataclasses, Events, Headers
-from .context_redirector import redirect_context
-from .server import create_server
-from .webhooks import verify_signature
-from .cache import append_wi_set, release_wi_set
+import httpx
+from pydantic import ValidationError
+
+from .channels import Channel, read_destination
+from .context import BaseContext
+from .codec import Codec, CodecName, get_codec
+from .dataclass_redirector import build_validators, parse_webhook, redirect_dataclass
+from .dedup import EventDeduplicator
+from .lazy import LazyModel, lazy_event
+from .metrics import Metrics
+from .messaging import MulticastResult, broadcast, multicast, push, to_messages
+from .types import AnyAsyncFunction, AnyMessage, EventDataclasses, Events, Headers
+from .http import HTTPClient
+from .rate_limiting import MemoryRateLimitBackend, RateLimitBackend, RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+from .routing import Router
+from .cache import ImageSetAggregator, ImageSetStore
+from .watchdog import (
+    HandlerTimeoutError,
+    SlowHandler,
+    Watchdog,
+    handler_name,
+    run_with_timeout,
+)
+from .workers import EventQueue, gather_all, group_by_source, source_key
 
-try:
-    import ujson as json
-except ModuleNotFoundError:
-    import json
+if TYPE_CHECKING:
+    # Only loaded once the app is created
+    from fastapi import FastAPI, Request
 
 
 class Client:
@@ -28,13 +54,106 @@ class Client:
         channel_secret (str, optional): Channel secret. Env: ``LINE_CHANNEL_SECRET``.
         channel_access_token (str, optional): Channel access token.
             Env: ``LINE_CHANNEL_ACCESS_TOKEN``.
+        max_connections (int): Max concurrent outbound connections to the API.
+        max_keepalive_connections (int): Max idle outbound connections kept alive.
+        http2 (bool): Use HTTP/2 for outbound API calls. Requires ``httpx[http2]``.
+        rate_limits (Mapping[str, tuple[int, float]], optional): Per-endpoint rate
+            limit overrides as ``{endpoint: (requests, per_seconds)}``. Defaults
+            to the documented LINE limits in :obj:`RATE_LIMITS`.
+        rate_limit_backend (RateLimitBackend, optional): Where rate limit state
+            lives. Use :obj:`FileRateLimitBackend` or :obj:`RedisRateLimitBackend`
+            to share one channel quota between worker processes.
+        ack_first (bool): Acknowledge webhooks as soon as they are verified and run
+            the handlers in background workers. LINE then never waits on (and
+            never redelivers because of) slow handlers.
+        queue_size (int): With ``ack_first``, max events waiting to be handled.
+            When the queue is full, the webhook waits ``queue_put_timeout``
+            seconds for room for all of its events and then responds with
+            ``503``; none of them are queued then.
+        queue_workers (int): With ``ack_first``, number of worker tasks.
+        queue_put_timeout (float, optional): See ``queue_size``.
+        concurrent_sources (bool): Handle events from different users, groups and
+            rooms concurrently. Events from the same source are always handled in
+            order.
+        concurrent_handlers (bool): Run the handlers registered for the same event
+            concurrently instead of one after another.
+        parsing (str): How events are parsed.
+
+            - ``"eager"``: The whole webhook is validated into event models up front.
+            - ``"lazy"``: Events wrap the decoded JSON and each field is validated
+              the first time a handler reads it. Fields nobody reads cost nothing.
+            - ``"trusted"``: Like ``"lazy"``, but nothing is validated. The
+              signature has already been verified, so the payload is LINE's own.
+        codec (str | Codec): JSON codec used to decode webhooks (in ``"lazy"`` and
+            ``"trusted"`` parsing) and to encode API request bodies: ``"json"``,
+            ``"ujson"``, ``"orjson"``, ``"msgspec"``, or ``"auto"`` for the fastest
+            one installed.
+        dedup (bool | EventDeduplicator): Drop events whose ``webhookEventId`` was
+            already processed, so LINE redeliveries don't run the handlers twice.
+            Pass an :obj:`EventDeduplicator` to tune its size and TTL or to
+            persist it across restarts.
+        image_set_ttl (float): Seconds to wait for the rest of an image set.
+        image_set_max_entries (int): Max incomplete image sets kept at once.
+        image_set_partial (bool): When an image set times out or is evicted, push
+            ``image_set`` and ``image_fulfill`` with the images received so far.
+        image_set_store (ImageSetStore, optional): Where incomplete image sets are
+            kept. With several worker processes, images of one set can land on
+            different workers; use a shared store such as
+            :obj:`SQLiteImageSetStore` so the sets still complete.
+        coalesce_replies (bool): Buffer the ``ctx.respond()`` calls of a handler
+            and send them as one reply when it returns. Past LINE's 5 messages
+            per reply, and for later handlers of the same event, messages are
+            pushed. When off, each ``respond()`` is sent right away, and only
+            the first one is a reply.
+        retry (bool | RetryPolicy): Resend API calls that failed transiently,
+            with exponential backoff. Replies are only resent when they surely
+            didn't reach LINE; other messages carry a retry key so they are never
+            delivered twice. Pass a :obj:`RetryPolicy` to tune it.
+        circuit_breaker (bool | CircuitBreaker): After repeated failures, fail API
+            calls with :obj:`CircuitOpenError` right away instead of tying up
+            handlers on timeouts, until LINE recovers. Pass a
+            :obj:`CircuitBreaker` to tune it.
+        metrics (bool | Metrics): Time each stage of webhook handling, each handler
+            and each API request, and serve them on ``GET /metrics`` in the
+            Prometheus text format.
+        handler_timeout (float, optional): Seconds after which a handler is
+            cancelled and fails with :obj:`HandlerTimeoutError`. Override it per
+            handler with ``@client.on(name, timeout=...)`` or
+            ``@client.event(timeout=...)``.
+        webhook_timeout (float, optional): Without ``ack_first``, seconds after
+            which the handlers still running for a webhook are cancelled and it
+            is answered with ``503``, so it ends before LINE's delivery timeout
+            even when each handler keeps to its own. LINE then redelivers it;
+            events that were already handled are dropped by ``dedup``.
+        slow_handler_threshold (float, optional): Log handlers still running
+            after this many seconds, with the stack of where they are stuck. The
+            records and per-handler counters are kept on :attr:`watchdog`.
+            ``None`` turns the watchdog off.
+        http_transport (httpx.AsyncBaseTransport, optional): Send API requests
+            through this transport instead of the network, e.g. to a mock of the
+            LINE Platform in tests and benchmarks.
+        channels (Sequence[Channel], optional): Serve several channels from this
+            client instead of the one of ``channel_secret`` and
+            ``channel_access_token``. Webhooks are routed by path
+            (``POST /{name}``) or by their ``destination``. Unknown channels
+            and destinations are answered with ``404``, invalid signatures
+            with ``403``. The handlers, workers
+            and connection pool are shared; rate limits are kept per channel.
+            See :obj:`Channel`.
     """
 
     channel_secret: str
     channel_access_token: str
-    app: FastAPI
+    channels: Dict[str, Channel]
     handlers: Dict[Events, List[AnyAsyncFunction]]
     headers: Headers
+    http: HTTPClient
+    http_clients: Dict[str, HTTPClient]
+    queue: Optional[EventQueue]
+    codec: Codec
+    router: Router
+    dedup: Optional[EventDeduplicator]
+    image_sets: ImageSetAggregator
 
     def __init__(
         self,
@@ -43,87 +162,495 @@ class Client:
         channel_access_token: Annotated[
             Optional[str], "LINE_CHANNEL_ACCESS_TOKEN"
         ] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: bool = False,
+        rate_limits: Optional[Mapping[str, Tuple[int, float]]] = None,
+        rate_limit_backend: Optional[RateLimitBackend] = None,
+        ack_first: bool = False,
+        queue_size: int = 1000,
+        queue_workers: int = 8,
+        queue_put_timeout: Optional[float] = 5.0,
+        concurrent_sources: bool = True,
+        concurrent_handlers: bool = False,
+        parsing: Literal["eager", "lazy", "trusted"] = "eager",
+        codec: Union[CodecName, Codec] = "auto",
+        dedup: Union[bool, EventDeduplicator] = True,
+        image_set_ttl: float = 60.0,
+        image_set_max_entries: int = 1000,
+        image_set_partial: bool = False,
+        image_set_store: Optional[ImageSetStore] = None,
+        coalesce_replies: bool = True,
+        retry: Union[bool, RetryPolicy] = True,
+        circuit_breaker: Union[bool, CircuitBreaker] = True,
+        metrics: Union[bool, Metrics] = False,
+        handler_timeout: Optional[float] = None,
+        webhook_timeout: Optional[float] = None,
+        slow_handler_threshold: Optional[float] = 10.0,
+        http_transport: Optional[httpx.AsyncBaseTransport] = None,
+        channels: Optional[Sequence[Channel]] = None,
     ):
-        self.channel_secret = channel_secret or os.environ["LINE_CHANNEL_SECRET"]
-        self.channel_access_token = (
-            channel_access_token or os.environ["LINE_CHANNEL_ACCESS_TOKEN"]
+        multi_channel = bool(channels)
+        channels = (
+            list(channels)  # type: ignore
+            if channels
+            else [
+                Channel(
+                    "default",
+                    channel_secret or os.environ["LINE_CHANNEL_SECRET"],
+                    channel_access_token or os.environ["LINE_CHANNEL_ACCESS_TOKEN"],
+                )
+            ]
+        )
+        self.channels = {channel.name: channel for channel in channels}
+
+        if len(self.channels) != len(channels):
+            raise RuntimeError(
+                "Duplicate channel names: %s" % [c.name for c in channels]
+            )
+
+        # The first channel is the default one
+        self.channel = channels[0]
+        self.channel_secret = self.channel.channel_secret
+        self.channel_access_token = self.channel.channel_access_token
+        self.headers = self.channel.headers
+        self._destinations = {c.destination: c for c in channels if c.destination}
+        # Channels whose destination is learnt from their first webhook to ``/``
+        self._unlearned = [c for c in channels if not c.destination]
+
+        self.codec = get_codec(codec)
+        self.metrics = (
+            metrics if isinstance(metrics, Metrics) else Metrics() if metrics else None
+        )
+        retry_policy = (
+            retry
+            if isinstance(retry, RetryPolicy)
+            else RetryPolicy()
+            if retry
+            else None
+        )
+        breaker = (
+            circuit_breaker
+            if isinstance(circuit_breaker, CircuitBreaker)
+            else CircuitBreaker()
+            if circuit_breaker
+            else None
+        )
+        rate_limit_backend = rate_limit_backend or MemoryRateLimitBackend()
+
+        # One connection pool, owned by the default channel's client
+        self.http_clients = {}
+        for channel in channels:
+            self.http_clients[channel.name] = HTTPClient(
+                channel.headers,
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                http2=http2,
+                rate_limiter=RateLimiter(
+                    {**(rate_limits or {}), **(channel.rate_limits or {})},
+                    backend=rate_limit_backend,
+                    namespace=channel.name + ":" if multi_channel else "",
+                ),
+                codec=self.codec,
+                retry=retry_policy,
+                breaker=breaker,
+                metrics=self.metrics,
+                transport=http_transport,
+                pool=None
+                if channel is self.channel
+                else self.http_clients[self.channel.name],
+                channel=channel.name,
+            )
+
+        self.http = self.http_clients[self.channel.name]
+
+        self.queue = (
+            EventQueue(
+                self._handle_queued,
+                maxsize=queue_size,
+                workers=queue_workers,
+                put_timeout=queue_put_timeout,
+            )
+            if ack_first
+            else None
         )
-        self.headers = {"Authorization": "Bearer %s" % channel_access_token}
 
-        self.app = create_server(self.handler)
+        self.concurrent_sources = concurrent_sources
+        self.concurrent_handlers = concurrent_handlers
+        self.coalesce_replies = coalesce_replies
+        self.parsing = parsing
+        self.dedup = (
+            dedup
+            if isinstance(dedup, EventDeduplicator)
+            else EventDeduplicator()
+            if dedup
+            else None
+        )
+
+        self.image_sets = ImageSetAggregator(
+            max_entries=image_set_max_entries,
+            ttl=image_set_ttl,
+            on_timeout=self._image_set_timeout if image_set_partial else None,
+            store=image_set_store,
+            encode=self._encode_event,
+            decode=self._decode_event,
+        )
+
+        self.router = Router()
+        self._app: Optional["FastAPI"] = None
+        self._channel_paths = multi_channel
         self.handlers = {}
+        self.handler_timeout = handler_timeout
+        self.webhook_timeout = webhook_timeout
+        self.handler_timeouts: Dict[AnyAsyncFunction, Optional[float]] = {}
+        self._image_set_channels: Dict[str, Channel] = {}
+        self.watchdog = (
+            Watchdog(slow_handler_threshold, on_slow=self._slow_handler)
+            if slow_handler_threshold is not None
+            else None
+        )
 
-    async def handler(self, req: Request):
+        if self.metrics:
+            self._register_metrics(self.metrics)
+
+    @property
+    def app(self) -> "FastAPI":
+        """The ASGI app receiving the webhooks. FastAPI is imported and the app
+        created the first time this is read."""
+        if self._app is None:
+            from .server import create_server
+
+            self._app = create_server(
+                self.handler,
+                lifespan=self.lifespan,
+                metrics=self.metrics,
+                channel_paths=self._channel_paths,
+            )
+
+        return self._app
+
+    def _register_metrics(self, metrics: Metrics):
+        if self.queue:
+            queue = self.queue
+            metrics.gauge(
+                "queue_depth", "Events waiting to be handled.", lambda: queue.depth
+            )
+            metrics.gauge(
+                "queue_lag_seconds",
+                "Time the last handled event waited in the queue.",
+                lambda: queue.lag_last,
+            )
+
+            for name in ("enqueued", "processed", "failed", "rejected"):
+                metrics.gauge(
+                    "queue_%s_total" % name,
+                    "Events %s by the queue." % name,
+                    lambda name=name: getattr(queue, name),
+                    counter=True,
+                )
+
+        if self.dedup:
+            dedup = self.dedup
+            metrics.gauge(
+                "dedup_dropped_total",
+                "Redelivered events dropped.",
+                lambda: dedup.dropped,
+                counter=True,
+            )
+
+        metrics.gauge(
+            "image_sets_expired_total",
+            "Image sets that never completed.",
+            lambda: self.image_sets.expired,
+            counter=True,
+        )
+
+    @asynccontextmanager
+    async def lifespan(self, app: "FastAPI"):
+        """App lifespan: owns the outbound connection pool and the workers."""
+        # Compile the event validators before the first webhook arrives
+        if self.parsing == "eager":
+            build_validators()
+
+        await self.http.start()
+        if self.dedup:
+            await self.dedup.start()
+        if self.queue:
+            await self.queue.start()
+        await self.image_sets.start()
+        if self.watchdog:
+            await self.watchdog.start()
+
+        try:
+            yield
+        finally:
+            if self.watchdog:
+                await self.watchdog.stop()
+            if self.queue:
+                await self.queue.stop()
+            if self.dedup:
+                await self.dedup.stop()
+            await self.image_sets.close()
+
+            await self.http.aclose()
+
+    async def handler(self, req: "Request"):
         # Verify the signature first
         body: bytes = await req.body()
-        signature: str = req.headers["x-line-signature"]
+        signature: str = req.headers.get("x-line-signature", "")
+        metrics = self.metrics
+        started = time.perf_counter()
+        channel = self._channel_for(req.path_params.get("channel"), body, signature)
 
-        if not verify_signature(self.channel_secret, body, signature):
-            raise RuntimeError("Invalid signature (%s)" % signature)
+        if metrics:
+            started = metrics.lap(started, "verify")
 
-        context = json.loads(body)
+        events: Optional[List[EventDataclasses]] = None
 
         # If the events are blank, we're just verifying this endpoint
-        if not context["events"]:
-            return await self.push("verified")
+        if self.parsing == "eager" and self.router.listens_to_all:
+            try:
+                events = parse_webhook(body).events
+            except ValidationError:
+                # An event type without a model; parse event by event below,
+                # skipping it
+                pass
+            else:
+                if not events:
+                    return await self.push("verified")
 
-        for evnt in context["events"]:
-            e = redirect_dataclass(evnt)
+        if events is None:
+            raw = self.codec.loads(body)["events"]
 
-            def redir_ctx(e: EventDataclasses):
-                return redirect_context(e, self.headers)
+            if not raw:
+                return await self.push("verified")
 
-            if e.type == "message":
-                await self.push("message", e)
+            # Only read the ``type`` fields of events nobody listens to
+            wants = self.router.wants
 
-                if e.message.type == "text":
-                    await self.push("text", redir_ctx(e))
+            if self.parsing == "eager":
+                events = [redirect_dataclass(evnt) for evnt in raw if wants(evnt)]
+            else:
+                trusted = self.parsing == "trusted"
+                events = [
+                    lazy_event(evnt, trusted=trusted) for evnt in raw if wants(evnt)
+                ]
+
+        if metrics:
+            started = metrics.lap(started, "parse")
+            for e in events:
+                metrics.events.inc(e.type)
+
+        if self.queue:
+            # All or nothing: LINE redelivers the whole webhook after a 503
+            try:
+                await self.queue.put_many(
+                    [((e, channel), source_key(e)) for e in events]
+                )
+            except asyncio.QueueFull:
+                from fastapi import HTTPException
+
+                raise HTTPException(503, "Event queue is full") from None
+
+            if metrics:
+                metrics.lap(started, "enqueue")
+            return
 
-                elif e.message.type == "image":
-                    image = e.message
-                    ctx = redir_ctx(e)
+        if self.webhook_timeout is None:
+            await self._handle_inline(events, channel)
+        else:
+            task = asyncio.ensure_future(self._handle_inline(events, channel))
 
-                    if image.image_set:
-                        if image.image_set.index == image.image_set.total:
-                            images = release_wi_set(image.image_set.id)
-                            await self.push("image_set", ctx, images)
-                            await self.push("image_fulfill", ctx, images)
-                        else:
-                            append_wi_set(image.image_set.id, image)
+            try:
+                done, _ = await asyncio.wait((task,), timeout=self.webhook_timeout)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
 
-                    await self.push("image", ctx)
-                    await self.push("image_fulfill", ctx, [image])
+            if not done:
+                # Answer before LINE gives up; it redelivers the webhook
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
 
-                elif e.message.type in {"audio", "file", "location", "sticker"}:
-                    await self.push(e.message.type, redir_ctx(e))
+                from fastapi import HTTPException
 
-                else:
-                    # Although pydantic probably has handled this for us
-                    # Just in case :3
-                    raise RuntimeError("Unrecognized message type: %s" % e.message.type)
+                raise HTTPException(503, "Webhook handling timed out")
 
-            elif e.type in {
-                "unsend",
-                "follow",
-                "unfollow",
-                "join",
-                "leave",
-                "memberJoined",
-                "memberLeft",
-            }:
-                if e.type == "memberJoined":
-                    name = "member_joined"
+            task.result()
 
-                elif e.type == "memberLeft":
-                    name = "member_left"
+        if metrics:
+            metrics.lap(started, "handle")
 
-                else:
-                    name = e.type
+    async def _handle_inline(self, events: List[EventDataclasses], channel: Channel):
+        if self.concurrent_sources:
+            await gather_all(
+                self.handle_events(sequence, channel)
+                for sequence in group_by_source(events)
+            )
+        else:
+            await self.handle_events(events, channel)
 
-                await self.push(name, redir_ctx(e))
+    def _channel_for(self, name: Optional[str], body: bytes, signature: str) -> Channel:
+        """The channel a webhook was sent to, once its signature checks out.
 
-            else:
-                raise RuntimeError("Unrecognized event type: %s" % e.type)
+        Args:
+            name (str, optional): Channel name from the path.
+            body (bytes): Request body.
+            signature (str): ``x-line-signature``.
+
+        Raises:
+            HTTPException: ``404`` for an unknown channel or destination, ``403``
+                for an invalid signature.
+        """
+        destination: Optional[str] = None
+        learn = False
+
+        if name is not None:
+            channel = self.channels.get(name)
+
+        elif len(self.channels) == 1:
+            channel = self.channel
+
+        else:
+            destination = read_destination(body, self.codec)
+            channel = self._destinations.get(destination)  # type: ignore
+
+            if channel is None and destination and len(self._unlearned) == 1:
+                # The only channel it can be, so this costs one check as usual
+                channel = self._unlearned[0]
+                learn = True
+
+        if channel is None:
+            from fastapi import HTTPException
+
+            raise HTTPException(404, "Unknown channel")
+
+        if not channel.verifier.verify(body, signature):
+            from fastapi import HTTPException
+
+            raise HTTPException(403, "Invalid signature")
+
+        if learn:
+            self._destinations[destination] = channel
+            self._unlearned.remove(channel)
+
+        return channel
+
+    async def _handle_queued(self, item: Tuple[EventDataclasses, Channel]):
+        await self.handle_event(*item)
+
+    async def handle_events(
+        self, events: List[EventDataclasses], channel: Optional[Channel] = None
+    ):
+        """Handle events one after another."""
+        for e in events:
+            await self.handle_event(e, channel)
+
+    async def handle_event(
+        self, e: EventDataclasses, channel: Optional[Channel] = None
+    ):
+        """Dispatch a single webhook event to the handlers.
+
+        Events that were already processed (LINE redeliveries) are dropped.
+
+        Args:
+            e (EventDataclasses): The event.
+            channel (Channel, optional): Channel it was sent to. Defaults to the
+                first one.
+        """
+        if not self.dedup:
+            return await self.dispatch(e, channel)
+
+        if not self.dedup.claim(e.webhook_event_id):
+            return
+
+        try:
+            await self.dispatch(e, channel)
+        except BaseException:
+            # Let the redelivery have another go
+            self.dedup.forget(e.webhook_event_id)
+            raise
+
+    async def dispatch(self, e: EventDataclasses, channel: Optional[Channel] = None):
+        """Dispatch a single webhook event to the handlers.
+
+        Args:
+            e (EventDataclasses): The event.
+            channel (Channel, optional): Channel it was sent to. Defaults to the
+                first one.
+        """
+        started = time.perf_counter()
+        route = self.router.lookup(e)
+
+        if self.metrics:
+            self.metrics.lap(started, "route")
+
+        if route.message:
+            await self.push("message", e)
+
+        channel = channel or self.channel
+        ctx = route.context(
+            e, self.http_clients[channel.name], coalesce=self.coalesce_replies
+        )
+
+        if route.image:
+            image = e.message  # type: ignore
+            image_set = image.image_set
+
+            if image_set:
+                if len(self.channels) > 1 and self.image_sets.on_timeout:
+                    # For replying from ``_image_set_timeout``
+                    self._image_set_channels[image_set.id] = channel
+
+                events = await self.image_sets.add(
+                    image_set.id, image_set.index, image_set.total, e
+                )
+                if events is not None:
+                    self._image_set_channels.pop(image_set.id, None)
+                    await self._push_image_set(ctx, [ev.message for ev in events])
+
+        for name in route.events:
+            await self.push(name, ctx)
+
+        if route.image:
+            await self.push("image_fulfill", ctx, [image])
+
+        await ctx.flush()
+
+    async def _push_image_set(self, ctx: BaseContext, images: List[Any]):
+        await self.push("image_set", ctx, images)
+        await self.push("image_fulfill", ctx, images)
+
+    async def _image_set_timeout(self, events: List[EventDataclasses]):
+        channel = self._image_set_channels.pop(
+            events[-1].message.image_set.id,  # type: ignore
+            self.channel,
+        )
+        ctx = self.router.lookup(events[-1]).context(
+            events[-1],
+            self.http_clients[channel.name],
+            coalesce=self.coalesce_replies,
+        )
+        await self._push_image_set(ctx, [ev.message for ev in events])
+        await ctx.flush()
+
+    def _encode_event(self, e: EventDataclasses) -> bytes:
+        if isinstance(e, LazyModel):
+            return self.codec.dumps(e._raw)
+
+        # Defaults are left out, as some don't validate as their own field
+        # (``mentions`` defaults to ``[]``); they are filled back in on decode
+        return self.codec.dumps(
+            e.model_dump(mode="json", by_alias=True, exclude_defaults=True)
+        )
+
+    def _decode_event(self, data: bytes) -> EventDataclasses:
+        evnt = self.codec.loads(data)
+
+        if self.parsing == "eager":
+            return redirect_dataclass(evnt)
+
+        return lazy_event(evnt, trusted=self.parsing == "trusted")
 
     def _register_event_handler(self, name: Events, handler: AnyAsyncFunction):
         if name not in self.handlers:
@@ -131,27 +658,214 @@ class Client:
         else:
             self.handlers[name].append(handler)
 
-    def on(self, name: Events):
+        self.router.listen(self.handlers)
+
+    def on(self, name: Events, *, timeout: Optional[float] = None):
+        """Register a handler.
+
+        Args:
+            name (Events): Event name.
+            timeout (float, optional): Deadline for this handler, in seconds.
+                Defaults to the client's ``handler_timeout``.
+        """
+
         def wrapper(func: AnyAsyncFunction):
+            if timeout is not None:
+                self.handler_timeouts[func] = timeout
+
             self._register_event_handler(name, func)
             return func
 
         return wrapper
 
-    def event(self, fn: AnyAsyncFunction) -> AnyAsyncFunction:
-        if not fn.__name__.startswith("on_"):
-            raise NameError("@event decorated functions must start with on_")
+    def event(
+        self,
+        fn: Optional[AnyAsyncFunction] = None,
+        *,
+        timeout: Optional[float] = None,
+    ):
+        """Register a handler for the event it's named after, e.g. ``on_text``.
+
+        Usage:
+            .. code-block :: python
+
+                @client.event
+                async def on_text(ctx): ...
 
-        n = fn.__name__[len("on_") :].lower()
-        self._register_event_handler(n, fn)  # type: ignore
-        return fn
+                @client.event(timeout=5.0)
+                async def on_image(ctx): ...
+
+        Args:
+            timeout (float, optional): Deadline for this handler, in seconds.
+                Defaults to the client's ``handler_timeout``.
+        """
+
+        def wrapper(fn: AnyAsyncFunction):
+            if not fn.__name__.startswith("on_"):
+                raise NameError("@event decorated functions must start with on_")
+
+            n = fn.__name__[len("on_") :].lower()
+            return self.on(n, timeout=timeout)(fn)  # type: ignore
+
+        return wrapper if fn is None else wrapper(fn)
 
     async def push(self, event: Events, *args, **kwargs):
         if event not in self.handlers:
             return
 
+        if self.concurrent_handlers:
+            await gather_all(
+                self._call_handler(event, call, args, kwargs)
+                for call in self.handlers[event]
+            )
+            return
+
         for call in self.handlers[event]:
+            await self._call_handler(event, call, args, kwargs)
+
+    async def _call_handler(
+        self, event: Events, call: AnyAsyncFunction, args: tuple, kwargs: dict
+    ):
+        metrics = self.metrics
+        watchdog = self.watchdog
+        timeout = self.handler_timeouts.get(call, self.handler_timeout)
+
+        if not (metrics or watchdog or timeout):
             await call(*args, **kwargs)
+        else:
+            await self._call_watched(event, call, args, kwargs, timeout)
+
+        # Send what the handler responded, now that it returned
+        if self.coalesce_replies and args and isinstance(args[0], BaseContext):
+            await args[0].flush()
+
+    async def _call_watched(
+        self,
+        event: Events,
+        call: AnyAsyncFunction,
+        args: tuple,
+        kwargs: dict,
+        timeout: Optional[float],
+    ):
+        metrics = self.metrics
+        watchdog = self.watchdog
+        name = handler_name(call)
+        coro = call(*args, **kwargs)
+        token = watchdog.enter(name, event, coro) if watchdog else None
+        started = time.perf_counter()
+        failed = timed_out = False
+
+        try:
+            await run_with_timeout(coro, timeout, name=(name, event))
+        except HandlerTimeoutError:
+            failed = timed_out = True
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            if watchdog:
+                watchdog.exit(token, failed=failed, timed_out=timed_out)  # type: ignore
+
+            if metrics:
+                metrics.handler_seconds.observe(
+                    time.perf_counter() - started, event, name
+                )
+                if failed:
+                    metrics.handler_errors.inc(event, name)
+                if timed_out:
+                    metrics.handler_timeouts.inc(event, name)
+
+    def _slow_handler(self, record: SlowHandler):
+        if self.metrics:
+            self.metrics.handler_slow.inc(record.event, record.handler)
+
+    def _http(self, channel: Optional[str]) -> HTTPClient:
+        return self.http_clients[channel] if channel else self.http
+
+    async def push_message(
+        self,
+        to: str,
+        *contents: Union[str, dict, bytes, AnyMessage],
+        notification_disabled: bool = False,
+        retry_key: Optional[str] = None,
+        channel: Optional[str] = None,
+    ) -> dict:
+        """Push messages to a user, group or room.
+
+        Args:
+            to (str): User, group or room ID.
+            contents (str | dict | bytes | :obj:`AnyMessage`): Contents, up to 5.
+            notification_disabled (bool): Don't notify the recipient.
+            retry_key (str, optional): ``X-Line-Retry-Key``. Defaults to a new UUID.
+            channel (str, optional): Name of the channel to send as. Defaults to
+                the first one.
+        """
+        return await push(
+            self._http(channel),
+            to,
+            to_messages(contents),
+            notification_disabled=notification_disabled,
+            retry_key=retry_key,
+        )
+
+    async def multicast(
+        self,
+        to: Sequence[str],
+        *contents: Union[str, dict, bytes, AnyMessage],
+        notification_disabled: bool = False,
+        concurrency: int = 16,
+        retry_keys: Optional[Sequence[str]] = None,
+        channel: Optional[str] = None,
+    ) -> List[MulticastResult]:
+        """Send messages to any number of users, 500 per request.
+
+        See :func:`alined.messaging.multicast`.
+
+        Args:
+            to (Sequence[str]): User IDs.
+            contents (str | dict | bytes | :obj:`AnyMessage`): Contents, up to 5.
+            notification_disabled (bool): Don't notify the recipients.
+            concurrency (int): Max requests in flight at once.
+            retry_keys (Sequence[str], optional): Retry keys of an earlier call's
+                chunks, to resend them.
+            channel (str, optional): Name of the channel to send as. Defaults to
+                the first one.
+
+        Returns:
+            List[MulticastResult]: One result per chunk of 500 recipients.
+        """
+        return await multicast(
+            self._http(channel),
+            to,
+            to_messages(contents),
+            notification_disabled=notification_disabled,
+            concurrency=concurrency,
+            retry_keys=retry_keys,
+        )
+
+    async def broadcast(
+        self,
+        *contents: Union[str, dict, bytes, AnyMessage],
+        notification_disabled: bool = False,
+        retry_key: Optional[str] = None,
+        channel: Optional[str] = None,
+    ) -> dict:
+        """Send messages to every friend of the channel.
+
+        Args:
+            contents (str | dict | bytes | :obj:`AnyMessage`): Contents, up to 5.
+            notification_disabled (bool): Don't notify the recipients.
+            retry_key (str, optional): ``X-Line-Retry-Key``. Defaults to a new UUID.
+            channel (str, optional): Name of the channel to send as. Defaults to
+                the first one.
+        """
+        return await broadcast(
+            self._http(channel),
+            to_messages(contents),
+            notification_disabled=notification_disabled,
+            retry_key=retry_key,
+        )
 
     def run(self, **kwargs):
         import uvicorn  # type: ignore
@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-from typing import Annotated, Any, List, Literal, Optional, Union
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
+from pydantic import Field
 
-from .schema import Emoji, Mentions
+from .schema import Emoji, Mentions, Model
 
 
-class Webhook(BaseModel):
+class Webhook(Model):
     destination: str = Field(..., description="Bot ID.")
-    events: List[Event]
+    events: List[AnyEvent]
 
 
-class Event(BaseModel):
+class Event(Model):
     type: Any
     mode: Union[
         Annotated[Literal["active"], "The channel is active."],
@@ -23,33 +23,33 @@ class Event(BaseModel):
     delivery_context: DeliveryContext = Field(..., alias="deliveryContext")
 
 
-class DeliveryContext(BaseModel):
+class DeliveryContext(Model):
     is_redelivery: bool = Field(..., alias="isRedelivery")
 
 
-class SourceUser(BaseModel):
+class SourceUser(Model):
     type: Literal["user"]
     user_id: str = Field(..., alias="userId")
 
 
-class SourceGroupChatForMessageEvents(BaseModel):
+class SourceGroupChatForMessageEvents(Model):
     type: Literal["group"]
     group_id: str = Field(..., alias="groupId")
     user_id: str = Field(..., alias="userId")
 
 
-class SourceGroupChatForCommonWebhooks(BaseModel):
+class SourceGroupChatForCommonWebhooks(Model):
     type: Literal["group"]
     group_id: str = Field(..., alias="groupId")
 
 
-class SourceMultiPersonChatForMessageEvents(BaseModel):
+class SourceMultiPersonChatForMessageEvents(Model):
     type: Literal["room"]
     room_id: str = Field(..., alias="roomId")
     user_id: str = Field(..., alias="userId")
 
 
-class SourceMultiPersonChatForCommonWebhooks(BaseModel):
+class SourceMultiPersonChatForCommonWebhooks(Model):
     type: Literal["room"]
     room_id: str = Field(..., alias="roomId")
 
@@ -61,34 +61,31 @@ Source = Union[
     SourceMultiPersonChatForCommonWebhooks,
     SourceMultiPersonChatForMessageEvents,
 ]
-MessageEventsSource = Union[
-    SourceUser, SourceGroupChatForMessageEvents, SourceMultiPersonChatForMessageEvents
+MessageEventsSource = Annotated[
+    Union[
+        SourceUser,
+        SourceGroupChatForMessageEvents,
+        SourceMultiPersonChatForMessageEvents,
+    ],
+    Field(discriminator="type"),
 ]
 
 
-class Repliable(BaseModel):
+class Repliable(Model):
     reply_token: str = Field(..., alias="replyToken")
 
 
 class MessageEvent(Event, Repliable):
     type: Literal["message"]
-    message: Union[
-        WebhookTextMessage,
-        WebhookImageMessage,
-        WebhookVideoMessage,
-        WebhookAudioMessage,
-        WebhookFileMessage,
-        WebhookLocationMessage,
-        WebhookStickerMessage,
-    ]
+    message: WebhookMessage
     source: MessageEventsSource  # type: ignore
 
 
-class QuotableWithResponse(BaseModel):
+class QuotableWithResponse(Model):
     quote_token: str = Field(..., alias="quoteToken")
 
 
-class QuotableByUser(BaseModel):
+class QuotableByUser(Model):
     quoted_message_id: Optional[str] = Field(None, alias="quotedMessageId")
 
 
@@ -103,59 +100,63 @@ class WebhookTextMessage(QuotableWithResponse, QuotableByUser):
 class WebhookImageMessage(QuotableWithResponse):
     id: str
     type: Literal["image"]
-    content_provider: Union[
-        WebhookMediaContentProviderLINE, WebhookMediaContentProviderExternal
-    ] = Field(..., alias="contentProvider")
+    content_provider: WebhookMediaContentProvider = Field(..., alias="contentProvider")
     image_set: Optional[WebhookImageSet] = Field(None, alias="imageSet")
 
 
-class WebhookImageSet(BaseModel):
+class WebhookImageSet(Model):
     id: str
     index: Annotated[int, "Index. Starts from 1."]
     total: int
 
 
-class WebhookMediaContentProviderLINE(BaseModel):
+class WebhookMediaContentProviderLINE(Model):
     type: Literal["line"]
 
 
-class WebhookMediaContentProviderExternal(BaseModel):
+class WebhookMediaContentProviderExternal(Model):
     type: Literal["external"]
     original_content_url: str = Field(..., alias="originalContentUrl")
     preview_image_url: str = Field(..., alias="previewImageUrl")
 
 
-class WebhookAudioContentProviderExternal(BaseModel):
+class WebhookAudioContentProviderExternal(Model):
     type: Literal["external"]
     original_content_url: str = Field(..., alias="originalContentUrl")
 
 
+WebhookMediaContentProvider = Annotated[
+    Union[WebhookMediaContentProviderLINE, WebhookMediaContentProviderExternal],
+    Field(discriminator="type"),
+]
+WebhookAudioContentProvider = Annotated[
+    Union[WebhookMediaContentProviderLINE, WebhookAudioContentProviderExternal],
+    Field(discriminator="type"),
+]
+
+
 class WebhookVideoMessage(QuotableWithResponse):
     id: str
     type: Literal["video"]
     duration: Optional[int] = None
-    content_provider: Union[
-        WebhookMediaContentProviderLINE, WebhookMediaContentProviderExternal
-    ] = Field(..., alias="contentProvider")
+    content_provider: WebhookMediaContentProvider = Field(..., alias="contentProvider")
 
 
-class WebhookAudioMessage(BaseModel):
+class WebhookAudioMessage(Model):
     id: str
     type: Literal["audio"]
     duration: Optional[int] = None
-    content_provider: Union[
-        WebhookAudioContentProviderExternal, WebhookMediaContentProviderLINE
-    ]
+    content_provider: WebhookAudioContentProvider = Field(..., alias="contentProvider")
 
 
-class WebhookFileMessage(BaseModel):
+class WebhookFileMessage(Model):
     id: str
     type: Literal["file"]
     file_name: str = Field(..., alias="fileName")
     file_size: int = Field(..., alias="fileSize")
 
 
-class WebhookLocationMessage(BaseModel):
+class WebhookLocationMessage(Model):
     id: str
     type: Literal["location"]
     title: Optional[str] = None
@@ -176,7 +177,7 @@ class WebhookStickerMessage(QuotableWithResponse, QuotableByUser):  # type: igno
         "ANIMATION_SOUND",
         "CUSTOM",
         "MESSAGE",
-    ]
+    ] = Field(..., alias="stickerResourceType")
     keywords: List[str] = []
     text: Optional[str] = Field(
         None, description="Only included when sticker_resource_type is MESSAGE"
@@ -188,7 +189,7 @@ class UnsendEvent(Event):
     unsend: UnsendMessage
 
 
-class UnsendMessage(BaseModel):
+class UnsendMessage(Model):
     # i mean like... wtf??
     # why not just do something like `UnsendEvent.messageId`
     # why tf do we need to do this... waste of time and code, 0/10 would recommend
@@ -200,7 +201,7 @@ class FollowEvent(Event, Repliable):
     follow: FollowEventCtx
 
 
-class FollowEventCtx(BaseModel):
+class FollowEventCtx(Model):
     is_unblocked: bool = Field(
         ...,
         alias="isUnblocked",
@@ -211,7 +212,7 @@ class FollowEventCtx(BaseModel):
     )
 
 
-class UnfollowEvent(Event, Repliable):
+class UnfollowEvent(Event):
     type: Literal["unfollow"]
 
 
@@ -228,7 +229,7 @@ class MemberJoinedEvent(Event, Repliable):
     joined: MemberJoinedEventCtx
 
 
-class MemberJoinedEventCtx(BaseModel):
+class MemberJoinedEventCtx(Model):
     members: List[SourceUser]
 
 
@@ -237,5 +238,69 @@ class MemberLeftEvent(Event):
     left: MemberLeftEventCtx
 
 
-class MemberLeftEventCtx(Event):
+class MemberLeftEventCtx(Model):
     members: List[SourceUser]
+
+
+class PostbackEvent(Event, Repliable):
+    type: Literal["postback"]
+    postback: PostbackEventCtx
+
+
+class PostbackEventCtx(Model):
+    data: str
+    params: Optional[Dict[str, Any]] = Field(
+        None, description="Date/time picker or rich menu switch parameters."
+    )
+
+
+class BeaconEvent(Event, Repliable):
+    type: Literal["beacon"]
+    beacon: BeaconEventCtx
+
+
+class BeaconEventCtx(Model):
+    hwid: str = Field(..., description="Hardware ID of the beacon.")
+    type: Literal["enter", "banner", "stay"]
+    dm: Optional[str] = Field(None, description="Device message of the beacon.")
+
+
+class VideoPlayCompleteEvent(Event, Repliable):
+    type: Literal["videoPlayComplete"]
+    video_play_complete: VideoPlayCompleteEventCtx = Field(
+        ..., alias="videoPlayComplete"
+    )
+
+
+class VideoPlayCompleteEventCtx(Model):
+    tracking_id: str = Field(..., alias="trackingId")
+
+
+WebhookMessage = Annotated[
+    Union[
+        WebhookTextMessage,
+        WebhookImageMessage,
+        WebhookVideoMessage,
+        WebhookAudioMessage,
+        WebhookFileMessage,
+        WebhookLocationMessage,
+        WebhookStickerMessage,
+    ],
+    Field(discriminator="type"),
+]
+AnyEvent = Annotated[
+    Union[
+        MessageEvent,
+        UnsendEvent,
+        FollowEvent,
+        UnfollowEvent,
+        JoinEvent,
+        LeaveEvent,
+        MemberJoinedEvent,
+        MemberLeftEvent,
+        PostbackEvent,
+        BeaconEvent,
+        VideoPlayCompleteEvent,
+    ],
+    Field(discriminator="type"),
+]
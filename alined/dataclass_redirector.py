@@ -1,115 +1,42 @@
-from alined.types import EventDataclasses
-from .dataclass import (
-    FollowEvent,
-    JoinEvent,
-    LeaveEvent,
-    MemberJoinedEvent,
-    MemberLeftEvent,
-    MessageEvent,
-    SourceGroupChatForMessageEvents,
-    SourceUser,
-    SourceMultiPersonChatForMessageEvents,
-    UnfollowEvent,
-    UnsendEvent,
-    WebhookAudioContentProviderExternal,
-    WebhookAudioMessage,
-    WebhookFileMessage,
-    WebhookLocationMessage,
-    WebhookMediaContentProviderExternal,
-    WebhookMediaContentProviderLINE,
-    WebhookImageMessage,
-    WebhookStickerMessage,
-    WebhookTextMessage,
-    WebhookVideoMessage,
-)
+import functools
 
+from pydantic import TypeAdapter
 
-def redirect_dataclass(
-    d: dict,
-) -> EventDataclasses:
-    if d["type"] == "message":
-        kwargs = {
-            **d,
-            "source": {
-                "user": SourceUser,
-                "group": SourceGroupChatForMessageEvents,
-                "room": SourceMultiPersonChatForMessageEvents,
-            }[d["source"]["type"]](**d["source"]),
-        }
-        msg_t = d["message"]["type"]
-
-        if msg_t == "text":
-            kwargs.update({"message": WebhookTextMessage(**d["message"])})
-
-        elif msg_t in {"image", "video"}:
-            k = {**d["message"]}
-
-            if d["message"]["contentProvider"]["type"] == "line":
-                k.update(
-                    {"contentProvider": WebhookMediaContentProviderLINE(type="line")}
-                )
-            else:
-                k.update(
-                    {
-                        "contentProvider": WebhookMediaContentProviderExternal(
-                            **d["message"]["contentProvider"]
-                        )
-                    }
-                )
-            if msg_t == "image":
-                kwargs.update({"message": WebhookImageMessage(**k)})
-            else:
-                kwargs.update({"message": WebhookVideoMessage(**k)})
+from .types import EventDataclasses
+from .dataclass import AnyEvent, Webhook
 
-        elif msg_t == "audio":
-            k = {**d["message"]}
 
-            if d["message"]["contentProvider"]["type"] == "line":
-                k.update(
-                    {"contentProvider": WebhookMediaContentProviderLINE(type="line")}
-                )
-            else:
-                k.update(
-                    {
-                        "contentProvider": WebhookAudioContentProviderExternal(
-                            **d["message"]["contentProvider"]
-                        )
-                    }
-                )
+@functools.lru_cache(maxsize=None)
+def event_adapter() -> TypeAdapter[EventDataclasses]:
+    """Validator of any event, compiled on first use.
 
-            kwargs.update({"message": WebhookAudioMessage(**k)})
+    Discriminated unions on ``type`` let pydantic-core pick the right model at
+    every level in a single validation pass.
+    """
+    return TypeAdapter(AnyEvent)
 
-        elif msg_t == "file":
-            kwargs.update({"message": WebhookFileMessage(**d["message"])})
-        elif msg_t == "location":
-            kwargs.update({"message": WebhookLocationMessage(**d["message"])})
-        elif msg_t == "sticker":
-            kwargs.update({"message": WebhookStickerMessage(**d["message"])})
-        else:
-            raise NotImplementedError("unknown message event type")
 
-        return MessageEvent(**kwargs)
-
-    elif d["type"] == "unsend":
-        return UnsendEvent(**d)
-
-    elif d["type"] == "follow":
-        return FollowEvent(**d)
+def redirect_dataclass(
+    d: dict,
+) -> EventDataclasses:
+    """Validate a decoded webhook event into its event model.
 
-    elif d["type"] == "unfollow":
-        return UnfollowEvent(**d)
+    Args:
+        d (dict): The event.
+    """
+    return event_adapter().validate_python(d)
 
-    elif d["type"] == "join":
-        return JoinEvent(**d)
 
-    elif d["type"] == "leave":
-        return LeaveEvent(**d)
+def parse_webhook(body: bytes) -> Webhook:
+    """Validate a raw webhook body into a :obj:`Webhook`, straight from the bytes.
 
-    elif d["type"] == "memberJoined":
-        return MemberJoinedEvent(**d)
+    Args:
+        body (bytes): Request body.
+    """
+    return Webhook.model_validate_json(body)
 
-    elif d["type"] == "memberLeft":
-        return MemberLeftEvent(**d)
 
-    else:
-        raise NotImplementedError("oh no")
+def build_validators():
+    """Compile the event validators now rather than on the first webhook."""
+    event_adapter()
+    parse_webhook(b'{"destination":"","events":[]}')
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Dict, Optional
+
+logger = logging.getLogger("alined")
+
+
+def _key(event_id: str) -> int:
+    # 8-byte digests keep the table compact; collisions are negligible at
+    # the sizes this is bounded to.
+    return int.from_bytes(
+        hashlib.blake2b(event_id.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class EventDeduplicator:
+    """Remembers processed ``webhookEventId``s so redelivered events are dropped.
+
+    Entries expire after ``ttl`` seconds, and past ``max_entries`` the least
+    recently seen ones are evicted. With ``path``, entries are also appended to
+    a file and reloaded on start, so they survive restarts.
+
+    After :meth:`start`, appends are buffered and written every
+    ``flush_interval`` seconds from a thread, so the event loop never waits on
+    the disk; a crash loses at most that interval's entries. Before it, each
+    append is written right away.
+
+    Args:
+        max_entries (int): Max event IDs remembered.
+        ttl (float): Seconds an event ID is remembered.
+        path (str, optional): File to persist event IDs to.
+        flush_interval (float): Seconds between writes of buffered appends.
+    """
+
+    RECORD = struct.Struct("<Qd")
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 100_000,
+        ttl: float = 24 * 3600,
+        path: Optional[str] = None,
+        flush_interval: float = 1.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.flush_interval = flush_interval
+
+        # Insertion ordered: the first key is the least recently seen one.
+        self.seen: Dict[int, float] = {}
+        self.dropped = 0
+        self._file: Optional[BinaryIO] = None
+        self._records = 0
+        self._pending = bytearray()
+        # Held while the file is written, as flushes run in a thread
+        self._lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def open(self):
+        """Load persisted event IDs and start appending to the file."""
+        if not self.path or self._file:
+            return
+
+        now = time.time()
+
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+
+            usable = len(data) - len(data) % self.RECORD.size
+            for key, seen_at in self.RECORD.iter_unpack(data[:usable]):
+                # Records are in time order; a zero timestamp is a tombstone.
+                self.seen.pop(key, None)
+                if seen_at and now - seen_at < self.ttl:
+                    self.seen[key] = seen_at
+
+            self._evict(now)
+
+        self._compact()
+
+    def close(self):
+        """Write the buffered appends and close the file."""
+        with self._lock:
+            if self._file:
+                self._file.write(self._pending)
+                self._file.close()
+                self._file = None
+
+            self._pending = bytearray()
+
+    async def start(self):
+        """Open the file and start writing appends in the background."""
+        self.open()
+
+        if self._file and not self._flusher:
+            self._stopping = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        """Write the buffered appends and close the file."""
+        if self._flusher and self._stopping:
+            self._stopping.set()
+            await self._flusher
+            self._flusher = None
+
+        self.close()
+
+    async def flush(self):
+        """Write the buffered appends, in a thread."""
+        if not self._pending:
+            return
+
+        if self._records > 2 * self.max_entries:
+            # The live entries already include what's pending
+            self._pending = bytearray()
+            await asyncio.to_thread(self._rewrite, self._snapshot())
+            return
+
+        data, self._pending = bytes(self._pending), bytearray()
+        await asyncio.to_thread(self._append, data)
+
+    def claim(self, event_id: str) -> bool:
+        """Record an event as being processed.
+
+        Args:
+            event_id (str): ``webhookEventId``.
+
+        Returns:
+            bool: ``False`` if it was already processed (drop it), otherwise
+                ``True``.
+        """
+        if self.path and not self._file:
+            self.open()
+
+        now = time.time()
+        key = _key(event_id)
+        seen_at = self.seen.pop(key, None)
+
+        if seen_at is not None and now - seen_at < self.ttl:
+            self.seen[key] = seen_at
+            self.dropped += 1
+            return False
+
+        self.seen[key] = now
+        self._write(key, now)
+        self._evict(now)
+        return True
+
+    def forget(self, event_id: str):
+        """Forget an event, e.g. because its handler failed and a redelivery
+        should be processed again.
+
+        Args:
+            event_id (str): ``webhookEventId``.
+        """
+        key = _key(event_id)
+        if self.seen.pop(key, None) is not None:
+            self._write(key, 0.0)
+
+    def _evict(self, now: float):
+        seen = self.seen
+
+        while seen:
+            key = next(iter(seen))
+            if len(seen) <= self.max_entries and now - seen[key] < self.ttl:
+                break
+            del seen[key]
+
+    def _write(self, key: int, seen_at: float):
+        if not self._file:
+            return
+
+        self._pending += self.RECORD.pack(key, seen_at)
+        self._records += 1
+
+        if self._flusher:
+            return
+
+        # Not started: write through
+        if self._records > 2 * self.max_entries:
+            self._compact()
+        else:
+            data, self._pending = bytes(self._pending), bytearray()
+            self._append(data)
+
+    async def _flush_forever(self):
+        assert self._stopping
+
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to persist deduplicated event IDs")
+
+    def _append(self, data: bytes):
+        with self._lock:
+            if self._file:
+                self._file.write(data)
+                self._file.flush()
+
+    def _snapshot(self) -> bytes:
+        self._records = len(self.seen)
+        return b"".join(self.RECORD.pack(*item) for item in self.seen.items())
+
+    def _compact(self):
+        """Rewrite the file with only the live entries."""
+        self._pending = bytearray()
+        self._rewrite(self._snapshot())
+
+    def _rewrite(self, data: bytes):
+        assert self.path
+
+        with self._lock:
+            if self._file:
+                self._file.close()
+
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+
+            self._file = open(self.path, "ab")
@@ -1,21 +1,349 @@
-from typing import Mapping
+from __future__ import annotations
+
+import time
+from typing import Any, AsyncIterator, Optional, TYPE_CHECKING, Union
+
 import httpx
-from .rate_limiting import apply_rate_limit
 
+from .codec import Codec, get_codec
+from .metrics import Metrics
+from .rate_limiting import RateLimiter, apply_rate_limit
+from .retry import CircuitBreaker, RetryPolicy, with_retry
+
+if TYPE_CHECKING:
+    from .types import Headers
+
+API_URL = "https://api.line.me"
+API_DATA_URL = "https://api-data.line.me"
+
+
+class HTTPClient:
+    """Pooled outbound HTTP client for the LINE Messaging API.
+
+    Every API call the SDK makes goes through one shared ``httpx.AsyncClient``,
+    so connections to ``api.line.me`` are kept alive and reused instead of
+    paying a new TCP + TLS handshake per request.
+
+    The pool is opened by :meth:`start` (the app lifespan does this for you) and
+    released by :meth:`aclose`. If it is used before being started, e.g. from a
+    script, the pool is created on first use.
+
+    Clients of several channels can share one pool: pass the client that owns it
+    as ``pool``. Each still sends its own headers and keeps its own rate limits.
+
+    Args:
+        headers (Headers): Headers sent with every request.
+        max_connections (int): Max concurrent connections.
+        max_keepalive_connections (int): Max idle connections kept alive.
+        keepalive_expiry (float): Seconds an idle connection is kept alive.
+        http2 (bool): Enable HTTP/2 multiplexing. Requires ``httpx[http2]``.
+        timeout (float): Request timeout in seconds.
+        rate_limiter (RateLimiter, optional): Per-endpoint rate limits.
+        codec (Codec, optional): JSON codec for request bodies.
+        retry (RetryPolicy, optional): Resend failed API calls. Off if ``None``.
+        breaker (CircuitBreaker, optional): Fail API calls fast while LINE is
+            unhealthy. Off if ``None``.
+        metrics (Metrics, optional): Record the time and status of every request.
+        transport (httpx.AsyncBaseTransport, optional): Transport to send requests
+            with instead of the network, e.g. a mock of the LINE Platform.
+        pool (HTTPClient, optional): Send through the connection pool of this
+            client, which opens and closes it, instead of an own one. The pool
+            options above are then ignored.
+        channel (str, optional): Name of the channel this client sends as.
+    """
+
+    headers: Headers
+    rate_limiter: RateLimiter
+    codec: Codec
+    retry: Optional[RetryPolicy]
+    breaker: Optional[CircuitBreaker]
+    metrics: Optional[Metrics]
+    pool: Optional["HTTPClient"]
+    channel: Optional[str]
+
+    def __init__(
+        self,
+        headers: Headers,
+        *,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        timeout: float = 10.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        codec: Optional[Codec] = None,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[Metrics] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        pool: Optional["HTTPClient"] = None,
+        channel: Optional[str] = None,
+    ):
+        self.headers = headers
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.codec = codec or get_codec()
+        self.retry = retry
+        self.breaker = breaker
+        self.metrics = metrics
+        self.transport = transport
+        self.pool = pool
+        self.channel = channel
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The underlying ``httpx.AsyncClient``, created on first use."""
+        if self.pool is not None:
+            return self.pool.client
+
+        if self._client is None or self._client.is_closed:
+            # Headers are sent per request, so that clients sharing the pool
+            # each send their own.
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+
+        return self._client
+
+    async def start(self):
+        """Open the connection pool."""
+        if self.pool is None:
+            self.client  # noqa: B018
+
+    async def aclose(self):
+        """Close the connection pool, unless it is shared from :attr:`pool`."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(
+        self,
+        url: str,
+        *,
+        json: Any,
+        headers: Optional[Headers] = None,
+        endpoint: str = "other",
+    ) -> httpx.Response:
+        """Send a POST request and raise for non-2xx responses.
+
+        Args:
+            url (str): URL.
+            json (Any): JSON body, encoded with :attr:`codec`. Bytes are sent as
+                is (already encoded).
+            headers (Headers, optional): Extra headers for this request.
+            endpoint (str): Endpoint name, for metrics.
+        """
+        request = self.client.build_request(
+            "POST",
+            url,
+            content=json if isinstance(json, bytes) else self.codec.dumps(json),
+            headers={
+                **self.headers,
+                "Content-Type": "application/json",
+                **(headers or {}),
+            },
+        )
+        r = await self.send(request, endpoint=endpoint, stream=False)
+        r.raise_for_status()
+        return r
+
+    async def send(
+        self, request: httpx.Request, *, endpoint: str = "other", stream: bool = True
+    ) -> httpx.Response:
+        """Send a request, recording it in :attr:`metrics`.
+
+        Args:
+            request (httpx.Request): The request.
+            endpoint (str): Endpoint name, for metrics.
+            stream (bool): Leave the body unread, for the caller to stream.
+        """
+        if not self.metrics:
+            return await self.client.send(request, stream=stream)
+
+        start = time.perf_counter()
+
+        try:
+            r = await self.client.send(request, stream=stream)
+        except BaseException as err:
+            self.metrics.observe_request(
+                endpoint, time.perf_counter() - start, type(err).__name__
+            )
+            raise
+
+        self.metrics.observe_request(
+            endpoint, time.perf_counter() - start, str(r.status_code)
+        )
+        return r
+
+    async def open_stream(
+        self, url: str, *, authorize: bool = True, endpoint: str = "other"
+    ) -> httpx.Response:
+        """Send a GET request, raise for non-2xx responses, and return the
+        response with its body unread. The caller must ``aclose()`` it.
+
+        Args:
+            url (str): URL.
+            authorize (bool): Send the channel access token. Turn this off for
+                URLs outside of the LINE Platform.
+            endpoint (str): Endpoint name, for metrics.
+        """
+        request = self.client.build_request(
+            "GET", url, headers=self.headers if authorize else None
+        )
+
+        r = await self.send(request, endpoint=endpoint)
+
+        try:
+            r.raise_for_status()
+        except BaseException:
+            await r.aclose()
+            raise
+
+        return r
+
+    async def stream(
+        self, url: str, *, chunk_size: int = 64 * 1024, authorize: bool = True
+    ) -> AsyncIterator[bytes]:
+        """Stream a GET response body in chunks, without buffering it whole.
+
+        Args:
+            url (str): URL.
+            chunk_size (int): Max bytes per chunk.
+            authorize (bool): Send the channel access token. Turn this off for
+                URLs outside of the LINE Platform.
 
-@apply_rate_limit(requests=2000, per_seconds=1)
-async def send_reply_message(body: dict, headers: Mapping[str, str]) -> dict:
+        Raises:
+            httpx.HTTPStatusError: Non-2xx response, raised before any chunk.
+        """
+        r = await self.open_stream(
+            url, authorize=authorize, endpoint="other" if authorize else "external"
+        )
+
+        async for chunk in iter_response(r, chunk_size):
+            yield chunk
+
+
+async def iter_response(r: httpx.Response, chunk_size: int) -> AsyncIterator[bytes]:
+    """Iterate over a streamed response body, then close the response."""
+    try:
+        async for chunk in r.aiter_bytes(chunk_size):
+            yield chunk
+    finally:
+        await r.aclose()
+
+
+@with_retry()
+@apply_rate_limit("reply")
+async def send_reply_message(http: HTTPClient, body: Union[dict, bytes]) -> dict:
     """Send reply message.
 
     Args:
-        body (dict): Body.
-        headers (Mapping[str, str]): Headers.
+        http (HTTPClient): HTTP client.
+        body (dict | bytes): Body, or the encoded body.
     """
-    print(body)
-    client = httpx.AsyncClient()
-    r = await client.post(
-        "https://api.line.me/v2/bot/message/reply", headers=headers, json=body
+    r = await http.post(API_URL + "/v2/bot/message/reply", json=body, endpoint="reply")
+    return http.codec.loads(r.content)
+
+
+def _retry_key_header(retry_key: Optional[str]) -> Optional[Headers]:
+    return {"X-Line-Retry-Key": retry_key} if retry_key else None
+
+
+@with_retry(retry_key=True)
+@apply_rate_limit("push")
+async def send_push_message(
+    http: HTTPClient, body: Union[dict, bytes], *, retry_key: Optional[str] = None
+) -> dict:
+    """Send push message.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        body (dict | bytes): Body, or the encoded body.
+        retry_key (str, optional): ``X-Line-Retry-Key``, a UUID. Resending with
+            the same key never delivers the message twice.
+    """
+    r = await http.post(
+        API_URL + "/v2/bot/message/push",
+        json=body,
+        headers=_retry_key_header(retry_key),
+        endpoint="push",
+    )
+    return http.codec.loads(r.content)
+
+
+@with_retry(retry_key=True)
+@apply_rate_limit("multicast")
+async def send_multicast_message(
+    http: HTTPClient, body: Union[dict, bytes], *, retry_key: Optional[str] = None
+) -> dict:
+    """Send multicast message (up to 500 recipients).
+
+    Args:
+        http (HTTPClient): HTTP client.
+        body (dict | bytes): Body, or the encoded body.
+        retry_key (str, optional): ``X-Line-Retry-Key``, a UUID.
+    """
+    r = await http.post(
+        API_URL + "/v2/bot/message/multicast",
+        json=body,
+        headers=_retry_key_header(retry_key),
+        endpoint="multicast",
+    )
+    return http.codec.loads(r.content)
+
+
+@with_retry(retry_key=True)
+@apply_rate_limit("broadcast")
+async def send_broadcast_message(
+    http: HTTPClient, body: Union[dict, bytes], *, retry_key: Optional[str] = None
+) -> dict:
+    """Send broadcast message to every friend of the channel.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        body (dict | bytes): Body, or the encoded body.
+        retry_key (str, optional): ``X-Line-Retry-Key``, a UUID.
+    """
+    r = await http.post(
+        API_URL + "/v2/bot/message/broadcast",
+        json=body,
+        headers=_retry_key_header(retry_key),
+        endpoint="broadcast",
+    )
+    return http.codec.loads(r.content)
+
+
+async def iter_message_content(
+    http: HTTPClient, message_id: str, *, chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """Stream the content (image, video, audio or file) of a message sent by a user.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        message_id (str): Message ID.
+        chunk_size (int): Max bytes per chunk.
+    """
+    r = await _open_message_content(http, message_id)
+
+    async for chunk in iter_response(r, chunk_size):
+        yield chunk
+
+
+@with_retry(idempotent=True)
+@apply_rate_limit("content")
+async def _open_message_content(http: HTTPClient, message_id: str) -> httpx.Response:
+    # Only opening the response is retried: a download that fails halfway
+    # can't be resumed transparently.
+    return await http.open_stream(
+        API_DATA_URL + "/v2/bot/message/%s/content" % message_id, endpoint="content"
     )
-    print(r.json())
-    r.raise_for_status()
-    return r.json()
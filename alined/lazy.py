@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import functools
+import typing
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from .dataclass import AnyEvent
+from .types import EventDataclasses
+
+_MISSING = object()
+
+
+class LazyModel:
+    """Read-only view of a decoded dict, shaped like a pydantic model.
+
+    Attributes are looked up by field name (aliases are handled), then
+    validated and cached on first access. Nested models are wrapped in
+    another :obj:`LazyModel`, so reading ``e.message.text`` never touches
+    ``e.message.emojis``.
+
+    With ``trusted=True`` nothing is validated: values are handed out as
+    decoded. Only use it for payloads whose signature has been verified.
+
+    Args:
+        model (Type[BaseModel]): The model this dict is shaped like.
+        raw (dict): The decoded dict.
+        trusted (bool): Skip validation.
+    """
+
+    __slots__ = ("_model", "_raw", "_trusted", "_cache")
+
+    def __init__(self, model: Type[BaseModel], raw: dict, *, trusted: bool = False):
+        self._model = model
+        self._raw = raw
+        self._trusted = trusted
+        self._cache: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        key, required, default, resolve = _field(self._model, name)
+        value = self._raw.get(key, _MISSING)
+
+        if value is _MISSING:
+            if required:
+                raise AttributeError("%s.%s is missing" % (self._model.__name__, name))
+            value = default
+        else:
+            value = resolve(value, self._trusted)
+
+        self._cache[name] = value
+        return value
+
+    def materialize(self) -> BaseModel:
+        """Build the full model (validated unless ``trusted``)."""
+        if self._trusted:
+            return self._model.model_construct(**self._raw)
+
+        return self._model.model_validate(self._raw)
+
+    def __repr__(self):
+        return "Lazy%s(%r)" % (self._model.__name__, self._raw)
+
+
+Resolver = Callable[[Any, bool], Any]
+_FIELDS: Dict[Tuple[Type[BaseModel], str], Tuple[str, bool, Any, Resolver]] = {}
+
+
+def _field(model: Type[BaseModel], name: str) -> Tuple[str, bool, Any, Resolver]:
+    """Alias, requiredness, default and value resolver of a model field."""
+    try:
+        return _FIELDS[(model, name)]
+    except KeyError:
+        pass
+
+    if not model.__pydantic_complete__:
+        model.model_rebuild()
+
+    try:
+        field = model.model_fields[name]
+    except KeyError:
+        raise AttributeError(
+            "%r object has no attribute %r" % (model.__name__, name)
+        ) from None
+
+    required = field.is_required()
+    default = None if required else field.get_default(call_default_factory=True)
+    entry = (field.alias or name, required, default, _resolver(field.annotation))
+    _FIELDS[(model, name)] = entry
+    return entry
+
+
+def _models(annotation: Any) -> List[Type[BaseModel]]:
+    """Models in an annotation such as ``Optional[Union[A, B]]``."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation]
+
+    if typing.get_origin(annotation) in (typing.Union, typing.Annotated):
+        return [m for arg in typing.get_args(annotation) for m in _models(arg)]
+
+    return []
+
+
+def _list_item(annotation: Any) -> Any:
+    """Item type of a list in an annotation such as ``Optional[List[A]]``."""
+    origin = typing.get_origin(annotation)
+
+    if origin is list:
+        return (typing.get_args(annotation) or (Any,))[0]
+
+    if origin in (typing.Union, typing.Annotated):
+        for arg in typing.get_args(annotation):
+            item = _list_item(arg)
+            if item is not None:
+                return item
+
+    return None
+
+
+class _Picker:
+    """Picks the model a dict is shaped like, by its ``type`` field.
+
+    When several models share a ``type`` (e.g. group sources with and without
+    ``userId``), the first one whose required fields are all present wins.
+    """
+
+    def __init__(self, models: List[Type[BaseModel]]):
+        self.models = models
+        self.tags: Dict[Any, List[Tuple[Type[BaseModel], List[str]]]] = {}
+
+        for model in models:
+            if not model.__pydantic_complete__:
+                model.model_rebuild()
+
+            required = [
+                field.alias or name
+                for name, field in model.model_fields.items()
+                if field.is_required()
+            ]
+            field = model.model_fields.get("type")
+
+            for tag in typing.get_args(field.annotation) if field else ():
+                self.tags.setdefault(tag, []).append((model, required))
+
+    def __call__(self, value: dict) -> Optional[Type[BaseModel]]:
+        if len(self.models) == 1:
+            return self.models[0]
+
+        candidates = self.tags.get(value.get("type"))
+        if not candidates:
+            return None
+
+        for model, required in candidates:
+            if all(key in value for key in required):
+                return model
+
+        return candidates[0][0]
+
+
+def _resolver(annotation: Any) -> Resolver:
+    models = _models(annotation)
+
+    adapter: Optional[TypeAdapter] = None
+
+    if models:
+        pick = _Picker(models)
+
+        def resolve_model(value: Any, trusted: bool) -> Any:
+            nonlocal adapter
+
+            if value is None:
+                return None
+
+            model = pick(value)
+            if model is None:
+                # Not discriminated on ``type``; let pydantic decide
+                if adapter is None:
+                    adapter = TypeAdapter(annotation)
+
+                return adapter.validate_python(value)
+
+            return LazyModel(model, value, trusted=trusted)
+
+        return resolve_model
+
+    item = _list_item(annotation)
+    item_models = _models(item) if item is not None else []
+    pick_item = _Picker(item_models) if item_models else None
+
+    def resolve_value(value: Any, trusted: bool) -> Any:
+        nonlocal adapter
+
+        if trusted:
+            if pick_item is not None and isinstance(value, list):
+                return [
+                    LazyModel(pick_item(v) or item_models[0], v, trusted=True)
+                    for v in value
+                ]
+
+            return value
+
+        if adapter is None:
+            adapter = TypeAdapter(annotation)
+
+        return adapter.validate_python(value)
+
+    return resolve_value
+
+
+@functools.lru_cache(maxsize=None)
+def _event_picker() -> _Picker:
+    # Built on first use: it completes every event model
+    return _Picker(_models(AnyEvent))
+
+
+def lazy_event(raw: dict, *, trusted: bool = False) -> EventDataclasses:
+    """Wrap a decoded webhook event in a :obj:`LazyModel` of its event model.
+
+    Args:
+        raw (dict): The event.
+        trusted (bool): Skip validation.
+    """
+    model = _event_picker()(raw)
+    if model is None:
+        raise RuntimeError("Unrecognized event type: %s" % raw.get("type"))
+
+    return LazyModel(model, raw, trusted=trusted)  # type: ignore
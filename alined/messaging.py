@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+from typing import (
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TYPE_CHECKING,
+    Union,
+)
+import uuid
+
+import httpx
+
+from .codec import Codec
+from .components import TextMessage
+from .retry import CircuitOpenError
+from .http import (
+    HTTPClient,
+    send_broadcast_message,
+    send_multicast_message,
+    send_push_message,
+)
+
+if TYPE_CHECKING:
+    from .types import AnyMessage
+
+MULTICAST_MAX_RECIPIENTS = 500
+MAX_MESSAGES = 5
+
+# A message object, or one already encoded to JSON (see :obj:`MessageTemplate`).
+Message = Union[dict, bytes]
+
+
+def to_messages(
+    contents: Iterable[Union[str, dict, bytes, AnyMessage]],
+) -> List[Message]:
+    """Convert message contents to their JSON form.
+
+    Args:
+        contents (str | dict | bytes | :obj:`AnyMessage`): Contents. Strings
+            become text messages; dicts and encoded messages are sent as is.
+    """
+    # The cached JSON of components, not a copy: it's only encoded
+    return [
+        TextMessage(c)._json
+        if isinstance(c, str)
+        else c
+        if isinstance(c, (dict, bytes))
+        else c._json
+        for c in contents
+    ]
+
+
+def make_body(
+    codec: Codec, fields: dict, messages: List[Message]
+) -> Union[dict, bytes]:
+    """Request body with ``messages`` added to ``fields``.
+
+    If any message is already encoded, the body is encoded here around it so it
+    isn't decoded and encoded again.
+
+    Args:
+        codec (Codec): JSON codec.
+        fields (dict): Other fields of the body.
+        messages (List[Message]): Messages.
+    """
+    if not any(isinstance(m, bytes) for m in messages):
+        return {**fields, "messages": messages}
+
+    head = codec.dumps(fields)[:-1]
+    return b"".join(
+        (
+            head,
+            b',"messages":[' if fields else b'"messages":[',
+            b",".join(m if isinstance(m, bytes) else codec.dumps(m) for m in messages),
+            b"]}",
+        )
+    )
+
+
+def chunked(items: Sequence[str], size: int) -> List[Sequence[str]]:
+    """Split ``items`` into consecutive chunks of at most ``size`` items."""
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class MulticastResult(NamedTuple):
+    """Outcome of one multicast chunk.
+
+    Args:
+        to (Sequence[str]): Recipients of the chunk.
+        retry_key (str): ``X-Line-Retry-Key`` the chunk was sent with. Resend a
+            failed chunk with :func:`multicast` and ``retry_keys`` set to this,
+            and recipients who already got it won't get it twice.
+        response (dict, optional): Response body, if it was sent.
+        error (BaseException, optional): Error, if it failed.
+    """
+
+    to: Sequence[str]
+    retry_key: str
+    response: Optional[dict] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the chunk was accepted, now or by an earlier request with the
+        same retry key (``409``)."""
+        if self.error is None:
+            return True
+
+        return (
+            isinstance(self.error, httpx.HTTPStatusError)
+            and self.error.response.status_code == 409
+        )
+
+
+async def push(
+    http: HTTPClient,
+    to: str,
+    messages: List[Message],
+    *,
+    notification_disabled: bool = False,
+    retry_key: Optional[str] = None,
+) -> dict:
+    """Push messages to a user, group or room.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        to (str): User, group or room ID.
+        messages (List[Message]): Messages, up to 5.
+        notification_disabled (bool): Don't notify the recipient.
+        retry_key (str, optional): ``X-Line-Retry-Key``. Defaults to a new UUID.
+    """
+    return await send_push_message(
+        http,
+        make_body(
+            http.codec,
+            {"to": to, "notificationDisabled": notification_disabled},
+            messages,
+        ),
+        retry_key=retry_key or str(uuid.uuid4()),
+    )
+
+
+async def multicast(
+    http: HTTPClient,
+    to: Sequence[str],
+    messages: List[Message],
+    *,
+    notification_disabled: bool = False,
+    concurrency: int = 16,
+    retry_keys: Optional[Sequence[str]] = None,
+) -> List[MulticastResult]:
+    """Send messages to any number of users.
+
+    Recipients are split into chunks of 500 (the API's limit per request), and
+    chunks are sent concurrently under the ``multicast`` rate limit. A failed
+    chunk doesn't stop the others, not even when the circuit breaker opens
+    midway (the rest fail with :obj:`CircuitOpenError`): check
+    :attr:`MulticastResult.ok`.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        to (Sequence[str]): User IDs.
+        messages (List[Message]): Messages, up to 5.
+        notification_disabled (bool): Don't notify the recipients.
+        concurrency (int): Max chunks in flight at once.
+        retry_keys (Sequence[str], optional): One retry key per chunk, to resend
+            chunks of an earlier call. Defaults to new UUIDs.
+
+    Returns:
+        List[MulticastResult]: One result per chunk, in order.
+    """
+    chunks = chunked(to, MULTICAST_MAX_RECIPIENTS)
+    keys = list(retry_keys) if retry_keys else [str(uuid.uuid4()) for _ in chunks]
+
+    if len(keys) != len(chunks):
+        raise ValueError("Expected %d retry keys, got %d" % (len(chunks), len(keys)))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send(chunk: Sequence[str], retry_key: str) -> MulticastResult:
+        async with semaphore:
+            try:
+                response = await send_multicast_message(
+                    http,
+                    make_body(
+                        http.codec,
+                        {
+                            "to": list(chunk),
+                            "notificationDisabled": notification_disabled,
+                        },
+                        messages,
+                    ),
+                    retry_key=retry_key,
+                )
+            except (httpx.HTTPError, OSError, CircuitOpenError) as err:
+                return MulticastResult(chunk, retry_key, error=err)
+
+        return MulticastResult(chunk, retry_key, response)
+
+    return list(await asyncio.gather(*map(send, chunks, keys)))
+
+
+async def broadcast(
+    http: HTTPClient,
+    messages: List[Message],
+    *,
+    notification_disabled: bool = False,
+    retry_key: Optional[str] = None,
+) -> dict:
+    """Send messages to every friend of the channel.
+
+    Args:
+        http (HTTPClient): HTTP client.
+        messages (List[Message]): Messages, up to 5.
+        notification_disabled (bool): Don't notify the recipients.
+        retry_key (str, optional): ``X-Line-Retry-Key``. Defaults to a new UUID.
+    """
+    return await send_broadcast_message(
+        http,
+        make_body(
+            http.codec, {"notificationDisabled": notification_disabled}, messages
+        ),
+        retry_key=retry_key or str(uuid.uuid4()),
+    )
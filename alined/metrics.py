@@ -0,0 +1,304 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import math
+import time
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; suits everything from signature checks to slow handlers.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)
+    )
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Base of the metric types.
+
+    Args:
+        name (str): Metric name.
+        help (str): Description.
+        labelnames (Sequence[str]): Label names. Values are passed positionally,
+            in this order.
+    """
+
+    type: str
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """``(suffixed name, formatted labels, value)`` of every sample."""
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP %s %s" % (self.name, self.help),
+            "# TYPE %s %s" % (self.name, self.type),
+        ]
+        lines.extend(
+            "%s%s %s" % (name, labels, _format_value(value))
+            for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for labels, value in self.values.items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Gauge(Metric):
+    """A value read when the metrics are collected.
+
+    Args:
+        fn (() -> float): Returns the current value.
+        counter (bool): The value only goes up; export it as a counter.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self, name: str, help: str, fn: Callable[[], float], *, counter: bool = False
+    ):
+        super().__init__(name, help)
+        self.fn = fn
+        if counter:
+            self.type = "counter"
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        yield self.name, "", self.fn()
+
+
+class Histogram(Metric):
+    """Distribution of observed values (durations, in seconds).
+
+    Args:
+        buckets (Sequence[float]): Upper bounds of the buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self.values: Dict[Labels, List] = {}
+
+    def observe(self, value: float, *labels: str):
+        entry = self.values.get(labels)
+
+        if entry is None:
+            entry = self.values[labels] = [[0] * len(self.buckets), 0.0, 0]
+
+        counts = entry[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, *labels: str):
+        """Observe the duration of the block."""
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        names = self.labelnames + ("le",)
+
+        for labels, (counts, total, count) in self.values.items():
+            cumulative = 0
+
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield (
+                    self.name + "_bucket",
+                    _format_labels(names, labels + (_format_value(bound),)),
+                    cumulative,
+                )
+
+            yield (
+                self.name + "_bucket",
+                _format_labels(names, labels + ("+Inf",)),
+                count,
+            )
+            yield self.name + "_sum", _format_labels(self.labelnames, labels), total
+            yield self.name + "_count", _format_labels(self.labelnames, labels), count
+
+
+class Metrics:
+    """Registry of the SDK's metrics, rendered in the Prometheus text format.
+
+    Args:
+        prefix (str): Prefix of every metric name.
+        buckets (Sequence[float]): Histogram buckets, in seconds.
+    """
+
+    metrics: Dict[str, Metric]
+
+    def __init__(
+        self, *, prefix: str = "alined_", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.metrics = {}
+
+        self.stage_seconds = self.histogram(
+            "webhook_stage_seconds",
+            "Time spent in each stage of handling a webhook.",
+            ("stage",),
+        )
+        self.events = self.counter(
+            "webhook_events_total", "Webhook events received, by type.", ("type",)
+        )
+        self.handler_seconds = self.histogram(
+            "handler_seconds", "Handler run time.", ("event", "handler")
+        )
+        self.handler_errors = self.counter(
+            "handler_errors_total",
+            "Handlers that raised.",
+            ("event", "handler"),
+        )
+        self.handler_timeouts = self.counter(
+            "handler_timeouts_total",
+            "Handlers cancelled at their deadline.",
+            ("event", "handler"),
+        )
+        self.handler_slow = self.counter(
+            "handler_slow_total",
+            "Handlers that ran past the slow handler threshold.",
+            ("event", "handler"),
+        )
+        self.api_seconds = self.histogram(
+            "api_request_seconds",
+            "Outbound API request time, per attempt.",
+            ("endpoint",),
+        )
+        self.api_requests = self.counter(
+            "api_requests_total",
+            "Outbound API requests, per attempt, by status (or error).",
+            ("endpoint", "status"),
+        )
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register a counter."""
+        return self._register(Counter(self.prefix + name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = ()
+    ) -> Histogram:
+        """Register a histogram."""
+        return self._register(
+            Histogram(self.prefix + name, help, labelnames, buckets=self.buckets)
+        )
+
+    def gauge(
+        self, name: str, help: str, fn: Callable[[], float], *, counter: bool = False
+    ) -> Gauge:
+        """Register a value read from ``fn`` on collection."""
+        return self._register(Gauge(self.prefix + name, help, fn, counter=counter))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise RuntimeError("Metric %s is already registered" % metric.name)
+
+        self.metrics[metric.name] = metric
+        return metric
+
+    def lap(self, since: float, stage: str) -> float:
+        """Record a webhook stage that started at ``since``.
+
+        Args:
+            since (float): ``time.perf_counter()`` when the stage started.
+            stage (str): Stage name.
+
+        Returns:
+            float: Now, when the next stage starts.
+        """
+        now = time.perf_counter()
+        self.stage_seconds.observe(now - since, stage)
+        return now
+
+    def observe_request(self, endpoint: str, seconds: float, status: str):
+        """Record one outbound request.
+
+        Args:
+            endpoint (str): Endpoint name.
+            seconds (float): Duration.
+            status (str): Status code, or the class name of the error it failed
+                with, e.g. ``ConnectTimeout``.
+        """
+        self.api_seconds.observe(seconds, endpoint)
+        self.api_requests.inc(endpoint, status)
+
+    def render(self) -> str:
+        """Every metric, in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+
+        return "\n".join(lines) + "\n"
@@ -1,63 +1,454 @@
+from abc import ABC, abstractmethod
 import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+import functools
+import hashlib
+import mmap
+import os
+import struct
 import time
-from typing import Awaitable, Callable, ParamSpec, TypeVar
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Concatenate,
+    Dict,
+    Literal,
+    Mapping,
+    Optional,
+    ParamSpec,
+    Tuple,
+    TypeVar,
+)
 
+import httpx
 
-class RateLimit:
-    def __init__(self, *, requests: int, per_seconds: int):
-        self.DEFINED_requests = requests
-        self.DEFINED_per_secs = per_seconds
-        self.r = requests
-        self.designated_to_wait = False
-        self.last_dispatch = 0
+try:
+    import fcntl
+except ModuleNotFoundError:
+    fcntl = None
+    import msvcrt
 
-    async def dispatch(self):
+Endpoint = Literal["reply", "push", "multicast", "broadcast", "content", "profile"]
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# (requests, per_seconds), as documented by the LINE Messaging API.
+RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "reply": (2000, 1),
+    "push": (2000, 1),
+    "multicast": (200, 1),
+    "broadcast": (60, 3600),
+    "content": (2000, 1),
+    "profile": (2000, 1),
+}
+
+
+class TokenBucket:
+    """Token bucket state.
+
+    Holds up to ``requests`` tokens and refills at ``requests / per_seconds``
+    tokens per second. Times are in seconds on whatever clock the caller uses.
+
+    Args:
+        requests (int): Max requests (bucket capacity)...
+        per_seconds (float): ...per this many seconds.
+        now (float): Current time.
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "blocked_until")
+
+    def __init__(self, *, requests: int, per_seconds: float, now: float):
+        self.capacity = requests
+        self.rate = requests / per_seconds
+        self.tokens = float(requests)
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(
+            self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token.
+
+        Returns:
+            float: ``0`` if a token was taken, otherwise seconds to wait before
+                trying again.
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        self._refill(now)
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+    def penalize(self, now: float, retry_after: float):
+        """Stop handing out tokens for ``retry_after`` seconds."""
+        self._refill(now)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class RateLimitBackend(ABC):
+    """Where token buckets live.
+
+    The default :obj:`MemoryRateLimitBackend` only sees the current process.
+    To share one channel quota between several workers, use a backend that
+    every worker can reach, such as :obj:`FileRateLimitBackend` (same host) or
+    :obj:`RedisRateLimitBackend`.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, requests: int, per_seconds: float) -> float:
+        """Take a token from the bucket ``key``.
+
+        Returns:
+            float: ``0`` if a token was taken, otherwise seconds to wait.
+        """
+
+    @abstractmethod
+    async def penalize(
+        self, key: str, requests: int, per_seconds: float, retry_after: float
+    ):
+        """Hold the bucket ``key`` back for ``retry_after`` seconds."""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """In-process buckets."""
+
+    buckets: Dict[str, TokenBucket]
+
+    def __init__(self):
+        self.buckets = {}
+
+    def bucket(self, key: str, requests: int, per_seconds: float) -> TokenBucket:
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(
+                requests=requests, per_seconds=per_seconds, now=time.monotonic()
+            )
+
+        return self.buckets[key]
+
+    async def take(self, key: str, requests: int, per_seconds: float) -> float:
+        return self.bucket(key, requests, per_seconds).take(time.monotonic())
+
+    async def penalize(
+        self, key: str, requests: int, per_seconds: float, retry_after: float
+    ):
+        self.bucket(key, requests, per_seconds).penalize(time.monotonic(), retry_after)
+
+
+class FileRateLimitBackend(RateLimitBackend):
+    """Buckets in a memory-mapped file, shared by every process on this host.
+
+    Each bucket is a fixed-size slot holding its key and state. Updates are
+    serialized with an exclusive file lock, which is held only for the few
+    microseconds a read-modify-write of one slot takes.
+
+    Args:
+        path (str): File path. Every worker must use the same path.
+        slots (int): Max number of distinct buckets.
+    """
+
+    RECORD = struct.Struct("<32sddd")
+
+    def __init__(self, path: str, *, slots: int = 64):
+        self.path = path
+        self.slots = slots
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+
+    def _open(self) -> mmap.mmap:
+        if self._mm is None:
+            size = self.RECORD.size * self.slots
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+            with _file_lock(fd):
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+
+            self._fd = fd
+            self._mm = mmap.mmap(fd, size)
+
+        return self._mm
+
+    def _slot(self, mm: mmap.mmap, key: bytes) -> int:
+        empty = -1
+
+        for i in range(self.slots):
+            k = mm[i * self.RECORD.size : i * self.RECORD.size + 32]
+            if k == key:
+                return i
+            if empty < 0 and not any(k):
+                empty = i
+
+        if empty < 0:
+            raise RuntimeError("No free rate limit slots in %s" % self.path)
+
+        return empty
+
+    def _update(
+        self,
+        key: str,
+        requests: int,
+        per_seconds: float,
+        fn: Callable[[TokenBucket, float], T],
+    ) -> T:
+        mm = self._open()
+        k = hashlib.blake2b(key.encode("utf-8"), digest_size=32).digest()
         now = time.time()
 
-        if not self.last_dispatch:
-            self.last_dispatch = now
+        with _file_lock(self._fd):  # type: ignore
+            i = self._slot(mm, k)
+            offset = i * self.RECORD.size
+            bucket = TokenBucket(requests=requests, per_seconds=per_seconds, now=now)
+            stored, tokens, updated, blocked_until = self.RECORD.unpack_from(mm, offset)
 
-        self.r -= 1
+            if stored == k:
+                bucket.tokens = tokens
+                bucket.updated = updated
+                bucket.blocked_until = blocked_until
 
-        if self.r < 0:
-            next_second = self.last_dispatch + self.DEFINED_per_secs
-            if now < next_second:
-                print("Too many requests!", next_second - now)
-                me = False
-                if not self.designated_to_wait:
-                    self.designated_to_wait = me = True
+            result = fn(bucket, now)
+            self.RECORD.pack_into(
+                mm, offset, k, bucket.tokens, bucket.updated, bucket.blocked_until
+            )
 
-                await asyncio.sleep(next_second - now)
-                if me:
-                    self.r = self.DEFINED_requests
-                    self.designated_to_wait = False
+        return result
 
-                return self.dispatch()
-            else:
-                raise RuntimeError("Uncaught! (timenow >= next_dispatch_available)")
+    async def take(self, key: str, requests: int, per_seconds: float) -> float:
+        return self._update(
+            key, requests, per_seconds, lambda bucket, now: bucket.take(now)
+        )
 
-        self.last_dispatch = now
+    async def penalize(
+        self, key: str, requests: int, per_seconds: float, retry_after: float
+    ):
+        self._update(
+            key,
+            requests,
+            per_seconds,
+            lambda bucket, now: bucket.penalize(now, retry_after),
+        )
 
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)  # type: ignore
+            self._mm = self._fd = None
 
-P = ParamSpec("P")
-T = TypeVar("T")
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets in Redis (or any server speaking its ``EVAL`` command).
+
+    The bucket math runs as a Lua script, so it is atomic across every
+    process talking to the same server.
+
+    Args:
+        redis: An async client exposing ``await eval(script, numkeys, *args)``,
+            e.g. ``redis.asyncio.Redis``.
+        prefix (str): Key prefix.
+    """
+
+    TAKE = """
+local s = redis.call('HMGET', KEYS[1], 't', 'u', 'b')
+local cap = tonumber(ARGV[1])
+local rate = cap / tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(s[1]) or cap
+local updated = tonumber(s[2]) or now
+local blocked = tonumber(s[3]) or 0
+local wait = 0
+if now < blocked then
+  wait = blocked - now
+else
+  tokens = math.min(cap, tokens + math.max(0, now - updated) * rate)
+  updated = now
+  if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+end
+if ARGV[4] ~= '' then
+  tokens = 0
+  blocked = math.max(blocked, now + tonumber(ARGV[4]))
+end
+redis.call('HSET', KEYS[1],
+  't', tostring(tokens), 'u', tostring(updated), 'b', tostring(blocked))
+redis.call('EXPIRE', KEYS[1],
+  math.ceil(tonumber(ARGV[2]) + math.max(0, blocked - now)) + 60)
+return tostring(wait)
+"""
+
+    def __init__(self, redis: Any, *, prefix: str = "alined:ratelimit:"):
+        self.redis = redis
+        self.prefix = prefix
+
+    async def _eval(
+        self, key: str, requests: int, per_seconds: float, retry_after: str
+    ) -> float:
+        wait = await self.redis.eval(
+            self.TAKE,
+            1,
+            self.prefix + key,
+            requests,
+            per_seconds,
+            repr(time.time()),
+            retry_after,
+        )
+        return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+    async def take(self, key: str, requests: int, per_seconds: float) -> float:
+        return await self._eval(key, requests, per_seconds, "")
+
+    async def penalize(
+        self, key: str, requests: int, per_seconds: float, retry_after: float
+    ):
+        # The script takes a token before applying the hold-off, which is
+        # harmless here: the bucket is emptied right after.
+        await self._eval(key, requests, per_seconds, repr(retry_after))
+
+
+class RateLimiter:
+    """Rate limits shared per API endpoint.
+
+    Callers in this process queue up fairly (first come, first served) per
+    endpoint; the bucket itself lives in ``backend``.
+
+    Args:
+        limits (Mapping[str, tuple[int, float]], optional): Overrides for
+            :obj:`RATE_LIMITS`, as ``{endpoint: (requests, per_seconds)}``.
+        backend (RateLimitBackend, optional): Bucket storage. Defaults to
+            :obj:`MemoryRateLimitBackend`.
+        namespace (str): Prefix of the bucket keys. Limiters of different
+            channels can share one backend under different namespaces.
+    """
+
+    limits: Dict[str, Tuple[int, float]]
+    backend: RateLimitBackend
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, Tuple[int, float]]] = None,
+        *,
+        backend: Optional[RateLimitBackend] = None,
+        namespace: str = "",
+    ):
+        self.limits = {**RATE_LIMITS, **(limits or {})}
+        self.backend = backend or MemoryRateLimitBackend()
+        self.namespace = namespace
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, endpoint: str):
+        """Wait until a request to ``endpoint`` is allowed."""
+        requests, per_seconds = self.limits[endpoint]
+
+        if endpoint not in self._locks:
+            self._locks[endpoint] = asyncio.Lock()
+
+        # asyncio.Lock wakes waiters in FIFO order, which keeps this fair.
+        async with self._locks[endpoint]:
+            key = self.namespace + endpoint
+            while wait := await self.backend.take(key, requests, per_seconds):
+                await asyncio.sleep(wait)
+
+    async def penalize(self, endpoint: str, retry_after: float):
+        """Hold ``endpoint`` back for ``retry_after`` seconds."""
+        requests, per_seconds = self.limits[endpoint]
+        await self.backend.penalize(
+            self.namespace + endpoint, requests, per_seconds, retry_after
+        )
+
+    @asynccontextmanager
+    async def limit(self, endpoint: str, *, default_retry_after: float = 1.0):
+        """Wait for ``endpoint``, then run the block. A ``429`` raised from the
+        block (as ``httpx.HTTPStatusError``) holds the endpoint back for the
+        ``Retry-After`` duration.
+
+        Args:
+            endpoint (str): Endpoint name, a key of :obj:`RATE_LIMITS`.
+            default_retry_after (float): Hold-off when a ``429`` has no
+                ``Retry-After``.
+        """
+        await self.acquire(endpoint)
+
+        try:
+            yield
+        except httpx.HTTPStatusError as err:
+            if err.response.status_code == 429:
+                retry_after = parse_retry_after(err.response.headers.get("retry-after"))
+                await self.penalize(
+                    endpoint,
+                    default_retry_after if retry_after is None else retry_after,
+                )
+            raise
+
+
+@contextmanager
+def _file_lock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # type: ignore
+        try:
+            yield
+        finally:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)  # type: ignore
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (delay in seconds or an HTTP date)."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 def apply_rate_limit(
-    *, requests: int, per_seconds: int
-) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
-    """Apply rate limit to an async function.
+    endpoint: Endpoint, *, default_retry_after: float = 1.0
+) -> Callable[
+    [Callable[Concatenate[Any, P], Awaitable[T]]],
+    Callable[Concatenate[Any, P], Awaitable[T]],
+]:
+    """Apply the shared rate limit of an endpoint to an async API function.
+
+    The decorated function takes the :obj:`HTTPClient` as its first argument;
+    its :obj:`RateLimiter` is used. A ``429`` response holds the endpoint back
+    for the ``Retry-After`` duration.
 
     Args:
-        requests (int): Max requests...
-        per_seconds (int): ...per second.
+        endpoint (Endpoint): Endpoint name, a key of :obj:`RATE_LIMITS`.
+        default_retry_after (float): Hold-off when a ``429`` has no ``Retry-After``.
     """
 
-    def wrapper(fn: Callable[P, Awaitable[T]]):
-        async def wrapped(*args: P.args, **kwargs: P.kwargs):
-            rate_limit = RateLimit(requests=requests, per_seconds=per_seconds)
-            await rate_limit.dispatch()
-            return await fn(*args, **kwargs)
+    def wrapper(fn: Callable[Concatenate[Any, P], Awaitable[T]]):
+        @functools.wraps(fn)
+        async def wrapped(http: Any, *args: P.args, **kwargs: P.kwargs) -> T:
+            async with http.rate_limiter.limit(
+                endpoint, default_retry_after=default_retry_after
+            ):
+                return await fn(http, *args, **kwargs)
 
         return wrapped
 
@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Literal, Optional, Tuple, TypeVar
+import uuid
+
+import httpx
+
+from .rate_limiting import parse_retry_after
+
+logger = logging.getLogger("alined")
+
+T = TypeVar("T")
+
+# The request never reached LINE, so even non-idempotent calls can be resent.
+NOT_SENT_ERRORS: Tuple[type, ...] = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """When and how long to wait before resending a failed API call.
+
+    Delays grow exponentially with full jitter: retry ``n`` waits a random
+    time between 0 and ``min(max_backoff, backoff * 2 ** (n - 1))``, or the
+    ``Retry-After`` of the response if that's longer.
+
+    Calls that aren't idempotent (replies, which have no retry key) are only
+    resent when LINE surely never processed them: connection failures and
+    ``429``. Idempotent calls are also resent on timeouts and ``5xx``.
+
+    Args:
+        attempts (int): Max attempts, including the first one.
+        backoff (float): Base delay in seconds.
+        max_backoff (float): Max delay in seconds, before ``Retry-After``.
+        max_retry_after (float): Give up instead of waiting on a ``Retry-After``
+            longer than this.
+        statuses (tuple[int, ...]): Statuses that idempotent calls are resent on.
+    """
+
+    def __init__(
+        self,
+        *,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        max_retry_after: float = 30.0,
+        statuses: Tuple[int, ...] = (500, 502, 503, 504),
+    ):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.statuses = statuses
+
+    def retryable(self, err: BaseException, *, idempotent: bool) -> bool:
+        """Whether the call that raised ``err`` may be resent."""
+        if isinstance(err, httpx.HTTPStatusError):
+            status = err.response.status_code
+            return status == 429 or (idempotent and status in self.statuses)
+
+        if isinstance(err, NOT_SENT_ERRORS):
+            return True
+
+        return idempotent and isinstance(err, httpx.TransportError)
+
+    def delay(
+        self, attempt: int, err: BaseException, *, idempotent: bool
+    ) -> Optional[float]:
+        """Seconds to wait before the next attempt.
+
+        Args:
+            attempt (int): Attempts made so far.
+            err (BaseException): Error of the last attempt.
+            idempotent (bool): Whether resending can't deliver twice.
+
+        Returns:
+            float | None: The delay, or ``None`` to give up.
+        """
+        if attempt >= self.attempts or not self.retryable(err, idempotent=idempotent):
+            return None
+
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        )
+
+        if isinstance(err, httpx.HTTPStatusError):
+            retry_after = parse_retry_after(err.response.headers.get("retry-after"))
+
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+
+                delay = max(delay, retry_after)
+
+        return delay
+
+
+class CircuitBreaker:
+    """Fails API calls fast while LINE looks unhealthy.
+
+    After ``failure_threshold`` consecutive failures (connection errors,
+    timeouts, ``5xx``) the circuit opens and calls raise
+    :obj:`CircuitOpenError` without being sent. After ``recovery_timeout``
+    seconds one trial call is let through: if it succeeds the circuit closes,
+    otherwise it opens again.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        recovery_timeout (float): Seconds before a trial call is let through.
+    """
+
+    state: Literal["closed", "open", "half_open"]
+
+    def __init__(self, *, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def check(self):
+        """Raise :obj:`CircuitOpenError` if calls aren't allowed right now."""
+        if self.state == "closed":
+            return
+
+        if (
+            self.state == "open"
+            and time.monotonic() - self.opened_at >= self.recovery_timeout
+        ):
+            self.state = "half_open"
+            return
+
+        raise CircuitOpenError(
+            "LINE API circuit is open after %d failures; retrying in %.1fs"
+            % (
+                self.failures,
+                max(0.0, self.opened_at + self.recovery_timeout - time.monotonic()),
+            )
+        )
+
+    def record(self, err: Optional[BaseException]):
+        """Record the outcome of a call.
+
+        Args:
+            err (BaseException, optional): The error, or ``None`` on success.
+        """
+        if err is None or not self.is_failure(err):
+            self.state = "closed"
+            self.failures = 0
+            return
+
+        self.failures += 1
+
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(
+                    "LINE API circuit opened after %d failures", self.failures
+                )
+
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def abort(self):
+        """Record that a call was abandoned (e.g. cancelled) before it finished."""
+        if self.state == "half_open":
+            # Let the next call be the trial instead
+            self.state = "open"
+
+    @staticmethod
+    def is_failure(err: BaseException) -> bool:
+        """Whether ``err`` says something about LINE's health."""
+        if isinstance(err, httpx.HTTPStatusError):
+            return err.response.status_code >= 500
+
+        return isinstance(err, httpx.TransportError)
+
+
+def with_retry(
+    *, idempotent: bool = False, retry_key: bool = False
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Resend an API call according to ``http.retry`` and guard it with
+    ``http.breaker``. The first argument of the function must be an
+    :obj:`HTTPClient`.
+
+    Args:
+        idempotent (bool): Sending the call twice has the same effect as once.
+        retry_key (bool): The endpoint takes an ``X-Line-Retry-Key`` (passed as
+            the ``retry_key`` keyword). One is generated if not given, and every
+            attempt reuses it, so the call is idempotent.
+    """
+    idempotent = idempotent or retry_key
+
+    def wrapper(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapped(http: Any, *args: Any, **kwargs: Any) -> T:
+            if retry_key and not kwargs.get("retry_key"):
+                kwargs["retry_key"] = str(uuid.uuid4())
+
+            attempt = 0
+
+            while True:
+                if http.breaker:
+                    http.breaker.check()
+
+                attempt += 1
+
+                try:
+                    result = await fn(http, *args, **kwargs)
+                except (asyncio.CancelledError, KeyboardInterrupt):
+                    if http.breaker:
+                        http.breaker.abort()
+                    raise
+                except Exception as err:
+                    if http.breaker:
+                        http.breaker.record(err)
+
+                    delay = (
+                        http.retry.delay(attempt, err, idempotent=idempotent)
+                        if http.retry
+                        else None
+                    )
+                    if delay is None:
+                        raise
+
+                    logger.debug(
+                        "Retrying %s in %.2fs (attempt %d): %r",
+                        fn.__name__,
+                        delay,
+                        attempt,
+                        err,
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+
+                if http.breaker:
+                    http.breaker.record(None)
+
+                return result
+
+        return wrapped
+
+    return wrapper
@@ -0,0 +1,163 @@
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple, Type
+
+from .context import (
+    AudioMessageContext,
+    BaseContext,
+    BeaconContext,
+    FileMessageContext,
+    FollowContext,
+    ImageMessageContext,
+    JoinContext,
+    LeaveContext,
+    LocationMessageContext,
+    MemberJoinedContext,
+    MemberLeftContext,
+    PostbackContext,
+    StickerMessageContext,
+    TextMessageContext,
+    UnfollowContext,
+    UnsendContext,
+    VideoMessageContext,
+    VideoPlayCompleteContext,
+)
+from .types import EventDataclasses, Events
+
+# (event type, message type); the message type is ``None`` for non-message events.
+RouteKey = Tuple[str, Optional[str]]
+
+
+class Route(NamedTuple):
+    """How one kind of event is dispatched.
+
+    Args:
+        context (Type[BaseContext]): Context class handed to the handlers.
+        events (tuple[Events, ...]): Handlers pushed with the context, in order.
+        message (bool): Push ``message`` with the event itself first.
+        image (bool): Assemble image sets and push ``image_set`` and
+            ``image_fulfill``.
+    """
+
+    context: Type[BaseContext]
+    events: Tuple[Events, ...]
+    message: bool = False
+    image: bool = False
+
+    @property
+    def names(self) -> Tuple[Events, ...]:
+        """Every handler name this route may push."""
+        names: Tuple[Events, ...] = self.events
+
+        if self.message:
+            names = ("message",) + names
+
+        if self.image:
+            names = names + ("image_set", "image_fulfill")
+
+        return names
+
+
+ROUTES: Dict[RouteKey, Route] = {
+    ("message", "text"): Route(TextMessageContext, ("text",), message=True),
+    ("message", "image"): Route(
+        ImageMessageContext, ("image",), message=True, image=True
+    ),
+    ("message", "video"): Route(VideoMessageContext, ("video",), message=True),
+    ("message", "audio"): Route(AudioMessageContext, ("audio",), message=True),
+    ("message", "file"): Route(FileMessageContext, ("file",), message=True),
+    ("message", "location"): Route(LocationMessageContext, ("location",), message=True),
+    ("message", "sticker"): Route(StickerMessageContext, ("sticker",), message=True),
+    ("unsend", None): Route(UnsendContext, ("unsend",)),
+    ("follow", None): Route(FollowContext, ("follow",)),
+    ("unfollow", None): Route(UnfollowContext, ("unfollow",)),
+    ("join", None): Route(JoinContext, ("join",)),
+    ("leave", None): Route(LeaveContext, ("leave",)),
+    ("memberJoined", None): Route(MemberJoinedContext, ("member_joined",)),
+    ("memberLeft", None): Route(MemberLeftContext, ("member_left",)),
+    ("postback", None): Route(PostbackContext, ("postback",)),
+    ("beacon", None): Route(BeaconContext, ("beacon",)),
+    ("videoPlayComplete", None): Route(
+        VideoPlayCompleteContext, ("video_play_complete",)
+    ),
+}
+
+
+def route_key(e: EventDataclasses) -> RouteKey:
+    """Routing key of an event."""
+    if e.type == "message":
+        return (e.type, e.message.type)  # type: ignore
+
+    return (e.type, None)
+
+
+def raw_route_key(d: dict) -> RouteKey:
+    """Routing key of a decoded (unparsed) event. Only reads the ``type`` fields."""
+    t = d["type"]
+
+    if t == "message":
+        return (t, d["message"]["type"])
+
+    return (t, None)
+
+
+class Router:
+    """Routing table from event (and message) type to :obj:`Route`.
+
+    The router also tracks which handler names are registered, so events that
+    no handler would receive can be dropped before they are parsed.
+
+    Args:
+        routes (Dict[RouteKey, Route], optional): Routes. Defaults to :obj:`ROUTES`.
+    """
+
+    routes: Dict[RouteKey, Route]
+    listening: Set[str]
+    interesting: Set[RouteKey]
+    listens_to_all: bool
+
+    def __init__(self, routes: Optional[Dict[RouteKey, Route]] = None):
+        self.routes = dict(ROUTES if routes is None else routes)
+        self.listening = set()
+        self._update()
+
+    def add(self, key: RouteKey, route: Route):
+        """Add or replace a route.
+
+        Args:
+            key (RouteKey): ``(event type, message type or None)``.
+            route (Route): The route.
+        """
+        self.routes[key] = route
+        self._update()
+
+    def listen(self, names: Iterable[str]):
+        """Set the handler names that are registered.
+
+        Args:
+            names (Iterable[Events]): Names.
+        """
+        self.listening = set(names)
+        self._update()
+
+    def _update(self):
+        self.interesting = {
+            key
+            for key, route in self.routes.items()
+            if self.listening.intersection(route.names)
+        }
+        self.listens_to_all = len(self.interesting) == len(self.routes)
+
+    def wants(self, d: dict) -> bool:
+        """Whether a decoded event would reach any handler.
+
+        Args:
+            d (dict): The event, as decoded from the webhook body.
+        """
+        return raw_route_key(d) in self.interesting
+
+    def lookup(self, e: EventDataclasses) -> Route:
+        key = route_key(e)
+
+        try:
+            return self.routes[key]
+        except KeyError:
+            raise RuntimeError("Unrecognized event type: %s/%s" % key) from None
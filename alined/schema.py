@@ -1,27 +1,37 @@
 from __future__ import annotations
 
 from typing import List, Literal, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
-class Emoji(BaseModel):
+class Model(BaseModel):
+    """Base of the webhook models.
+
+    Validators are built the first time a model is used rather than at import,
+    so importing the SDK stays cheap.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+class Emoji(Model):
     index: int
     length: int
     product_id: str = Field(..., alias="productId")
     emoji_id: str = Field(..., alias="emojiId")
 
 
-class Mentions(BaseModel):
+class Mentions(Model):
     mentionees: List[Union[MentioneeUser, MentioneeAll]]
 
 
-class MentioneeAll(BaseModel):
+class MentioneeAll(Model):
     type: Literal["all"]
     index: int
     length: int
 
 
-class MentioneeUser(BaseModel):
+class MentioneeUser(Model):
     type: Literal["user"]
     index: int
     length: int
@@ -1,13 +1,31 @@
-from typing import Awaitable, Callable
-from fastapi import FastAPI, Request
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional
+from fastapi import FastAPI, Request, Response
 
+from .metrics import CONTENT_TYPE, Metrics
 
-def create_server(handler: Callable[[Request], Awaitable[None]]):
-    app = FastAPI()
+
+def create_server(
+    handler: Callable[[Request], Awaitable[None]],
+    *,
+    lifespan: Optional[Callable[[FastAPI], AsyncContextManager[Any]]] = None,
+    metrics: Optional[Metrics] = None,
+    channel_paths: bool = False,
+):
+    app = FastAPI(lifespan=lifespan)
 
     @app.post("/")
     async def idx(req: Request):
         await handler(req)
         return {"message": "OK"}
 
+    if channel_paths:
+        # The handler reads the channel name from ``req.path_params``
+        app.post("/{channel}")(idx)
+
+    if metrics:
+
+        @app.get("/metrics")
+        async def export_metrics():
+            return Response(metrics.render(), media_type=CONTENT_TYPE)
+
     return app
@@ -0,0 +1,140 @@
+import re
+from typing import Any, List, Tuple, Union
+
+from .codec import Codec, CodecName, get_codec
+from .components import Component
+
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# Private use characters survive every codec unescaped (they encode with
+# ``ensure_ascii`` off), so the holes can be found in the encoded bytes.
+_STRING_HOLE = "\ue000%d\ue001"
+_INT_HOLE = "\ue002%d\ue003"
+_HOLES = re.compile(rb'\xee\x80\x80(\d+)\xee\x80\x81|"\xee\x80\x82(\d+)\xee\x80\x83"')
+
+
+class MessageTemplate:
+    """A message encoded once, with ``{name}`` placeholders filled in per send.
+
+    The static parts are encoded to JSON up front; :meth:`render` only escapes
+    the values and splices them in. Emoji indices of text messages are shifted
+    to account for the length of the values.
+
+    Usage:
+        .. code-block :: python
+
+            greeting = MessageTemplate(TextMessage("Hi {name}! <5ac1bfd5040ab15980c9b435:001>"))
+            await ctx.respond(greeting.render(name="Ann"))
+
+    Args:
+        message (Component | dict): The message. Placeholders may appear in any
+            string field. Values are inserted as is: emoji syntax in them is not
+            expanded.
+        codec (str | Codec): JSON codec.
+    """
+
+    placeholders: Tuple[str, ...]
+
+    def __init__(
+        self,
+        message: Union[Component, dict],
+        *,
+        codec: Union[CodecName, Codec] = "auto",
+    ):
+        self.codec = get_codec(codec)
+        self._holes: List[Tuple[str, Any]] = []
+
+        data = message if isinstance(message, dict) else message.tojson()
+        encoded = self.codec.dumps(self._mark(data))
+
+        # The encoded message is split at the holes: ``_head``, then for each
+        # hole its value and the fragment up to the next one.
+        self._plan: List[Tuple[str, Any, bytes]] = []
+        holes = list(_HOLES.finditer(encoded))
+        ends = [hole.start() for hole in holes[1:]] + [len(encoded)]
+        self._head = encoded[: holes[0].start()] if holes else encoded
+
+        for hole, end in zip(holes, ends):
+            kind, payload = self._holes[int(hole.group(1) or hole.group(2))]
+            self._plan.append((kind, payload, encoded[hole.end() : end]))
+        self.placeholders = tuple(
+            dict.fromkeys(name for kind, name in self._holes if kind == "str")
+        )
+
+    def _hole(self, kind: str, payload: Any) -> int:
+        self._holes.append((kind, payload))
+        return len(self._holes) - 1
+
+    def _mark_string(self, s: str) -> str:
+        return PLACEHOLDER.sub(
+            lambda m: _STRING_HOLE % self._hole("str", m.group(1)), s
+        )
+
+    def _mark(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self._mark_string(value)
+
+        if isinstance(value, list):
+            return [self._mark(item) for item in value]
+
+        if not isinstance(value, dict):
+            return value
+
+        marked = {k: self._mark(v) for k, v in value.items() if k != "emojis"}
+
+        if "emojis" in value:
+            text: str = value.get("text", "")
+            marked["emojis"] = [
+                {**emoji, "index": self._mark_index(text, emoji["index"])}
+                for emoji in value["emojis"]
+            ]
+
+        return marked
+
+    def _mark_index(self, text: str, index: int) -> Union[int, str]:
+        before = tuple(m.group(1) for m in PLACEHOLDER.finditer(text[:index]))
+
+        if not before:
+            return index
+
+        return _INT_HOLE % self._hole("index", (index, before))
+
+    def render(self, **values: Any) -> bytes:
+        """Fill in the placeholders.
+
+        Args:
+            **values: Value of each placeholder. Non-strings are ``str()``-ed.
+
+        Returns:
+            bytes: The encoded message, ready to pass to ``respond()`` or any
+                send method.
+        """
+        text = {name: str(value) for name, value in values.items()}
+        missing = set(self.placeholders).difference(text)
+
+        if missing:
+            raise RuntimeError("Missing template values: %s" % ", ".join(missing))
+
+        dumps = self.codec.dumps
+        out = [self._head]
+        append = out.append
+
+        for kind, payload, fragment in self._plan:
+            if kind == "str":
+                # The encoded string without its quotes
+                append(dumps(text[payload])[1:-1])
+            else:
+                index, before = payload
+                append(
+                    b"%d"
+                    % (index + sum(len(text[name]) - len(name) - 2 for name in before))
+                )
+
+            append(fragment)
+
+        return b"".join(out)
+
+    def __repr__(self):
+        return "MessageTemplate(%r)" % (
+            b"{...}".join([self._head] + [fragment for _, _, fragment in self._plan]),
+        )
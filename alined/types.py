@@ -8,6 +8,9 @@ from .dataclass import (
     LeaveEvent,
     MemberJoinedEvent,
     MemberLeftEvent,
+    PostbackEvent,
+    BeaconEvent,
+    VideoPlayCompleteEvent,
 )
 from .components import (
     TextMessage,
@@ -40,6 +43,9 @@ Events = Literal[
     "leave",
     "member_joined",
     "member_left",
+    "postback",
+    "beacon",
+    "video_play_complete",
 ]
 EventDataclasses = Union[
     MessageEvent,
@@ -50,6 +56,9 @@ EventDataclasses = Union[
     LeaveEvent,
     MemberJoinedEvent,
     MemberLeftEvent,
+    PostbackEvent,
+    BeaconEvent,
+    VideoPlayCompleteEvent,
 ]
 AnyAsyncFunction = Callable[..., Awaitable[Any]]
 AnyMessage = Union[
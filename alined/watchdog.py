@@ -0,0 +1,246 @@
+import asyncio
+from collections import deque
+import itertools
+import logging
+import time
+from types import FrameType
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+import traceback
+
+logger = logging.getLogger("alined")
+
+
+class HandlerTimeoutError(asyncio.TimeoutError):
+    """A handler ran past its deadline and was cancelled."""
+
+
+class HandlerStats:
+    """Counters of one handler."""
+
+    __slots__ = ("calls", "failures", "timeouts", "slow")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.slow = 0
+
+    def todict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "HandlerStats(%s)" % ", ".join(
+            "%s=%d" % item for item in self.todict().items()
+        )
+
+
+class SlowHandler(NamedTuple):
+    """A handler that ran past the soft threshold.
+
+    Args:
+        handler (str): Handler name.
+        event (str): Event it was handling.
+        elapsed (float): Seconds it had been running when caught.
+        stack (str): Where it was stuck, innermost call last. Empty if it had
+            already returned.
+    """
+
+    handler: str
+    event: str
+    elapsed: float
+    stack: str
+
+
+def coroutine_stack(coro: Any) -> List[FrameType]:
+    """Frames of a suspended coroutine and everything it awaits, outermost first."""
+    frames = []
+
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            frames.append(frame)
+
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+    return frames
+
+
+def format_stack(frames: List[FrameType]) -> str:
+    return "".join(
+        traceback.format_list(
+            [
+                traceback.FrameSummary(
+                    frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name
+                )
+                for frame in frames
+            ]
+        )
+    )
+
+
+class Watchdog:
+    """Watches running handlers and records the ones that run too long.
+
+    While started, it checks every ``interval`` seconds for handlers running
+    longer than ``threshold`` and records each once, with the stack of where it
+    is stuck. It also keeps call, failure, timeout and slow counters per
+    handler.
+
+    Args:
+        threshold (float): Seconds after which a handler counts as slow.
+        interval (float): Seconds between checks.
+        max_records (int): How many :obj:`SlowHandler` records are kept.
+        on_slow ((SlowHandler) -> Any, optional): Called for every slow handler.
+    """
+
+    stats: Dict[str, HandlerStats]
+    slow: Deque[SlowHandler]
+
+    def __init__(
+        self,
+        threshold: float = 10.0,
+        *,
+        interval: float = 1.0,
+        max_records: int = 100,
+        on_slow: Optional[Callable[[SlowHandler], Any]] = None,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.on_slow = on_slow
+
+        self.stats = {}
+        self.slow = deque(maxlen=max_records)
+        # token -> (handler, event, coroutine, started, reported)
+        self.running: Dict[int, List[Any]] = {}
+        self._tokens = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start checking in the background."""
+        self._task = asyncio.create_task(self._watch_forever())
+
+    async def stop(self):
+        """Stop checking."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def enter(self, handler: str, event: str, coro: Any) -> int:
+        """Record that a handler started.
+
+        Args:
+            handler (str): Handler name.
+            event (str): Event name.
+            coro (Coroutine): The handler's coroutine, to read its stack from.
+
+        Returns:
+            int: Token to pass to :meth:`exit`.
+        """
+        token = next(self._tokens)
+        self.running[token] = [handler, event, coro, time.monotonic(), False]
+
+        if handler not in self.stats:
+            self.stats[handler] = HandlerStats()
+        self.stats[handler].calls += 1
+
+        return token
+
+    def exit(self, token: int, *, failed: bool = False, timed_out: bool = False):
+        """Record that a handler finished.
+
+        Args:
+            token (int): Token from :meth:`enter`.
+            failed (bool): It raised.
+            timed_out (bool): It ran past its deadline.
+        """
+        handler, event, _, started, reported = self.running.pop(token)
+        stats = self.stats[handler]
+        stats.failures += failed
+        stats.timeouts += timed_out
+
+        # Caught between checks (or without the background task)
+        elapsed = time.monotonic() - started
+        if not reported and elapsed > self.threshold:
+            self._report(SlowHandler(handler, event, elapsed, ""))
+
+    def check(self):
+        """Record handlers that are running past the threshold now."""
+        now = time.monotonic()
+
+        for entry in list(self.running.values()):
+            handler, event, coro, started, reported = entry
+
+            if reported or now - started <= self.threshold:
+                continue
+
+            entry[4] = True
+            self._report(
+                SlowHandler(
+                    handler, event, now - started, format_stack(coroutine_stack(coro))
+                )
+            )
+
+    def _report(self, record: SlowHandler):
+        self.stats[record.handler].slow += 1
+        self.slow.append(record)
+
+        logger.warning(
+            "Handler %s (%s) has been running for %.1fs%s",
+            record.handler,
+            record.event,
+            record.elapsed,
+            ", stuck at:\n" + record.stack if record.stack else "",
+        )
+
+        if self.on_slow:
+            self.on_slow(record)
+
+    async def _watch_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Handler watchdog failed")
+
+
+def handler_name(fn: Any) -> str:
+    """Name of a handler, as used in counters and metrics."""
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+async def run_with_timeout(
+    coro: Any, timeout: Optional[float], *, name: Tuple[str, str]
+) -> Any:
+    """Await a handler coroutine, cancelling it after ``timeout`` seconds.
+
+    Args:
+        coro (Coroutine): The handler coroutine.
+        timeout (float, optional): Deadline in seconds; ``None`` waits forever.
+        name (tuple[str, str]): ``(handler, event)``, for the error message.
+
+    Raises:
+        HandlerTimeoutError: The deadline passed.
+    """
+    if timeout is None:
+        return await coro
+
+    task = asyncio.ensure_future(coro)
+
+    try:
+        done, _ = await asyncio.wait((task,), timeout=timeout)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+    if not done:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        raise HandlerTimeoutError(
+            "Handler %s (%s) timed out after %.1fs" % (name[0], name[1], timeout)
+        )
+
+    return task.result()
@@ -3,9 +3,34 @@ import hmac
 import hashlib
 
 
+class SignatureVerifier:
+    """Verifies webhook signatures of one channel.
+
+    The HMAC key is processed once, up front; each verification only copies
+    that state and hashes the body.
+
+    Args:
+        channel_secret (str): Channel secret.
+    """
+
+    __slots__ = ("_hmac",)
+
+    def __init__(self, channel_secret: str):
+        self._hmac = hmac.new(channel_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def verify(self, body: bytes, signature: str) -> bool:
+        """Check the ``x-line-signature`` of a webhook body."""
+        hsh = self._hmac.copy()
+        hsh.update(body)
+
+        return hmac.compare_digest(
+            base64.b64encode(hsh.digest()), signature.encode("utf-8")
+        )
+
+
 def verify_signature(channel_secret: str, body: bytes, signature: str) -> bool:
-    # Create a new hash
-    hsh = hmac.new(channel_secret.encode("utf-8"), body, hashlib.sha256).digest()
+    """Check the ``x-line-signature`` of a webhook body.
 
-    # Verify the hash
-    return signature.encode("utf-8") == base64.b64encode(hsh)
+    To check many, keep a :obj:`SignatureVerifier` instead.
+    """
+    return SignatureVerifier(channel_secret).verify(body, signature)
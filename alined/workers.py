@@ -0,0 +1,256 @@
+import asyncio
+from collections import Counter
+import itertools
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+logger = logging.getLogger("alined")
+
+
+def source_key(e: Any) -> Optional[str]:
+    """Key of the chat an event comes from: the group, room or user ID.
+
+    Events sharing a key must be handled in order; events with different keys
+    are independent.
+
+    Args:
+        e (EventDataclasses): The event.
+    """
+    source = e.source
+    return (
+        getattr(source, "group_id", None)
+        or getattr(source, "room_id", None)
+        or getattr(source, "user_id", None)
+    )
+
+
+def group_by_source(events: Iterable[Any]) -> List[List[Any]]:
+    """Split events into per-source sequences, keeping their order."""
+    groups: Dict[Optional[str], List[Any]] = {}
+
+    for evnt in events:
+        key = source_key(evnt)
+        if key not in groups:
+            groups[key] = [evnt]
+        else:
+            groups[key].append(evnt)
+
+    return list(groups.values())
+
+
+async def gather_all(aws: Iterable[Awaitable[Any]]):
+    """Run awaitables concurrently and wait for all of them.
+
+    Unlike a bare ``asyncio.gather``, a failure doesn't leave the others running
+    unattended: everything finishes first, then the first error is raised.
+    """
+    results = await asyncio.gather(*aws, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+class EventQueue:
+    """Bounded in-process work queue drained by a pool of worker tasks.
+
+    Used to acknowledge webhooks right away and run the handlers afterwards.
+
+    Each worker drains its own shard of the queue. Items put with the same
+    ``key`` always land on the same shard, so they are processed one after
+    another in the order they were put, while different keys run concurrently.
+
+    Args:
+        process ((Any) -> Awaitable[Any]): Called by a worker for every item.
+        maxsize (int): Max items waiting in the queue, split evenly among shards.
+        workers (int): Number of worker tasks (and shards).
+        put_timeout (float, optional): How long :meth:`put` waits for room when the
+            queue is full before raising ``asyncio.QueueFull``. ``None`` waits
+            forever.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], Awaitable[Any]],
+        *,
+        maxsize: int = 1000,
+        workers: int = 8,
+        put_timeout: Optional[float] = 5.0,
+    ):
+        self.process = process
+        self.maxsize = maxsize
+        self.workers = workers
+        self.put_timeout = put_timeout
+
+        self.shards: List[asyncio.Queue[Tuple[float, Any]]] = [
+            asyncio.Queue(max(1, maxsize // workers)) for _ in range(workers)
+        ]
+        self.tasks: List[asyncio.Task] = []
+        self._round_robin = itertools.cycle(range(workers))
+        # Waiting in :meth:`put_many`, woken whenever a worker takes an item
+        self._room_waiters: List[asyncio.Future] = []
+
+        self.enqueued = 0
+        self.dequeued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+
+    async def start(self):
+        """Start the worker tasks."""
+        self.tasks = [
+            asyncio.create_task(self._work(shard), name="alined-worker-%i" % i)
+            for i, shard in enumerate(self.shards)
+        ]
+
+    async def stop(self, *, timeout: Optional[float] = 10.0):
+        """Wait for queued items to finish, then stop the workers.
+
+        Args:
+            timeout (float, optional): Max seconds to wait for the queue to drain.
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.join() for shard in self.shards)), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Stopping with %i queued events unprocessed", self.depth)
+
+        for task in self.tasks:
+            task.cancel()
+
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def put(self, item: Any, key: Optional[Hashable] = None):
+        """Enqueue an item, waiting for room if its shard is full.
+
+        Args:
+            item (Any): The item.
+            key (Hashable, optional): Ordering key. Items with the same key are
+                processed in order. Without one, shards are picked round-robin.
+
+        Raises:
+            asyncio.QueueFull: The shard stayed full for ``put_timeout`` seconds.
+        """
+        shard = self.shards[self._shard_index(key)]
+
+        try:
+            await asyncio.wait_for(
+                shard.put((time.monotonic(), item)), self.put_timeout
+            )
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise asyncio.QueueFull from None
+
+        self.enqueued += 1
+
+    async def put_many(self, items: Sequence[Tuple[Any, Optional[Hashable]]]):
+        """Enqueue items all at once: either every one is queued, or none is.
+
+        Waits until every shard the items land on has room for all of them, so
+        a batch is never left half queued when the queue is full.
+
+        Args:
+            items (Sequence[tuple[Any, Hashable | None]]): ``(item, key)`` pairs.
+                See :meth:`put`.
+
+        Raises:
+            asyncio.QueueFull: There wasn't room within ``put_timeout`` seconds,
+                or the items for one shard outnumber its size.
+        """
+        placed = [(self._shard_index(key), item) for item, key in items]
+        needed = Counter(index for index, _ in placed)
+
+        try:
+            if any(n > self.shards[i].maxsize for i, n in needed.items()):
+                # Would never fit
+                raise asyncio.TimeoutError
+
+            await asyncio.wait_for(
+                self._put_when_room(placed, needed), self.put_timeout
+            )
+        except asyncio.TimeoutError:
+            self.rejected += len(placed)
+            raise asyncio.QueueFull from None
+
+    async def _put_when_room(
+        self, placed: List[Tuple[int, Any]], needed: Dict[int, int]
+    ):
+        shards = self.shards
+
+        # No await between the check and the puts, so batches woken together
+        # can't both take the same room
+        while any(shards[i].maxsize - shards[i].qsize() < n for i, n in needed.items()):
+            waiter = asyncio.get_running_loop().create_future()
+            self._room_waiters.append(waiter)
+            await waiter
+
+        now = time.monotonic()
+        for index, item in placed:
+            shards[index].put_nowait((now, item))
+
+        self.enqueued += len(placed)
+
+    def _shard_index(self, key: Optional[Hashable]) -> int:
+        return next(self._round_robin) if key is None else hash(key) % self.workers
+
+    async def _work(self, shard: "asyncio.Queue[Tuple[float, Any]]"):
+        while True:
+            enqueued_at, item = await shard.get()
+
+            if self._room_waiters:
+                waiters, self._room_waiters = self._room_waiters, []
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+            lag = time.monotonic() - enqueued_at
+            self.dequeued += 1
+            self.lag_last = lag
+            self.lag_max = max(self.lag_max, lag)
+            self.lag_total += lag
+
+            try:
+                await self.process(item)
+            except Exception:
+                self.failed += 1
+                logger.exception("Unhandled error while processing queued event")
+            finally:
+                self.processed += 1
+                shard.task_done()
+
+    @property
+    def depth(self) -> int:
+        """Number of items waiting in the queue."""
+        return sum(shard.qsize() for shard in self.shards)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and queueing lag (seconds)."""
+        return {
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "workers": len(self.tasks),
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "lag_last": self.lag_last,
+            "lag_max": self.lag_max,
+            "lag_avg": self.lag_total / self.dequeued if self.dequeued else 0.0,
+        }
@@ -0,0 +1,323 @@
+"""Synthetic, signed LINE webhooks for the benchmarks.
+
+Every event type modelled in ``alined.dataclass`` can be generated. Payloads are
+shaped like the ones the LINE Platform sends, so they go through the same
+parsing and routing paths as real traffic.
+"""
+
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import random
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+EMOJI_PRODUCT = "5ac1bfd5040ab15980c9b435"
+
+Factory = Callable[[random.Random, int], dict]
+
+
+def _source(rng: random.Random, *, users: int = 1000, member: bool = True) -> dict:
+    user_id = "U%032x" % rng.randrange(users)
+    kind = rng.random()
+
+    if kind < 0.8:
+        return {"type": "user", "userId": user_id}
+
+    if kind < 0.95:
+        source = {"type": "group", "groupId": "C%032x" % rng.randrange(users // 10 + 1)}
+    else:
+        source = {"type": "room", "roomId": "R%032x" % rng.randrange(users // 10 + 1)}
+
+    if member:
+        source["userId"] = user_id
+
+    return source
+
+
+def _base(rng: random.Random, n: int, type: str, **fields) -> dict:
+    return {
+        "type": type,
+        "mode": "active",
+        "timestamp": 1700000000000 + n,
+        "source": _source(rng, member=type == "message"),
+        "webhookEventId": "01HBENCH%018d" % n,
+        "deliveryContext": {"isRedelivery": False},
+        **fields,
+    }
+
+
+def _message(rng: random.Random, n: int, message: dict) -> dict:
+    return _base(
+        rng,
+        n,
+        "message",
+        replyToken="%032x" % n,
+        message={"id": str(n), **message},
+    )
+
+
+def _provider(rng: random.Random) -> dict:
+    if rng.random() < 0.9:
+        return {"type": "line"}
+
+    return {
+        "type": "external",
+        "originalContentUrl": "https://example.com/original.jpg",
+        "previewImageUrl": "https://example.com/preview.jpg",
+    }
+
+
+def text(rng: random.Random, n: int) -> dict:
+    words = " ".join(
+        rng.choice(("hello", "bot", "order", "status", "help")) for _ in range(8)
+    )
+    message = {"type": "text", "text": "$ " + words, "quoteToken": "q%d" % n}
+
+    if rng.random() < 0.3:
+        message["emojis"] = [
+            {"index": 0, "length": 1, "productId": EMOJI_PRODUCT, "emojiId": "001"}
+        ]
+
+    return _message(rng, n, message)
+
+
+def image(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "image",
+        "quoteToken": "q%d" % n,
+        "contentProvider": _provider(rng),
+    }
+    return _message(rng, n, message)
+
+
+def video(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "video",
+        "quoteToken": "q%d" % n,
+        "duration": rng.randrange(1000, 60000),
+        "contentProvider": _provider(rng),
+    }
+    return _message(rng, n, message)
+
+
+def audio(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "audio",
+        "duration": rng.randrange(1000, 60000),
+        "contentProvider": {"type": "line"},
+    }
+    return _message(rng, n, message)
+
+
+def file(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "file",
+        "fileName": "report.pdf",
+        "fileSize": rng.randrange(1 << 20),
+    }
+    return _message(rng, n, message)
+
+
+def location(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "location",
+        "title": "Office",
+        "address": "1-1 Somewhere, Tokyo",
+        "latitude": 35.0 + rng.random(),
+        "longitude": 139.0 + rng.random(),
+    }
+    return _message(rng, n, message)
+
+
+def sticker(rng: random.Random, n: int) -> dict:
+    message = {
+        "type": "sticker",
+        "quoteToken": "q%d" % n,
+        "packageId": "446",
+        "stickerId": str(1988 + rng.randrange(10)),
+        "stickerResourceType": "STATIC",
+        "keywords": ["hello", "hi"],
+    }
+    return _message(rng, n, message)
+
+
+def unsend(rng: random.Random, n: int) -> dict:
+    return _base(rng, n, "unsend", unsend={"messageId": str(n - 1)})
+
+
+def follow(rng: random.Random, n: int) -> dict:
+    return _base(
+        rng,
+        n,
+        "follow",
+        replyToken="%032x" % n,
+        follow={"isUnblocked": rng.random() < 0.5},
+    )
+
+
+def unfollow(rng: random.Random, n: int) -> dict:
+    return _base(rng, n, "unfollow")
+
+
+def _group(rng: random.Random, n: int, type: str, **fields) -> dict:
+    event = _base(rng, n, type, **fields)
+    event["source"] = {"type": "group", "groupId": "C%032x" % rng.randrange(100)}
+    return event
+
+
+def join(rng: random.Random, n: int) -> dict:
+    return _group(rng, n, "join", replyToken="%032x" % n)
+
+
+def leave(rng: random.Random, n: int) -> dict:
+    return _group(rng, n, "leave")
+
+
+def member_joined(rng: random.Random, n: int) -> dict:
+    members = [{"type": "user", "userId": "U%032x" % rng.randrange(1000)}]
+    return _group(
+        rng, n, "memberJoined", replyToken="%032x" % n, joined={"members": members}
+    )
+
+
+def member_left(rng: random.Random, n: int) -> dict:
+    members = [{"type": "user", "userId": "U%032x" % rng.randrange(1000)}]
+    return _group(rng, n, "memberLeft", left={"members": members})
+
+
+def postback(rng: random.Random, n: int) -> dict:
+    return _base(
+        rng,
+        n,
+        "postback",
+        replyToken="%032x" % n,
+        postback={"data": "action=buy&itemid=%d" % rng.randrange(100)},
+    )
+
+
+def beacon(rng: random.Random, n: int) -> dict:
+    return _base(
+        rng,
+        n,
+        "beacon",
+        replyToken="%032x" % n,
+        beacon={"hwid": "d41d8cd98f", "type": "enter"},
+    )
+
+
+def video_play_complete(rng: random.Random, n: int) -> dict:
+    return _base(
+        rng,
+        n,
+        "videoPlayComplete",
+        replyToken="%032x" % n,
+        videoPlayComplete={"trackingId": "track-%d" % rng.randrange(10)},
+    )
+
+
+EVENTS: Dict[str, Factory] = {
+    "text": text,
+    "image": image,
+    "video": video,
+    "audio": audio,
+    "file": file,
+    "location": location,
+    "sticker": sticker,
+    "unsend": unsend,
+    "follow": follow,
+    "unfollow": unfollow,
+    "join": join,
+    "leave": leave,
+    "member_joined": member_joined,
+    "member_left": member_left,
+    "postback": postback,
+    "beacon": beacon,
+    "video_play_complete": video_play_complete,
+}
+
+# Roughly what a busy chat bot receives.
+DEFAULT_MIX: Dict[str, float] = {
+    "text": 70,
+    "image": 8,
+    "sticker": 8,
+    "video": 1,
+    "audio": 1,
+    "file": 1,
+    "location": 1,
+    "unsend": 1,
+    "follow": 3,
+    "unfollow": 1,
+    "join": 0.5,
+    "leave": 0.5,
+    "member_joined": 1,
+    "member_left": 0.5,
+    "postback": 2,
+    "beacon": 0.25,
+    "video_play_complete": 0.25,
+}
+
+
+def parse_mix(spec: Optional[str]) -> Dict[str, float]:
+    """Parse ``"text=5,image=1"`` into weights. ``None`` is :obj:`DEFAULT_MIX`,
+    ``"all"`` weighs every event type equally."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+
+    if spec == "all":
+        return {name: 1.0 for name in EVENTS}
+
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name not in EVENTS:
+            raise ValueError(
+                "Unknown event type %r, expected one of: %s" % (name, ", ".join(EVENTS))
+            )
+        mix[name] = float(weight or 1)
+
+    return mix
+
+
+class WebhookFactory:
+    """Generates signed webhook bodies.
+
+    Args:
+        secret (str): Channel secret to sign with.
+        mix (Mapping[str, float], optional): Weight of each event type.
+        seed (int): Random seed, for repeatable runs.
+    """
+
+    def __init__(
+        self, secret: str, mix: Optional[Mapping[str, float]] = None, *, seed: int = 0
+    ):
+        self.secret = secret.encode("utf-8")
+        self.rng = random.Random(seed)
+        self.mix = dict(mix or DEFAULT_MIX)
+        self._names = list(self.mix)
+        self._weights = [self.mix[name] for name in self._names]
+        self._ids: Iterator[int] = itertools.count(1)
+
+    def events(self, size: int) -> List[dict]:
+        names = self.rng.choices(self._names, self._weights, k=size)
+        return [EVENTS[name](self.rng, next(self._ids)) for name in names]
+
+    def body(self, size: int, *, destination: str = "U" + "0" * 32) -> bytes:
+        return json.dumps(
+            {"destination": destination, "events": self.events(size)},
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+    def sign(self, body: bytes) -> str:
+        return base64.b64encode(
+            hmac.new(self.secret, body, hashlib.sha256).digest()
+        ).decode()
+
+    def request(self, size: int) -> "tuple[bytes, Dict[str, str]]":
+        """A webhook body and its headers."""
+        body = self.body(size)
+        return body, {
+            "content-type": "application/json",
+            "x-line-signature": self.sign(body),
+        }
@@ -0,0 +1,341 @@
+"""End-to-end load test of a ``Client``.
+
+Signed synthetic webhooks are fired at ``client.app`` in process (through
+``httpx.ASGITransport``), and the SDK's outbound API calls go to a mock of the
+LINE Platform that simulates latency, ``429`` and ``5xx``. Nothing touches the
+network.
+
+Usage::
+
+    python -m benchmarks.loadtest --batches 2000 --batch-size 5 --concurrency 32
+    python -m benchmarks.loadtest --parsing lazy --ack-first --error-rate 0.01
+    python -m benchmarks.loadtest --mix text=5,image=1,follow=1 --json
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from alined.core import Client
+from alined.rate_limiting import RATE_LIMITS
+
+from .events import EVENTS, WebhookFactory, parse_mix
+
+SECRET = "benchmark-secret"
+TOKEN = "benchmark-token"
+
+
+class MockLinePlatform(httpx.AsyncBaseTransport):
+    """Stands in for ``api.line.me`` and ``api-data.line.me``.
+
+    Args:
+        latency (float): Mean response time in seconds (exponentially distributed).
+        rate_limit_rate (float): Share of requests answered with ``429``.
+        error_rate (float): Share of requests answered with a ``5xx``.
+        retry_after (float, optional): ``Retry-After`` sent with ``429``s.
+        seed (int): Random seed.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.02,
+        rate_limit_rate: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: Optional[float] = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/content"):
+            path = "/v2/bot/message/{messageId}/content"
+
+        if self.latency:
+            await asyncio.sleep(self.rng.expovariate(1 / self.latency))
+
+        roll = self.rng.random()
+
+        if roll < self.rate_limit_rate:
+            status = 429
+            headers = (
+                {"Retry-After": repr(self.retry_after)}
+                if self.retry_after is not None
+                else {}
+            )
+            response = httpx.Response(
+                status, json={"message": "Too Many Requests"}, headers=headers
+            )
+
+        elif roll < self.rate_limit_rate + self.error_rate:
+            status = self.rng.choice((500, 502, 503))
+            response = httpx.Response(status, json={"message": "Internal Server Error"})
+
+        elif path.endswith("/content"):
+            status = 200
+            response = httpx.Response(status, content=os.urandom(16 * 1024))
+
+        else:
+            status = 200
+            response = httpx.Response(
+                status,
+                json={"sentMessages": [{"id": "1", "quoteToken": "q"}]}
+                if path.endswith(("/reply", "/push"))
+                else {},
+            )
+
+        self.requests[(request.method, path, status)] += 1
+        return response
+
+
+def make_client(args: argparse.Namespace, platform: MockLinePlatform) -> Client:
+    client = Client(
+        channel_secret=SECRET,
+        channel_access_token=TOKEN,
+        parsing=args.parsing,
+        codec=args.codec,
+        ack_first=args.ack_first,
+        queue_size=args.queue_size,
+        queue_workers=args.queue_workers,
+        metrics=True,
+        http_transport=platform,
+        rate_limits=None
+        if args.rate_limits
+        else {name: (10**9, 1) for name in RATE_LIMITS},
+    )
+
+    async def reply(ctx):
+        if args.reply:
+            await ctx.respond("echo", "twice")
+
+    async def ignore(ctx, *_):
+        pass
+
+    for name in (
+        "text",
+        "image",
+        "video",
+        "audio",
+        "file",
+        "location",
+        "sticker",
+        "postback",
+    ):
+        client.on(name)(reply if name != "postback" else ignore)  # type: ignore
+
+    for name in (
+        "unsend",
+        "follow",
+        "unfollow",
+        "join",
+        "leave",
+        "member_joined",
+        "member_left",
+        "beacon",
+        "video_play_complete",
+    ):
+        client.on(name)(ignore)  # type: ignore
+
+    return client
+
+
+def count_errors(client: Client) -> Counter:
+    """Count the events whose handling failed, by error class."""
+    errors: Counter = Counter()
+    handle_event = client.handle_event
+
+    async def counting(e, channel=None):
+        try:
+            await handle_event(e, channel)
+        except Exception as err:
+            errors[type(err).__name__] += 1
+            raise
+
+    client.handle_event = counting  # type: ignore
+    return errors
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return 0.0
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    platform = MockLinePlatform(
+        latency=args.latency / 1000,
+        rate_limit_rate=args.rate_limit_rate,
+        error_rate=args.error_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    client = make_client(args, platform)
+    errors = count_errors(client)
+    factory = WebhookFactory(SECRET, parse_mix(args.mix), seed=args.seed)
+
+    # Generate (and sign) up front so the load generator isn't measured
+    requests = [factory.request(args.batch_size) for _ in range(args.batches)]
+    pending = iter(requests)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    # Failed handlers are counted as 500s rather than raised here
+    transport = httpx.ASGITransport(app=client.app, raise_app_exceptions=False)
+
+    async def worker(http: httpx.AsyncClient):
+        for body, headers in pending:
+            started = time.perf_counter()
+            r = await http.post("/", content=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            statuses[r.status_code] += 1
+
+    # ASGITransport doesn't run the lifespan, so enter it here
+    async with client.lifespan(client.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as http:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(http) for _ in range(args.concurrency)))
+            acked = time.perf_counter() - started
+
+        # With ``ack_first``, wait for the queue to drain as well
+        if client.queue:
+            await asyncio.gather(*(shard.join() for shard in client.queue.shards))
+
+        elapsed = time.perf_counter() - started
+
+    events = args.batches * args.batch_size
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "verbose")},
+        "webhooks": args.batches,
+        "events": events,
+        "seconds": round(elapsed, 3),
+        "webhooks_per_second": round(args.batches / elapsed, 1),
+        "events_per_second": round(events / elapsed, 1),
+        "ack_seconds": round(acked, 3),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p90": round(percentile(latencies, 90) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0) * 1000, 2),
+        },
+        "webhook_statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "outbound": {
+            "%s %s %d" % key: count for key, count in sorted(platform.requests.items())
+        },
+        "outbound_total": sum(platform.requests.values()),
+        "queue_failed": client.queue.failed if client.queue else None,
+        "handler_errors": dict(errors.most_common()),
+    }
+
+
+def report(result: Dict[str, Any]):
+    latency = result["latency_ms"]
+
+    print("webhooks:    %d (%d events)" % (result["webhooks"], result["events"]))
+    print(
+        "elapsed:     %.3fs (acked in %.3fs)"
+        % (result["seconds"], result["ack_seconds"])
+    )
+    print(
+        "throughput:  %.1f webhooks/s, %.1f events/s"
+        % (result["webhooks_per_second"], result["events_per_second"])
+    )
+    print(
+        "latency:     p50 %.2fms  p90 %.2fms  p99 %.2fms  max %.2fms"
+        % (latency["p50"], latency["p90"], latency["p99"], latency["max"])
+    )
+    print("statuses:    %s" % result["webhook_statuses"])
+    if result["queue_failed"] is not None:
+        print("queue:       %d events failed" % result["queue_failed"])
+    if result["handler_errors"]:
+        print(
+            "errors:      %s"
+            % ", ".join("%s %d" % item for item in result["handler_errors"].items())
+        )
+    print("outbound:    %d requests" % result["outbound_total"])
+
+    for key, count in result["outbound"].items():
+        print("  %-52s %d" % (key, count))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batches", type=int, default=1000, help="Webhooks to send.")
+    parser.add_argument("--batch-size", type=int, default=5, help="Events per webhook.")
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Webhooks in flight."
+    )
+    parser.add_argument(
+        "--mix",
+        help="Event weights, e.g. text=5,image=1 (types: %s), or 'all'."
+        % ", ".join(EVENTS),
+    )
+    parser.add_argument(
+        "--parsing", choices=("eager", "lazy", "trusted"), default="eager"
+    )
+    parser.add_argument("--codec", default="auto")
+    parser.add_argument("--ack-first", action="store_true")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--queue-workers", type=int, default=8)
+    parser.add_argument(
+        "--no-reply", dest="reply", action="store_false", help="Handlers don't respond."
+    )
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="Apply LINE's rate limits to outbound calls (off: unlimited).",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=20.0, help="Mock API latency, ms."
+    )
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="Share of 429s."
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 5xx.")
+    parser.add_argument(
+        "--retry-after", type=float, help="Retry-After sent with 429s, s."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    parser.add_argument("--verbose", action="store_true", help="Show the SDK's logs.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    # Injected failures would otherwise log a traceback each
+    logging.getLogger("alined").setLevel(
+        logging.INFO if args.verbose else logging.CRITICAL
+    )
+    result = asyncio.run(run(args))
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,583 @@
+"""Micro-benchmarks of the SDK's hot paths.
+
+Every benchmark reports the time per operation (best of ``--repeat`` runs of at
+least ``--min-time`` seconds each) and, through ``tracemalloc``, the peak
+memory allocated while one operation runs and the memory it leaves behind.
+Import statements are timed in fresh interpreters, and checked not to load
+heavy dependencies they don't need (see :obj:`IMPORTS`).
+
+Results can be stored as a baseline and later checked against it. Baselines
+are specific to a machine and Python version, so regenerate them on the
+machine you compare on.
+
+Usage::
+
+    python -m benchmarks.microbench
+    python -m benchmarks.microbench --save            # write benchmarks/baseline.json
+    python -m benchmarks.microbench --check           # exit 1 on a regression
+    python -m benchmarks.microbench --check --threshold 0.1 -k verify
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .events import WebhookFactory, follow, text
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SECRET = "benchmark-secret"
+
+# Allocation changes below this many bytes are noise (interning, free lists).
+ALLOCATION_SLACK = 64
+
+# Import time changes below this many seconds are noise (disk cache, startup).
+IMPORT_SLACK = 0.005
+
+
+class Result(NamedTuple):
+    """Measurements of one benchmark.
+
+    Args:
+        seconds (float): Time per operation, best run.
+        median (float): Time per operation, median run.
+        peak_bytes (int): Peak memory allocated during one operation.
+        retained_bytes (float): Memory still held per operation afterwards.
+    """
+
+    seconds: float
+    median: float
+    peak_bytes: int
+    retained_bytes: float
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark.
+
+    The decorated function does the setup and returns the operation to time: a
+    function or a coroutine function without arguments.
+    """
+
+    def wrapper(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return wrapper
+
+
+@benchmark("verify_signature")
+def bench_verify_signature():
+    from alined.webhooks import verify_signature
+
+    factory = WebhookFactory(SECRET)
+    body, headers = factory.request(5)
+    signature = headers["x-line-signature"]
+
+    return lambda: verify_signature(SECRET, body, signature)
+
+
+@benchmark("SignatureVerifier.verify")
+def bench_signature_verifier():
+    from alined.webhooks import SignatureVerifier
+
+    factory = WebhookFactory(SECRET)
+    body, headers = factory.request(5)
+    verify = SignatureVerifier(SECRET).verify
+    signature = headers["x-line-signature"]
+
+    return lambda: verify(body, signature)
+
+
+@benchmark("redirect_dataclass[text]")
+def bench_redirect_dataclass_text():
+    from alined.dataclass_redirector import redirect_dataclass
+
+    event = text(random.Random(0), 1)
+    return lambda: redirect_dataclass(event)
+
+
+@benchmark("redirect_dataclass[follow]")
+def bench_redirect_dataclass_follow():
+    from alined.dataclass_redirector import redirect_dataclass
+
+    event = follow(random.Random(0), 1)
+    return lambda: redirect_dataclass(event)
+
+
+@benchmark("redirect_context")
+def bench_redirect_context():
+    from alined.context_redirector import redirect_context
+    from alined.dataclass_redirector import redirect_dataclass
+
+    event = redirect_dataclass(text(random.Random(0), 1))
+    return lambda: redirect_context(event)
+
+
+@benchmark("TextMessage")
+def bench_text_message():
+    from alined.components import TextMessage
+
+    return lambda: TextMessage("Hello, world! Your order has shipped.")
+
+
+@benchmark("TextMessage[emoji].to_messages")
+def bench_text_message_emoji():
+    from alined.components import TextMessage
+    from alined.messaging import to_messages
+
+    return lambda: to_messages(
+        [
+            TextMessage(
+                "Hi <5ac1bfd5040ab15980c9b435:001>, thanks! "
+                "<5ac1bfd5040ab15980c9b435:002>"
+            )
+        ]
+    )
+
+
+def _push(**options):
+    from alined.context_redirector import redirect_context
+    from alined.core import Client
+    from alined.dataclass_redirector import redirect_dataclass
+
+    client = Client(channel_secret=SECRET, channel_access_token="token", **options)
+
+    @client.on("text")
+    async def on_text(ctx):
+        pass
+
+    ctx = redirect_context(redirect_dataclass(text(random.Random(0), 1)))
+
+    async def op():
+        await client.push("text", ctx)
+
+    return op
+
+
+@benchmark("Client.push")
+def bench_client_push():
+    return _push()
+
+
+@benchmark("Client.push[bare]")
+def bench_client_push_bare():
+    return _push(slow_handler_threshold=None)
+
+
+@benchmark("Client.push[metrics,timeout]")
+def bench_client_push_instrumented():
+    return _push(metrics=True, handler_timeout=30.0)
+
+
+# Import statements, each timed in a fresh interpreter, and the heavy
+# dependencies they must not load.
+IMPORTS: Dict[str, Tuple[str, ...]] = {
+    "import alined": ("fastapi", "httpx", "pydantic"),
+    "from alined import TextMessage": ("fastapi", "httpx", "pydantic"),
+    "from alined.messaging import push": ("fastapi", "pydantic"),
+    "from alined import Client": ("fastapi", "starlette", "uvicorn"),
+}
+
+_IMPORT_PROBE = """
+import json, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+exec(%r)
+elapsed = time.perf_counter() - started
+new = set(sys.modules) - before
+print(json.dumps({
+    "seconds": elapsed,
+    "modules": len(new),
+    "forbidden": sorted(name for name in %r if name in new),
+}))
+"""
+
+
+class ImportResult(NamedTuple):
+    """Cost of an import statement.
+
+    Args:
+        seconds (float): Import time, best run.
+        modules (int): Modules it loaded.
+        forbidden (List[str]): Heavy dependencies it loaded but must not.
+    """
+
+    seconds: float
+    modules: int
+    forbidden: List[str]
+
+
+def measure_import(
+    statement: str, forbidden: Tuple[str, ...] = (), *, repeat: int = 5
+) -> ImportResult:
+    """Time an import statement in fresh interpreters.
+
+    Args:
+        statement (str): The import statement.
+        forbidden (tuple[str, ...]): Modules it must not load.
+        repeat (int): Interpreters to run; the fastest one counts.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    runs = []
+
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE % (statement, forbidden)],
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        runs.append(json.loads(out.stdout))
+
+    best = min(runs, key=lambda run: run["seconds"])
+    return ImportResult(best["seconds"], best["modules"], best["forbidden"])
+
+
+def _timed(op: Callable[[], Any], number: int) -> float:
+    if asyncio.iscoroutinefunction(op):
+
+        async def batch():
+            started = time.perf_counter()
+            for _ in range(number):
+                await op()
+            return time.perf_counter() - started
+
+        return asyncio.run(batch())
+
+    started = time.perf_counter()
+    for _ in range(number):
+        op()
+    return time.perf_counter() - started
+
+
+def _allocations(op: Callable[[], Any], samples: int) -> "tuple[int, float]":
+    """Median peak bytes of one call, and bytes retained per call."""
+    if asyncio.iscoroutinefunction(op):
+        return asyncio.run(_allocations_async(op, samples))
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        # Nothing but the calls may allocate between the two readings
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(samples):
+            op()
+        retained = (tracemalloc.get_traced_memory()[0] - before) / samples
+
+        peaks = []
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            op()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    return int(statistics.median(peaks)), max(retained, 0.0)
+
+
+async def _allocations_async(
+    op: Callable[[], Any], samples: int
+) -> "tuple[int, float]":
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(samples):
+            await op()
+        retained = (tracemalloc.get_traced_memory()[0] - before) / samples
+
+        peaks = []
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            await op()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+
+    return int(statistics.median(peaks)), max(retained, 0.0)
+
+
+def measure(
+    op: Callable[[], Any],
+    *,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    samples: int = 200,
+) -> Result:
+    """Time an operation and measure its allocations.
+
+    Args:
+        op (() -> Any): The operation, a function or a coroutine function.
+        repeat (int): Timed runs; the best one counts.
+        min_time (float): Minimum seconds per run.
+        samples (int): Calls traced for the allocation numbers.
+    """
+    # Warm up, and find how many calls fill ``min_time``
+    number = 1
+    while True:
+        elapsed = _timed(op, number)
+        if elapsed >= min_time / 10:
+            break
+        number *= 10
+
+    number = max(1, int(number * min_time / elapsed))
+    times = [_timed(op, number) / number for _ in range(repeat)]
+    peak, retained = _allocations(op, samples)
+
+    return Result(min(times), statistics.median(times), peak, retained)
+
+
+def compare(
+    results: Dict[str, Result],
+    baseline: Dict[str, Any],
+    threshold: float,
+    imports: Optional[Dict[str, ImportResult]] = None,
+    import_threshold: float = 0.5,
+) -> List[str]:
+    """Names of the benchmarks that regressed past ``threshold`` (a ratio), and of
+    the imports that slowed past ``import_threshold`` or load what they shouldn't."""
+    regressions = []
+
+    for statement, result in (imports or {}).items():
+        if result.forbidden:
+            regressions.append(
+                "%s: loads %s" % (statement, ", ".join(result.forbidden))
+            )
+
+        base = baseline.get("imports", {}).get(statement)
+        if base and result.seconds > (
+            base["seconds"] * (1 + import_threshold) + IMPORT_SLACK
+        ):
+            regressions.append(
+                "%s: %s vs %s"
+                % (
+                    statement,
+                    _format_time(result.seconds),
+                    _format_time(base["seconds"]),
+                )
+            )
+
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+
+        if result.seconds > base["seconds"] * (1 + threshold):
+            regressions.append(
+                "%s: %s/op vs %s/op"
+                % (name, _format_time(result.seconds), _format_time(base["seconds"]))
+            )
+
+        if result.peak_bytes > base["peak_bytes"] * (1 + threshold) + ALLOCATION_SLACK:
+            regressions.append(
+                "%s: %d B/op peak vs %d B/op"
+                % (name, result.peak_bytes, base["peak_bytes"])
+            )
+
+        if result.retained_bytes > base["retained_bytes"] + ALLOCATION_SLACK:
+            regressions.append(
+                "%s: %.0f B/op retained vs %.0f B/op"
+                % (name, result.retained_bytes, base["retained_bytes"])
+            )
+
+    return regressions
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.2f%s" % (seconds / scale, unit)
+
+    return "%.0fns" % (seconds / 1e-9)
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def report(results: Dict[str, Result], baseline: Optional[Dict[str, Any]] = None):
+    base = (baseline or {}).get("results", {})
+
+    print(
+        "%-32s %10s %10s %12s %12s %8s"
+        % ("benchmark", "time/op", "median", "peak B/op", "kept B/op", "vs base")
+    )
+
+    for name, result in results.items():
+        ratio = ""
+        if name in base:
+            ratio = "%.2fx" % (result.seconds / base[name]["seconds"])
+
+        print(
+            "%-32s %10s %10s %12d %12.0f %8s"
+            % (
+                name,
+                _format_time(result.seconds),
+                _format_time(result.median),
+                result.peak_bytes,
+                result.retained_bytes,
+                ratio,
+            )
+        )
+
+
+def report_imports(
+    imports: Dict[str, ImportResult], baseline: Optional[Dict[str, Any]] = None
+):
+    base = (baseline or {}).get("imports", {})
+
+    print("\n%-40s %10s %8s %8s  %s" % ("import", "time", "modules", "vs base", ""))
+
+    for statement, result in imports.items():
+        ratio = ""
+        if statement in base:
+            ratio = "%.2fx" % (result.seconds / base[statement]["seconds"])
+
+        print(
+            "%-40s %10s %8d %8s  %s"
+            % (
+                statement,
+                _format_time(result.seconds),
+                result.modules,
+                ratio,
+                "loads " + ", ".join(result.forbidden) if result.forbidden else "",
+            )
+        )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-k", dest="filter", help="Only run benchmarks whose name contains this."
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs.")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Minimum seconds per run."
+    )
+    parser.add_argument(
+        "--samples", type=int, default=200, help="Calls traced for allocations."
+    )
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline file.")
+    parser.add_argument(
+        "--save", action="store_true", help="Store the results as the baseline."
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="Exit 1 if a benchmark regressed."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed slowdown (and allocation growth) as a ratio.",
+    )
+    parser.add_argument(
+        "--import-threshold",
+        type=float,
+        default=0.5,
+        help="Allowed import slowdown as a ratio (fresh interpreters are noisier).",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the results as JSON."
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    results: Dict[str, Result] = {}
+
+    for name, setup in BENCHMARKS.items():
+        if args.filter and args.filter not in name:
+            continue
+
+        results[name] = measure(
+            setup(), repeat=args.repeat, min_time=args.min_time, samples=args.samples
+        )
+
+    imports = {
+        statement: measure_import(statement, forbidden, repeat=args.repeat)
+        for statement, forbidden in IMPORTS.items()
+        if not args.filter or args.filter in statement
+    }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.json:
+        json.dump(
+            {
+                "environment": environment(),
+                "results": {k: v._asdict() for k, v in results.items()},
+                "imports": {k: v._asdict() for k, v in imports.items()},
+            },
+            sys.stdout,
+            indent=2,
+        )
+        print()
+    else:
+        if baseline and baseline.get("environment") != environment():
+            print("Note: the baseline was recorded on %s" % baseline.get("environment"))
+        if results:
+            report(results, baseline)
+        if imports:
+            report_imports(imports, baseline)
+
+    if args.save:
+        stored = dict((baseline or {}).get("results", {}))
+        stored.update({k: v._asdict() for k, v in results.items()})
+        stored_imports = dict((baseline or {}).get("imports", {}))
+        stored_imports.update({k: v._asdict() for k, v in imports.items()})
+
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "environment": environment(),
+                    "results": stored,
+                    "imports": stored_imports,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+    if args.check:
+        if baseline is None:
+            sys.exit("No baseline at %s; run with --save first" % args.baseline)
+
+        regressions = compare(
+            results, baseline, args.threshold, imports, args.import_threshold
+        )
+
+        if regressions:
+            print("\nRegressions (threshold %d%%):" % (args.threshold * 100))
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
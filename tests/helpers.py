@@ -0,0 +1,114 @@
+"""Signed webhooks and a mock of the LINE Platform, for driving a ``Client``."""
+
+import base64
+from contextlib import asynccontextmanager
+import hashlib
+import hmac
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from alined.core import Client
+
+SECRET = "test-secret"
+TOKEN = "test-token"
+DESTINATION = "U" + "0" * 32
+
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return base64.b64encode(
+        hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+    ).decode()
+
+
+def webhook(*events: dict, destination: str = DESTINATION) -> bytes:
+    return json.dumps({"destination": destination, "events": list(events)}).encode()
+
+
+def event(type: str, n: int, *, user: str = "U1", **fields: Any) -> dict:
+    return {
+        "type": type,
+        "mode": "active",
+        "timestamp": 1700000000000 + n,
+        "source": {"type": "user", "userId": user},
+        "webhookEventId": "event-%d" % n,
+        "deliveryContext": {"isRedelivery": False},
+        **fields,
+    }
+
+
+def text_event(n: int, text: str = "hello", *, user: str = "U1") -> dict:
+    return event(
+        "message",
+        n,
+        user=user,
+        replyToken="reply-%d" % n,
+        message={"id": str(n), "type": "text", "text": text, "quoteToken": "q"},
+    )
+
+
+class Platform:
+    """Answers the API calls of a client and records them."""
+
+    def __init__(self):
+        self.requests: List[Tuple[str, Dict[str, str], Any]] = []
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        self.requests.append((request.url.path, dict(request.headers), body))
+
+        if request.url.path.endswith(("/reply", "/push")):
+            return httpx.Response(200, json={"sentMessages": []})
+
+        return httpx.Response(200, json={})
+
+    def sent(self, path: str) -> List[Any]:
+        """Bodies of the requests to ``path``."""
+        return [body for p, _, body in self.requests if p == path]
+
+
+def make_client(platform: Optional[Platform] = None, **options: Any) -> Client:
+    if "channels" not in options:
+        options.setdefault("channel_secret", SECRET)
+        options.setdefault("channel_access_token", TOKEN)
+
+    return Client(
+        http_transport=(platform or Platform()).transport,
+        slow_handler_threshold=None,
+        **options,
+    )
+
+
+@asynccontextmanager
+async def serve(client: Client) -> AsyncIterator[httpx.AsyncClient]:
+    """Run the client's app in process and yield an HTTP client for it."""
+    transport = httpx.ASGITransport(app=client.app, raise_app_exceptions=False)
+
+    # ASGITransport doesn't run the lifespan
+    async with client.lifespan(client.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http:
+            yield http
+
+
+async def post(
+    http: httpx.AsyncClient, body: bytes, *, path: str = "/", secret: str = SECRET
+) -> httpx.Response:
+    return await http.post(
+        path,
+        content=body,
+        headers={
+            "content-type": "application/json",
+            "x-line-signature": sign(body, secret),
+        },
+    )
+
+
+async def drain(client: Client):
+    """Wait for the client's queue to be empty."""
+    if client.queue:
+        for shard in client.queue.shards:
+            await shard.join()
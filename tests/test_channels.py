@@ -0,0 +1,186 @@
+import pytest
+
+from alined.channels import Channel
+from alined.webhooks import SignatureVerifier
+
+from .helpers import Platform, make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+
+def channels():
+    return [
+        Channel("shop", "shop-secret", "shop-token"),
+        Channel("support", "support-secret", "support-token"),
+    ]
+
+
+def test_channels_share_one_pool():
+    client = make_client(channels=channels())
+    shop, support = client.http_clients["shop"], client.http_clients["support"]
+
+    assert client.http is shop
+    assert support.client is shop.client
+    assert support.headers == {"Authorization": "Bearer support-token"}
+    assert support.rate_limiter.namespace == "support:"
+
+
+def test_a_channel_can_serve_two_clients():
+    shared = channels()
+    first = make_client(channels=shared)
+    second = make_client(channels=shared)
+
+    assert first.http_clients["support"] is not second.http_clients["support"]
+    assert first.http_clients["support"].client is first.http.client
+    assert not hasattr(shared[1], "http")
+
+
+async def test_replies_as_the_channel_the_event_was_sent_to():
+    platform = Platform()
+    client = make_client(platform, channels=channels())
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond(ctx.channel)
+
+    async with serve(client) as http:
+        body = webhook(text_event(1))
+        assert (
+            await post(http, body, path="/support", secret="support-secret")
+        ).status_code == 200
+
+    [(_, headers, reply)] = platform.requests
+    assert headers["authorization"] == "Bearer support-token"
+    assert reply["messages"] == [{"type": "text", "text": "support"}]
+
+
+def routing_client(*channels: Channel):
+    handled = []
+    client = make_client(channels=list(channels))
+
+    @client.on("text")
+    async def on_text(ctx):
+        handled.append((ctx.channel, ctx.text))
+
+    return client, handled
+
+
+async def test_routes_by_path():
+    client, handled = routing_client(*channels())
+    body = webhook(text_event(1))
+
+    async with serve(client) as http:
+        assert (
+            await post(http, body, path="/shop", secret="shop-secret")
+        ).status_code == 200
+        assert (
+            await post(http, body, path="/shop", secret="support-secret")
+        ).status_code == 403
+        assert (
+            await post(http, body, path="/nope", secret="shop-secret")
+        ).status_code == 404
+
+    assert handled == [("shop", "hello")]
+
+
+async def test_routes_by_destination():
+    client, handled = routing_client(
+        Channel("shop", "shop-secret", "t", destination="Ushop"),
+        Channel("support", "support-secret", "t", destination="Usupport"),
+    )
+
+    async with serve(client) as http:
+        r = await post(
+            http,
+            webhook(text_event(1, "a"), destination="Usupport"),
+            secret="support-secret",
+        )
+        assert r.status_code == 200
+        r = await post(
+            http, webhook(text_event(2, "b"), destination="Ushop"), secret="shop-secret"
+        )
+        assert r.status_code == 200
+        r = await post(
+            http,
+            webhook(text_event(3, "c"), destination="Ushop"),
+            secret="support-secret",
+        )
+        assert r.status_code == 403
+        r = await post(
+            http,
+            webhook(text_event(4, "d"), destination="Uother"),
+            secret="shop-secret",
+        )
+        assert r.status_code == 404
+
+    assert handled == [("support", "a"), ("shop", "b")]
+
+
+async def test_learns_the_destination_of_one_channel():
+    client, handled = routing_client(
+        Channel("shop", "shop-secret", "t", destination="Ushop"),
+        Channel("support", "support-secret", "t"),
+    )
+
+    async with serve(client) as http:
+        # A bad signature teaches nothing
+        r = await post(
+            http, webhook(text_event(1, "a"), destination="Usupport"), secret="x"
+        )
+        assert r.status_code == 403
+
+        r = await post(
+            http,
+            webhook(text_event(2, "b"), destination="Usupport"),
+            secret="support-secret",
+        )
+        assert r.status_code == 200
+
+        # Only one destination can be learnt
+        r = await post(
+            http,
+            webhook(text_event(3, "c"), destination="Uother"),
+            secret="support-secret",
+        )
+        assert r.status_code == 404
+        r = await post(
+            http,
+            webhook(text_event(4, "d"), destination="Usupport"),
+            secret="support-secret",
+        )
+        assert r.status_code == 200
+
+    assert handled == [("support", "b"), ("support", "d")]
+    assert client.channels["support"].destination is None
+
+
+async def test_unknown_destinations_cost_no_signature_checks(monkeypatch):
+    checks = []
+    verify = SignatureVerifier.verify
+    monkeypatch.setattr(
+        SignatureVerifier,
+        "verify",
+        lambda self, *args: checks.append(1) or verify(self, *args),
+    )
+    client, handled = routing_client(*channels())
+
+    async with serve(client) as http:
+        r = await post(
+            http, webhook(text_event(1), destination="Uother"), secret="shop-secret"
+        )
+
+    assert r.status_code == 404
+    assert checks == []
+    assert handled == []
+
+
+async def test_rejects_bad_signatures():
+    client = make_client()
+    body = webhook(text_event(1))
+
+    async with serve(client) as http:
+        assert (await post(http, body, secret="wrong")).status_code == 403
+        r = await http.post(
+            "/", content=body, headers={"content-type": "application/json"}
+        )
+        assert r.status_code == 403
@@ -0,0 +1,39 @@
+import pytest
+
+from alined.components import Sender, TextMessage
+from alined.messaging import to_messages
+
+
+def test_components_are_immutable():
+    message = TextMessage("hi")
+
+    with pytest.raises(AttributeError):
+        message.text = "bye"  # type: ignore
+
+
+def test_changing_the_json_doesnt_change_the_component():
+    message = TextMessage("hi <5ac1bfd5040ab15980c9b435:001>", sender=Sender("bot"))
+
+    data = message.tojson()
+    data["quickReply"] = {"items": []}
+    data["sender"]["name"] = "someone else"
+    data["emojis"].clear()
+    message.json["text"] = "bye"
+
+    assert message.tojson() == to_messages([message])[0]
+    assert to_messages([message])[0] == {
+        "type": "text",
+        "text": "hi $",
+        "emojis": [
+            {"index": 3, "productId": "5ac1bfd5040ab15980c9b435", "emojiId": "001"}
+        ],
+        "sender": {"name": "bot"},
+    }
+
+
+def test_strings_become_text_messages():
+    assert to_messages(["hi", {"type": "sticker"}, b"{}"]) == [
+        {"type": "text", "text": "hi"},
+        {"type": "sticker"},
+        b"{}",
+    ]
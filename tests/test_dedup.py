@@ -0,0 +1,168 @@
+import os
+from typing import List
+
+import pytest
+
+from alined import dedup as dedup_module
+from alined.dedup import EventDeduplicator
+
+from .helpers import make_client, post, serve, text_event, webhook
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dedup_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_drops_claimed_events():
+    dedup = EventDeduplicator()
+
+    assert dedup.claim("a")
+    assert not dedup.claim("a")
+    assert dedup.claim("b")
+    assert dedup.dropped == 1
+
+
+def test_entries_expire(clock):
+    dedup = EventDeduplicator(ttl=10)
+    dedup.claim("a")
+
+    clock[0] += 9
+    assert not dedup.claim("a")
+
+    clock[0] += 2
+    assert dedup.claim("a")
+
+
+def test_least_recently_seen_entries_are_evicted():
+    dedup = EventDeduplicator(max_entries=2)
+    dedup.claim("a")
+    dedup.claim("b")
+    dedup.claim("a")  # seen again
+    dedup.claim("c")
+
+    assert len(dedup.seen) == 2
+    assert not dedup.claim("a")
+    assert dedup.claim("b")
+
+
+def test_forget():
+    dedup = EventDeduplicator()
+    dedup.claim("a")
+    dedup.forget("a")
+
+    assert dedup.claim("a")
+
+
+def test_reloads_from_file(tmp_path, clock):
+    path = str(tmp_path / "dedup.bin")
+    dedup = EventDeduplicator(ttl=10, path=path)
+    dedup.claim("a")
+    dedup.claim("b")
+    dedup.forget("b")
+    clock[0] += 5
+    dedup.claim("c")
+    dedup.close()
+
+    clock[0] += 6  # "a" expired
+    reloaded = EventDeduplicator(ttl=10, path=path)
+    reloaded.open()
+
+    assert reloaded.claim("a")
+    assert reloaded.claim("b")
+    assert not reloaded.claim("c")
+
+
+def test_ignores_a_torn_record(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    dedup = EventDeduplicator(path=path)
+    dedup.claim("a")
+    dedup.close()
+
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    reloaded = EventDeduplicator(path=path)
+    reloaded.open()
+    assert not reloaded.claim("a")
+
+
+def test_compacts_the_file(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    dedup = EventDeduplicator(max_entries=10, path=path)
+
+    for i in range(100):
+        dedup.claim(str(i))
+    dedup.close()
+
+    assert os.path.getsize(path) <= 2 * 10 * EventDeduplicator.RECORD.size
+
+
+@pytest.mark.anyio
+async def test_buffers_appends_once_started(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    dedup = EventDeduplicator(path=path, flush_interval=3600)
+    await dedup.start()
+    size = os.path.getsize(path)
+
+    dedup.claim("a")
+    dedup.claim("b")
+    assert os.path.getsize(path) == size
+
+    await dedup.flush()
+    assert os.path.getsize(path) == size + 2 * EventDeduplicator.RECORD.size
+
+    dedup.claim("c")
+    await dedup.stop()
+
+    reloaded = EventDeduplicator(path=path)
+    reloaded.open()
+    assert not any(reloaded.claim(event_id) for event_id in "abc")
+
+
+@pytest.mark.anyio
+async def test_compacts_in_the_background(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    dedup = EventDeduplicator(max_entries=10, path=path, flush_interval=3600)
+    await dedup.start()
+
+    for i in range(100):
+        dedup.claim(str(i))
+        if i % 7 == 0:
+            await dedup.flush()
+
+    await dedup.stop()
+    assert os.path.getsize(path) <= 3 * 10 * EventDeduplicator.RECORD.size
+
+    reloaded = EventDeduplicator(max_entries=10, path=path)
+    reloaded.open()
+    assert sorted(reloaded.seen) == sorted(dedup.seen)
+
+
+@pytest.mark.anyio
+async def test_redeliveries_are_handled_once():
+    handled: List[str] = []
+    failures = [1]
+    client = make_client()
+
+    @client.on("text")
+    async def on_text(ctx):
+        if ctx.text == "flaky" and failures:
+            failures.pop()
+            raise RuntimeError("try again")
+
+        handled.append(ctx.text)
+
+    async with serve(client) as http:
+        body = webhook(text_event(1, "once"))
+        assert (await post(http, body)).status_code == 200
+        assert (await post(http, body)).status_code == 200
+
+        # A failed event is handled again when redelivered
+        body = webhook(text_event(2, "flaky"))
+        assert (await post(http, body)).status_code == 500
+        assert (await post(http, body)).status_code == 200
+
+    assert handled == ["once", "flaky"]
@@ -0,0 +1,58 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+import alined
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("name", sorted(alined._EXPORTS))
+def test_exports_resolve(name: str):
+    namespace: dict = {}
+    exec("from alined import %s" % name, namespace)
+
+    module = importlib.import_module("alined." + alined._EXPORTS[name])
+    assert namespace[name] is getattr(module, name)
+    assert getattr(alined, name) is namespace[name]
+
+
+def test_all_matches_the_exports():
+    assert sorted(alined.__all__) == sorted(alined._EXPORTS)
+    assert set(alined.__all__) <= set(dir(alined))
+
+
+def test_unknown_names():
+    with pytest.raises(AttributeError):
+        alined.NotAThing  # noqa: B018
+
+    with pytest.raises(ImportError):
+        exec("from alined import NotAThing", {})
+
+
+@pytest.mark.parametrize(
+    "statement, forbidden",
+    [
+        ("import alined", ["fastapi", "httpx", "pydantic"]),
+        ("from alined import TextMessage", ["fastapi", "httpx", "pydantic"]),
+        ("from alined import Client", ["fastapi", "uvicorn"]),
+    ],
+)
+def test_imports_stay_light(statement: str, forbidden: list):
+    code = "import sys; %s; print(','.join(m for m in %r if m in sys.modules))" % (
+        statement,
+        forbidden,
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    assert loaded == ""
@@ -0,0 +1,63 @@
+import random
+import typing
+
+import pytest
+
+from alined.dataclass import AnyEvent
+from alined.dataclass_redirector import redirect_dataclass
+
+from benchmarks.events import EVENTS
+
+from .helpers import event, make_client, text_event
+
+MENTIONS = text_event(1, "@all @bob hi")
+MENTIONS["message"].update(
+    mentions={
+        "mentionees": [
+            {"type": "all", "index": 0, "length": 4},
+            {"type": "user", "index": 5, "length": 4, "userId": "U2"},
+        ]
+    },
+    emojis=[{"index": 12, "length": 1, "productId": "p", "emojiId": "001"}],
+    quotedMessageId="0",
+)
+IMAGE_SET = event(
+    "message",
+    2,
+    replyToken="r",
+    message={
+        "id": "2",
+        "type": "image",
+        "quoteToken": "q",
+        "contentProvider": {"type": "line"},
+        "imageSet": {"id": "set", "index": 1, "total": 2},
+    },
+)
+GROUP = text_event(3)
+GROUP["source"] = {"type": "group", "groupId": "C1", "userId": "U1"}
+
+SAMPLES = [MENTIONS, IMAGE_SET, GROUP] + [
+    factory(random.Random(seed), seed)
+    for factory in EVENTS.values()
+    for seed in range(8)
+]
+
+
+def test_samples_cover_every_event_model():
+    union = typing.get_args(typing.get_args(AnyEvent)[0])
+    assert {type(redirect_dataclass(raw)) for raw in SAMPLES} == set(union)
+
+
+@pytest.mark.parametrize("raw", SAMPLES, ids=lambda raw: raw["type"])
+@pytest.mark.parametrize("parsing", ["eager", "lazy"])
+def test_events_round_trip_through_the_store_encoding(raw: dict, parsing: str):
+    client = make_client(parsing=parsing)
+    e = client._decode_event(client.codec.dumps(raw))
+    decoded = client._decode_event(client._encode_event(e))
+
+    if parsing == "eager":
+        assert type(decoded) is type(e)
+        assert decoded == e
+        assert decoded == redirect_dataclass(raw)
+    else:
+        assert decoded.materialize() == e.materialize()  # type: ignore
@@ -0,0 +1,49 @@
+import random
+from typing import Optional, Union
+
+import pytest
+from pydantic import BaseModel
+
+from alined import lazy
+from alined.dataclass_redirector import redirect_dataclass
+from alined.lazy import lazy_event
+
+from benchmarks.events import EVENTS
+
+
+class Point(BaseModel):
+    x: int
+
+
+class Label(BaseModel):
+    text: str
+
+
+@pytest.mark.parametrize("name", list(EVENTS))
+@pytest.mark.parametrize("trusted", [False, True])
+def test_lazy_events_read_like_eager_ones(name: str, trusted: bool):
+    raw = EVENTS[name](random.Random(0), 1)
+    eager = redirect_dataclass(raw)
+    event = lazy_event(raw, trusted=trusted)
+
+    assert event.type == eager.type
+    assert event.webhook_event_id == eager.webhook_event_id
+    assert event.source.type == eager.source.type
+    if not trusted:
+        assert event.materialize() == eager
+
+
+def test_fallback_adapter_is_built_once(monkeypatch):
+    built = []
+
+    class CountingAdapter(lazy.TypeAdapter):
+        def __init__(self, *args, **kwargs):
+            built.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(lazy, "TypeAdapter", CountingAdapter)
+    resolve = lazy._resolver(Optional[Union[Point, Label]])
+
+    assert resolve({"x": 1}, False) == Point(x=1)
+    assert resolve({"text": "a"}, False) == Label(text="a")
+    assert len(built) == 1
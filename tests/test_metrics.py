@@ -0,0 +1,56 @@
+import httpx
+import pytest
+
+from alined.core import Client
+
+from .helpers import (
+    SECRET,
+    TOKEN,
+    Platform,
+    make_client,
+    post,
+    serve,
+    text_event,
+    webhook,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def refuse(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("refused", request=request)
+
+
+async def test_failed_requests_are_counted_by_error():
+    client = Client(
+        channel_secret=SECRET,
+        channel_access_token=TOKEN,
+        metrics=True,
+        retry=False,
+        circuit_breaker=False,
+        http_transport=httpx.MockTransport(refuse),
+    )
+
+    async with client.lifespan(client.app):
+        with pytest.raises(httpx.ConnectError):
+            await client.push_message("U1", "hi")
+
+    assert client.metrics
+    assert 'endpoint="push",status="ConnectError"} 1' in client.metrics.render()
+
+
+async def test_webhooks_handlers_and_requests_are_measured():
+    client = make_client(Platform(), metrics=True)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond("hi")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1)))
+        text = (await http.get("/metrics")).text
+
+    assert 'events_total{type="message"} 1' in text
+    assert 'endpoint="reply",status="200"} 1' in text
+    assert 'stage="verify"' in text
+    assert "on_text" in text
@@ -0,0 +1,69 @@
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from alined.core import Client
+from alined.retry import CircuitBreaker, CircuitOpenError
+
+from .helpers import SECRET, TOKEN
+
+pytestmark = pytest.mark.anyio
+
+USERS = ["U%d" % i for i in range(5000)]
+
+
+def make_multicast_client(handler, **options) -> Client:
+    return Client(
+        channel_secret=SECRET,
+        channel_access_token=TOKEN,
+        retry=False,
+        slow_handler_threshold=None,
+        http_transport=httpx.MockTransport(handler),
+        **options,
+    )
+
+
+async def test_chunks_of_500():
+    sent: List[dict] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    client = make_multicast_client(handle)
+
+    async with client.lifespan(client.app):
+        results = await client.multicast(USERS[:1200], "hi")
+
+    assert [len(r.to) for r in results] == [500, 500, 200]
+    assert all(r.ok for r in results)
+    assert sorted(u for body in sent for u in body["to"]) == sorted(USERS[:1200])
+
+
+async def test_breaker_opening_midway_fails_the_remaining_chunks():
+    requests = []
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        requests.append(request.headers["x-line-retry-key"])
+        return httpx.Response(500, json={"message": "down"})
+
+    client = make_multicast_client(
+        fail, circuit_breaker=CircuitBreaker(failure_threshold=5)
+    )
+
+    async with client.lifespan(client.app):
+        results = await client.multicast(USERS, "hi", concurrency=2)
+
+    assert len(results) == 10
+    assert not any(r.ok for r in results)
+    assert len(requests) == 5
+    assert sum(isinstance(r.error, httpx.HTTPStatusError) for r in results) == 5
+    assert sum(isinstance(r.error, CircuitOpenError) for r in results) == 5
+
+    # Every chunk keeps its retry key, to be resent later
+    assert {
+        r.retry_key for r in results if isinstance(r.error, httpx.HTTPStatusError)
+    } == set(requests)
+    assert len({r.retry_key for r in results}) == 10
@@ -0,0 +1,82 @@
+import asyncio
+from typing import List, Tuple
+
+import pytest
+
+from alined.dataclass_redirector import redirect_dataclass
+from alined.workers import group_by_source
+
+from .helpers import drain, make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+# Earlier events of a source take longer, so they'd finish last if run at once
+BATCH = [
+    text_event(1, "a1:0.04", user="Ua"),
+    text_event(2, "b1:0.01", user="Ub"),
+    text_event(3, "a2:0.02", user="Ua"),
+    text_event(4, "a3:0", user="Ua"),
+    text_event(5, "b2:0", user="Ub"),
+]
+
+
+def make_recording_client(**options):
+    finished: List[Tuple[str, str]] = []
+    client = make_client(**options)
+
+    @client.on("text")
+    async def on_text(ctx):
+        name, _, delay = ctx.text.partition(":")
+        await asyncio.sleep(float(delay))
+        finished.append((ctx.user_id, name))
+
+    return client, finished
+
+
+def by_source(finished: List[Tuple[str, str]], user: str) -> List[str]:
+    return [name for source, name in finished if source == user]
+
+
+def test_group_by_source_keeps_order():
+    events = [redirect_dataclass(e) for e in BATCH]
+    groups = group_by_source(events)
+
+    assert [[e.message.text[:2] for e in group] for group in groups] == [
+        ["a1", "a2", "a3"],
+        ["b1", "b2"],
+    ]
+
+
+@pytest.mark.parametrize("ack_first", [False, True])
+async def test_events_of_one_source_are_handled_in_order(ack_first: bool):
+    client, finished = make_recording_client(ack_first=ack_first)
+
+    async with serve(client) as http:
+        assert (await post(http, webhook(*BATCH))).status_code == 200
+        await drain(client)
+
+    assert by_source(finished, "Ua") == ["a1", "a2", "a3"]
+    assert by_source(finished, "Ub") == ["b1", "b2"]
+    if not ack_first:
+        # Sources don't wait on each other (queued ones may share a shard)
+        assert finished.index(("Ub", "b2")) < finished.index(("Ua", "a1"))
+
+
+async def test_order_across_webhooks_with_queue():
+    client, finished = make_recording_client(ack_first=True)
+
+    async with serve(client) as http:
+        for e in BATCH[:3]:
+            assert (await post(http, webhook(e))).status_code == 200
+        await drain(client)
+
+    assert by_source(finished, "Ua") == ["a1", "a2"]
+
+
+async def test_sequential_sources():
+    client, finished = make_recording_client(concurrent_sources=False)
+
+    async with serve(client) as http:
+        assert (await post(http, webhook(*BATCH))).status_code == 200
+
+    assert [name for _, name in finished] == ["a1", "b1", "a2", "a3", "b2"]
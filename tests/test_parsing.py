@@ -0,0 +1,84 @@
+from typing import List
+
+import pytest
+
+from alined.routing import ROUTES
+
+from .helpers import event, make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+# Event types the SDK has no model for
+ACCOUNT_LINK = event(
+    "accountLink",
+    2,
+    replyToken="reply-2",
+    link={"result": "ok", "nonce": "xyz"},
+)
+UNKNOWN_MESSAGE = text_event(3)
+UNKNOWN_MESSAGE["message"] = {"id": "3", "type": "story", "quoteToken": "q"}
+
+
+async def ignore(*_):
+    pass
+
+
+@pytest.mark.parametrize("parsing", ["eager", "lazy", "trusted"])
+@pytest.mark.parametrize("listen_to_all", [True, False])
+async def test_unmodelled_event_types_are_skipped(parsing: str, listen_to_all: bool):
+    handled: List[str] = []
+    client = make_client(parsing=parsing)
+
+    if listen_to_all:
+        for route in ROUTES.values():
+            for name in route.names:
+                client.on(name)(ignore)
+
+    @client.on("text")
+    async def on_text(ctx):
+        handled.append(ctx.text)
+
+    assert client.router.listens_to_all is listen_to_all
+
+    async with serve(client) as http:
+        body = webhook(text_event(1, "one"), ACCOUNT_LINK, UNKNOWN_MESSAGE)
+        r = await post(http, body)
+
+    assert r.status_code == 200
+    assert handled == ["one"]
+
+
+@pytest.mark.parametrize("parsing", ["eager", "lazy"])
+async def test_events_nobody_listens_to_are_not_parsed(parsing: str):
+    handled: List[str] = []
+    client = make_client(parsing=parsing)
+
+    @client.on("follow")
+    async def on_follow(ctx):
+        handled.append(ctx.webhook_event_id)
+
+    # Invalid, but never parsed
+    broken = text_event(1)
+    del broken["message"]["text"]
+    follow = event("follow", 2, replyToken="r", follow={"isUnblocked": False})
+
+    async with serve(client) as http:
+        r = await post(http, webhook(broken, follow))
+
+    assert r.status_code == 200
+    assert handled == ["event-2"]
+
+
+async def test_verification_webhook():
+    verified = []
+    client = make_client()
+
+    @client.on("verified")
+    async def on_verified():
+        verified.append(True)
+
+    async with serve(client) as http:
+        r = await post(http, webhook())
+
+    assert r.status_code == 200
+    assert verified == [True]
@@ -0,0 +1,162 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from alined.workers import EventQueue
+
+from .helpers import drain, make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_put_many_is_all_or_nothing():
+    release = asyncio.Event()
+    processed: List[str] = []
+
+    async def process(item: str):
+        await release.wait()
+        processed.append(item)
+
+    queue = EventQueue(process, maxsize=2, workers=1, put_timeout=0.05)
+    await queue.start()
+
+    await queue.put("busy")
+    await asyncio.sleep(0.01)  # taken by the worker
+    await queue.put("a")
+
+    with pytest.raises(asyncio.QueueFull):
+        await queue.put_many([("b", None), ("c", None)])
+
+    assert queue.depth == 1
+    assert queue.rejected == 2
+
+    release.set()
+    await queue.stop()
+    assert processed == ["busy", "a"]
+
+
+async def test_put_many_waits_for_room():
+    release = asyncio.Event()
+
+    async def process(item: str):
+        await release.wait()
+
+    queue = EventQueue(process, maxsize=2, workers=1, put_timeout=1.0)
+    await queue.start()
+    await queue.put("busy")
+    await asyncio.sleep(0.01)
+    await queue.put("a")
+
+    put = asyncio.ensure_future(queue.put_many([("b", None), ("c", None)]))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+
+    release.set()
+    await put
+    await queue.stop()
+    assert queue.enqueued == 4
+    assert queue.rejected == 0
+
+
+async def test_put_many_batches_dont_share_room():
+    first = asyncio.Event()
+    rest = asyncio.Event()
+
+    async def process(item: str):
+        if item == "busy":
+            await first.wait()
+        elif item not in ("a", "b"):
+            await rest.wait()
+
+    queue = EventQueue(process, maxsize=2, workers=1, put_timeout=0.2)
+    await queue.start()
+    await queue.put("busy")
+    await asyncio.sleep(0.01)
+    await queue.put("a")
+    await queue.put("b")
+
+    # Both wait for the same two slots
+    batches = [
+        asyncio.ensure_future(queue.put_many([(name + "1", None), (name + "2", None)]))
+        for name in ("x", "y")
+    ]
+    await asyncio.sleep(0.01)
+    first.set()
+    results = await asyncio.gather(*batches, return_exceptions=True)
+
+    assert sorted(map(type, results), key=str) == sorted(
+        [type(None), asyncio.QueueFull], key=str
+    )
+    assert queue.rejected == 2
+    assert queue.enqueued == 5
+    assert queue.depth == 1
+
+    rest.set()
+    await queue.stop()
+    assert queue.processed == 5
+
+
+async def test_put_many_rejects_batches_larger_than_a_shard():
+    queue = EventQueue(lambda item: asyncio.sleep(0), maxsize=2, workers=1)
+
+    with pytest.raises(asyncio.QueueFull):
+        await queue.put_many([(i, "same source") for i in range(3)])
+
+    assert queue.depth == 0
+
+
+async def test_acknowledges_before_handling():
+    release = asyncio.Event()
+    client = make_client(ack_first=True)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await release.wait()
+
+    async with serve(client) as http:
+        r = await post(http, webhook(text_event(1)))
+        assert r.status_code == 200
+        assert client.queue and client.queue.enqueued == 1
+
+        release.set()
+        await drain(client)
+
+    assert client.queue.processed == 1
+
+
+async def test_full_queue_rejects_the_whole_batch():
+    release = asyncio.Event()
+    handled: List[str] = []
+    # Without dedup, a half-queued batch would be handled twice on redelivery
+    client = make_client(
+        ack_first=True,
+        queue_size=2,
+        queue_workers=1,
+        queue_put_timeout=0.05,
+        dedup=False,
+    )
+
+    @client.on("text")
+    async def on_text(ctx):
+        await release.wait()
+        handled.append(ctx.text)
+
+    async with serve(client) as http:
+        assert (await post(http, webhook(text_event(1, "1")))).status_code == 200
+        await asyncio.sleep(0.01)  # taken by the worker
+        assert (await post(http, webhook(text_event(2, "2")))).status_code == 200
+
+        batch = webhook(text_event(3, "3"), text_event(4, "4"))
+        r = await post(http, batch)
+        assert r.status_code == 503
+        assert client.queue and client.queue.depth == 1
+
+        release.set()
+        await drain(client)
+
+        # LINE redelivers it
+        assert (await post(http, batch)).status_code == 200
+        await drain(client)
+
+    assert handled == ["1", "2", "3", "4"]
@@ -0,0 +1,176 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from alined.rate_limiting import (
+    FileRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def too_many_requests(**headers: str) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.line.me/v2/bot/message/push")
+    response = httpx.Response(429, headers=headers, request=request)
+    return httpx.HTTPStatusError("429", request=request, response=response)
+
+
+def test_bucket_refills():
+    bucket = TokenBucket(requests=2, per_seconds=1, now=0)
+
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == 0
+    assert bucket.take(0) == pytest.approx(0.5)
+    assert bucket.take(0.25) == pytest.approx(0.25)
+    assert bucket.take(0.5) == 0
+
+    # Never past capacity
+    assert bucket.take(100) == 0
+    assert bucket.take(100) == 0
+    assert bucket.take(100) > 0
+
+
+def test_penalized_bucket_blocks():
+    bucket = TokenBucket(requests=10, per_seconds=1, now=0)
+    bucket.penalize(0, 3)
+
+    assert bucket.take(1) == pytest.approx(2)
+    assert bucket.take(3) == 0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+@pytest.mark.anyio
+async def test_acquire_waits_for_a_token():
+    limiter = RateLimiter({"push": (2, 0.1)})
+    started = time.monotonic()
+
+    for _ in range(4):
+        await limiter.acquire("push")
+
+    # Two tokens up front, then 0.05s per token
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.anyio
+async def test_429_holds_the_endpoint_back_for_retry_after():
+    backend = MemoryRateLimitBackend()
+    limiter = RateLimiter(backend=backend)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        async with limiter.limit("push"):
+            raise too_many_requests(**{"Retry-After": "30"})
+
+    assert await backend.take("push", 2000, 1) == pytest.approx(30, abs=1)
+    assert await backend.take("reply", 2000, 1) == 0
+
+
+@pytest.mark.anyio
+async def test_429_without_retry_after_uses_the_default():
+    backend = MemoryRateLimitBackend()
+    limiter = RateLimiter(backend=backend)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        async with limiter.limit("push", default_retry_after=5):
+            raise too_many_requests()
+
+    assert await backend.take("push", 2000, 1) == pytest.approx(5, abs=1)
+
+
+@pytest.mark.anyio
+async def test_other_errors_dont_hold_the_endpoint_back():
+    backend = MemoryRateLimitBackend()
+    limiter = RateLimiter(backend=backend)
+    request = httpx.Request("POST", "https://api.line.me/")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        async with limiter.limit("push"):
+            raise httpx.HTTPStatusError(
+                "500", request=request, response=httpx.Response(500, request=request)
+            )
+
+    assert await backend.take("push", 2000, 1) == 0
+
+
+@pytest.mark.anyio
+async def test_namespaces_keep_separate_buckets():
+    backend = MemoryRateLimitBackend()
+    shop = RateLimiter({"push": (1, 3600)}, backend=backend, namespace="shop:")
+    support = RateLimiter({"push": (1, 3600)}, backend=backend, namespace="support:")
+
+    await shop.acquire("push")
+    await support.acquire("push")
+    assert set(backend.buckets) == {"shop:push", "support:push"}
+
+
+TAKE = """
+import asyncio, sys
+from alined.rate_limiting import FileRateLimitBackend
+
+async def main():
+    backend = FileRateLimitBackend(sys.argv[1])
+    taken = 0
+    for _ in range(10):
+        taken += await backend.take("push", 10, 3600) == 0
+    print(taken)
+
+asyncio.run(main())
+"""
+
+
+def test_file_backend_shares_one_budget_between_processes(tmp_path):
+    path = str(tmp_path / "limits")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", TAKE, path],
+            cwd=ROOT,
+            env={**os.environ, "PYTHONPATH": ROOT},
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(2)
+    ]
+    taken = [int(p.communicate(timeout=30)[0]) for p in processes]
+
+    assert sum(taken) == 10
+
+
+@pytest.mark.anyio
+async def test_file_backend_penalty_is_shared(tmp_path):
+    path = str(tmp_path / "limits")
+    first = FileRateLimitBackend(path)
+    second = FileRateLimitBackend(path)
+
+    try:
+        await first.penalize("push", 10, 1, 30)
+        assert await second.take("push", 10, 1) == pytest.approx(30, abs=1)
+        assert await second.take("reply", 10, 1) == 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_file_backend_runs_out_of_slots(tmp_path):
+    backend = FileRateLimitBackend(str(tmp_path / "limits"), slots=1)
+
+    try:
+        asyncio.run(backend.take("push", 10, 1))
+        with pytest.raises(RuntimeError):
+            asyncio.run(backend.take("reply", 10, 1))
+    finally:
+        backend.close()
@@ -0,0 +1,121 @@
+from typing import List
+
+import pytest
+
+from .helpers import Platform, make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+REPLY = "/v2/bot/message/reply"
+PUSH = "/v2/bot/message/push"
+
+
+def texts(body: dict) -> List[str]:
+    return [m["text"] for m in body["messages"]]
+
+
+async def test_responses_are_sent_as_one_reply():
+    platform = Platform()
+    client = make_client(platform)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond("a", "b")
+        await ctx.respond("c")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1)))
+
+    assert [texts(b) for b in platform.sent(REPLY)] == [["a", "b", "c"]]
+    assert platform.sent(REPLY)[0]["replyToken"] == "reply-1"
+    assert platform.sent(PUSH) == []
+
+
+async def test_more_than_five_messages_spill_to_push():
+    platform = Platform()
+    client = make_client(platform)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond(*"1234")
+        await ctx.respond(*"56789ab")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1, user="Ualice")))
+
+    assert [texts(b) for b in platform.sent(REPLY)] == [list("12345")]
+    assert [texts(b) for b in platform.sent(PUSH)] == [list("6789a"), ["b"]]
+    assert {b["to"] for b in platform.sent(PUSH)} == {"Ualice"}
+
+
+async def test_replies_are_sent_when_the_handler_returns():
+    platform = Platform()
+    client = make_client(platform)
+    seen: List[int] = []
+
+    @client.on("text")
+    async def first(ctx):
+        await ctx.respond("first")
+        assert platform.sent(REPLY) == []
+
+    @client.on("text")
+    async def second(ctx):
+        seen.append(len(platform.sent(REPLY)))
+        await ctx.respond("second")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1)))
+
+    assert seen == [1]
+    assert [texts(b) for b in platform.sent(REPLY)] == [["first"]]
+    assert [texts(b) for b in platform.sent(PUSH)] == [["second"]]
+
+
+async def test_explicit_flush():
+    platform = Platform()
+    client = make_client(platform)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond("now")
+        await ctx.flush()
+        assert len(platform.sent(REPLY)) == 1
+        await ctx.respond("later")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1)))
+
+    assert [texts(b) for b in platform.sent(PUSH)] == [["later"]]
+
+
+async def test_without_coalescing_each_response_is_sent_right_away():
+    platform = Platform()
+    client = make_client(platform, coalesce_replies=False)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond("a")
+        assert len(platform.sent(REPLY)) == 1
+        await ctx.respond("b")
+
+    async with serve(client) as http:
+        await post(http, webhook(text_event(1)))
+
+    assert [texts(b) for b in platform.sent(REPLY)] == [["a"]]
+    assert [texts(b) for b in platform.sent(PUSH)] == [["b"]]
+
+
+async def test_failed_handlers_send_nothing():
+    platform = Platform()
+    client = make_client(platform)
+
+    @client.on("text")
+    async def on_text(ctx):
+        await ctx.respond("half done")
+        raise RuntimeError
+
+    async with serve(client) as http:
+        r = await post(http, webhook(text_event(1)))
+
+    assert r.status_code == 500
+    assert platform.requests == []
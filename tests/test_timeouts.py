@@ -0,0 +1,70 @@
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from .helpers import make_client, post, serve, text_event, webhook
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_event_decorator_takes_a_timeout():
+    client = make_client()
+    handled: List[str] = []
+
+    @client.event(timeout=0.05)
+    async def on_text(ctx):
+        await asyncio.sleep(float(ctx.text))
+        handled.append(ctx.text)
+
+    @client.event
+    async def on_follow(ctx):
+        pass
+
+    assert client.handler_timeouts == {on_text: 0.05}
+    assert set(client.handlers) == {"text", "follow"}
+
+    async with serve(client) as http:
+        assert (await post(http, webhook(text_event(1, "0")))).status_code == 200
+        assert (await post(http, webhook(text_event(2, "1")))).status_code == 500
+
+    assert handled == ["0"]
+
+
+async def test_event_decorator_checks_names():
+    client = make_client()
+
+    with pytest.raises(NameError):
+
+        @client.event
+        async def text(ctx):
+            pass
+
+
+async def test_webhook_deadline():
+    client = make_client(handler_timeout=1.0, webhook_timeout=0.1)
+    handled: List[str] = []
+    slow = [True]
+
+    @client.on("text")
+    async def on_text(ctx):
+        # Each keeps to the handler deadline, but not all of them together
+        if slow:
+            await asyncio.sleep(0.06)
+        handled.append(ctx.text)
+
+    body = webhook(*(text_event(i, str(i)) for i in range(3)))
+
+    async with serve(client) as http:
+        started = time.perf_counter()
+        r = await post(http, body)
+        assert r.status_code == 503
+        assert time.perf_counter() - started < 0.5
+        assert handled == ["0"]
+
+        # The redelivery only runs what didn't finish
+        slow.clear()
+        assert (await post(http, body)).status_code == 200
+
+    assert handled == ["0", "1", "2"]
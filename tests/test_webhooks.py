@@ -0,0 +1,20 @@
+from alined.webhooks import SignatureVerifier, verify_signature
+
+from .helpers import sign
+
+BODY = b'{"destination":"U0","events":[]}'
+
+
+def test_signature_verifier():
+    verifier = SignatureVerifier("secret")
+
+    assert verifier.verify(BODY, sign(BODY, "secret"))
+    assert verifier.verify(BODY, sign(BODY, "secret"))
+    assert not verifier.verify(BODY, sign(BODY, "other"))
+    assert not verifier.verify(BODY + b" ", sign(BODY, "secret"))
+    assert not verifier.verify(BODY, "")
+
+
+def test_verify_signature():
+    assert verify_signature("secret", BODY, sign(BODY, "secret"))
+    assert not verify_signature("secret", BODY, sign(BODY, "other"))